@@ -26,6 +26,22 @@ def create_app(config_name='dev'):
     from app.api.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
 
+    # Préchauffage de la connexion fournisseur LLM (DNS + TLS) sans bloquer le démarrage :
+    # c'est le client asynchrone partagé (boucle d'E/S du processus) qui servira les requêtes
+    if app.config.get('LLM_PREWARM'):
+        from app.services.llm_clients import client_registry
+        client_registry.prewarm_background(app.config['LLM_PROVIDER'].lower())
+
+    # Workers des tâches asynchrones (reprennent aussi les tâches soumises aux autres workers gunicorn)
+    if app.config.get('JOBS_ENABLED'):
+        from app.core.jobs import job_queue
+        job_queue.start()
+
+    # Cache météo de toutes les régions rafraîchi en arrière-plan avant expiration
+    if app.config.get('WEATHER_REFRESH_ENABLED'):
+        from app.agents.weather.refresh import weather_refresher
+        weather_refresher.start()
+
     @app.route('/')
     def index():
         return "Système Multi-Agents Agriculture Cameroun - API Operational"
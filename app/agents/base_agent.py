@@ -1,21 +1,61 @@
 from app.services.llm_service import LLMService
-from typing import Any, Dict
+from app.models.extraction import ExtractionSchema
+from app.core.context import RequestContext
+from app.data.local_data import get_region_by_name
+from typing import Optional, Type
 
 class BaseAgent:
+    # Schéma d'extraction (intention + entités) de l'agent ; None si l'agent n'en a pas
+    extraction_schema: Optional[Type[ExtractionSchema]] = None
+    # Vrai si prepare() fait autre chose que l'extraction (ex: préchargement de données)
+    has_prefetch: bool = False
+
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
         self.llm_service = LLMService()
 
-    async def process(self, query: str, context: Dict[str, Any]) -> str:
+    async def extract(self, query: str, context: RequestContext) -> Optional[ExtractionSchema]:
+        """Intention + entités en un appel LLM (surchargée par les agents spécialisés)."""
+        return None
+
+    async def prepare(self, query: str, context: RequestContext,
+                      with_extraction: bool = True) -> Optional[ExtractionSchema]:
+        """
+        Moitié avant de process(), sans effet de bord : peut être lancée de
+        façon spéculative pendant le routage puis annulée. Retourne
+        l'extraction à passer à process() (None si non demandée).
+        """
+        if not with_extraction:
+            return None
+        return await self.extract(query, context)
+
+    async def process(self, query: str, context: RequestContext,
+                      extracted: Optional[ExtractionSchema] = None) -> str:
         """
         Méthode principale à surcharger ou utiliser telle quelle avec un prompt système dynamique.
+        `extracted` : intention et entités déjà extraites (routage fusionné), l'agent
+        saute alors son propre appel d'extraction.
         """
         system_prompt = self._build_system_prompt(context)
-        response = await self.llm_service.generate_response(query, system_prompt)
+        response = await self.llm_service.generate_response(query, system_prompt, kind="tool")
         return response
 
-    def _build_system_prompt(self, context: Dict[str, Any]) -> str:
+    def fallback(self, query: str, context: RequestContext,
+                 extracted: Optional[ExtractionSchema] = None) -> str:
+        """
+        Réponse de repli sans LLM (agent en échec ou hors délai), à partir des
+        données locales. Surchargée par les agents qui ont mieux à proposer.
+        """
+        region_name = context.get('region', 'Centre')
+        region_info = get_region_by_name(region_name)
+        answer = f"⚠️ {self.name} : réponse détaillée indisponible pour le moment."
+        if region_info:
+            answer += (f"\n📍 {region_info.name} : {region_info.climate_description} "
+                       f"Cultures principales : {', '.join(region_info.major_crops)}.")
+        return answer
+
+    def _build_system_prompt(self, context: RequestContext) -> str:
         """Construit le prompt système avec le contexte"""
         base_prompt = f"Tu es l'agent {self.name}. Ton rôle est : {self.description}.\n"
         base_prompt += "Contexte actuel :\n"
@@ -1,7 +1,10 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
-import json
+from app.core.context import RequestContext
+from typing import Optional
 from app.data.local_data import get_region_by_name
+from app.data.planting_calendar import get_planting_info
+from app.agents.weather.tools import get_agricultural_weather_summary_async, normalize_region
+from .schemas import CropExtraction
 from .prompt import get_system_prompt, get_combined_prompt, get_intent_prompt, get_extraction_prompt
 from .tools import (
     get_planting_calendar, 
@@ -11,35 +14,27 @@ from .tools import (
 )
 
 class CropAgent(BaseAgent):
+    extraction_schema = CropExtraction
+
     def __init__(self):
         super().__init__(
             name="CropAgent",
             description="Agronome expert spécialisé dans les cultures camerounaises (Cacao, Café, Coton, Vivriers). Donne des conseils sur les itinéraires techniques, les semis et les récoltes."
         )
 
-    async def process(self, query: str, context: Dict[str, Any]) -> str:
+    async def extract(self, query: str, context: RequestContext) -> CropExtraction:
+        combined_prompt = get_combined_prompt(query, context.get('region', 'Centre'))
+        return await self.llm_service.generate_json(combined_prompt, CropExtraction)
+
+    async def process(self, query: str, context: RequestContext, extracted: Optional[CropExtraction] = None) -> str:
         # 1. Récupération du contexte
         region_name = context.get('region', 'Centre')
         region_info = get_region_by_name(region_name)
         
-        # 2. Intent + Extraction en UN SEUL appel LLM (optimisation latence)
-        combined_prompt = get_combined_prompt(query, region_name)
-        combined_json = await self.llm_service.generate_response(combined_prompt)
-        
-        try:
-            cleaned = combined_json.replace("```json", "").replace("```", "").strip()
-            parsed = json.loads(cleaned)
-            intent = parsed.get("intent", "GENERAL").strip().upper()
-            crop_name = parsed.get("culture", "Non spécifié").strip()
-        except Exception as e:
-            print(f"Warning: Failed to parse combined JSON for CropAgent: {e}")
-            intent = "GENERAL"
-            crop_name = "Non spécifié"
-        
-        # Validation de l'intent
-        valid_intents = ["CALENDAR", "ROTATION", "VARIETY", "TECHNIQUE", "GENERAL"]
-        if intent not in valid_intents:
-            intent = "GENERAL"
+        # 2. Intent + Extraction en UN SEUL appel LLM (déjà faite si routage fusionné)
+        extraction = extracted if extracted is not None else await self.extract(query, context)
+        intent = extraction.intent
+        crop_name = extraction.culture
         
         print(f"DEBUG: Intent detected by CropAgent: {intent}")
 
@@ -48,13 +43,19 @@ class CropAgent(BaseAgent):
 
         # 3. Dispatching vers les outils
         if intent == "CALENDAR":
-            result = await get_planting_calendar(self.llm_service, crop_name, region_name)
+            # Synthèse météo partagée (mémo de la requête) : calculée une seule fois si le WeatherAgent est aussi consulté.
+            # Région normalisée comme dans le WeatherAgent, sinon la clé du mémo diffère ("centre" / "Centre")
+            weather_summary = await get_agricultural_weather_summary_async(normalize_region(region_name))
+            result = await get_planting_calendar(self.llm_service, crop_name, region_name, weather_summary)
             return f"Voici le calendrier de plantation pour le {crop_name} en région {region_name} :\n\n{result.get('calendar')}"
             
         elif intent == "ROTATION":
-            soil_type = "Sol ferralitique standard" 
-            if region_info and region_info.soil_types:
-                soil_type = region_info.soil_types[0]
+            # Sol déclaré par l'utilisateur, sinon sol dominant de la région
+            soil_type = context.get('soil_type')
+            if not soil_type:
+                soil_type = "Sol ferralitique standard"
+                if region_info and region_info.soil_types:
+                    soil_type = region_info.soil_types[0]
             result = await get_crop_rotation_advice(self.llm_service, crop_name, soil_type)
             return f"Conseils de rotation pour {crop_name} ({soil_type}) :\n\n{result.get('rotation_plan')}"
             
@@ -70,4 +71,16 @@ class CropAgent(BaseAgent):
             crops_str = ", ".join(region_info.major_crops) if region_info else "Toutes cultures"
             climate_desc = region_info.climate_description if region_info else ''
             system_prompt = get_system_prompt(region_name, crops_str, climate_desc)
-            return await self.llm_service.generate_response(query, system_prompt)
+            return await self.llm_service.generate_response(query, system_prompt, kind="tool")
+
+    def fallback(self, query: str, context: RequestContext,
+                 extracted: Optional[CropExtraction] = None) -> str:
+        """Repli sans LLM : calendrier de plantation local de la culture, s'il existe."""
+        region_name = context.get('region', 'Centre')
+        info = None
+        if extracted is not None and extracted.culture != "Non spécifié":
+            info = get_planting_info(region_name, extracted.culture.capitalize())
+        if info is None:
+            return super().fallback(query, context, extracted)
+        notes = f" {info['notes']}" if info.get('notes') else ""
+        return f"🌱 {extracted.culture.capitalize()} ({region_name}) : semis de {info['start']} à {info['end']}.{notes}"
@@ -0,0 +1,13 @@
+from typing import ClassVar, Tuple
+
+from pydantic import Field
+
+from app.models.extraction import ExtractionSchema, NOT_SPECIFIED
+
+
+class CropExtraction(ExtractionSchema):
+    """Intention et culture d'une requête cultures (voir get_combined_prompt)."""
+
+    INTENTS: ClassVar[Tuple[str, ...]] = ("CALENDAR", "ROTATION", "VARIETY", "TECHNIQUE", "GENERAL")
+
+    culture: str = Field(NOT_SPECIFIED, description="nom culture ou Non spécifié")
@@ -7,13 +7,15 @@ async def get_planting_calendar(
     llm_service: LLMService,
     crop: str,
     region: str,
+    weather_summary: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Génère un calendrier de plantation."""
-    prompt = f"""Calendrier plantation {crop} ({region}), Cameroun.
+    """Génère un calendrier de plantation (ajusté à la météo actuelle si fournie)."""
+    weather_line = f"\nMétéo actuelle: {weather_summary}" if weather_summary else ""
+    prompt = f"""Calendrier plantation {crop} ({region}), Cameroun.{weather_line}
 Fournis: Période semis, préparation sol, étapes croissance, récolte.
 MAX 150 mots. Bullets concis, dates précises selon saison pluies locale."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"crop": crop, "region": region, "calendar": response}
 
 
@@ -30,7 +32,7 @@ async def get_crop_rotation_advice(
 Fournis: Prochaine culture, plan 3 ans, associations bénéfiques.
 MAX 150 mots. Bullets, justifications courtes."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"current_crop": current_crop, "soil_type": soil_type, "rotation_plan": response}
 
 
@@ -47,7 +49,7 @@ async def get_variety_recommendations(
 Par variété: nom, rendement, cycle, résistance.
 MAX 150 mots. Inclure variétés locales et améliorées."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"crop": crop, "region": region, "recommendations": response}
 
 
@@ -64,5 +66,5 @@ async def get_cultivation_techniques(
 Fournis: Préparation sol, semis, espacement, fertilisation, récolte.
 MAX 150 mots. Solutions économiques et durables."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"crop": crop, "system": farming_system, "techniques": response}
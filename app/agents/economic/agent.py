@@ -1,6 +1,8 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
-import json
+from app.core.context import RequestContext
+from typing import Optional
+from app.data.market_prices import get_price_by_crop
+from .schemas import EconomicExtraction
 from .prompt import get_system_prompt, get_combined_prompt, get_intent_prompt, get_extraction_prompt, return_instructions_economic
 from .tools import (
     get_market_prices,
@@ -12,36 +14,27 @@ from .tools import (
 )
 
 class EconomicAgent(BaseAgent):
+    extraction_schema = EconomicExtraction
+
     def __init__(self):
         super().__init__(
             name="EconomicAgent",
             description="Économiste agricole. Analyse la rentabilité, les prix, les tendances du marché et conseille sur les stratégies commerciales."
         )
 
-    async def process(self, query: str, context: Dict[str, Any]) -> str:
+    async def extract(self, query: str, context: RequestContext) -> EconomicExtraction:
+        combined_prompt = get_combined_prompt(query)
+        return await self.llm_service.generate_json(combined_prompt, EconomicExtraction)
+
+    async def process(self, query: str, context: RequestContext, extracted: Optional[EconomicExtraction] = None) -> str:
         # 1. Récupération du contexte
         region_name = context.get('region', 'Cameroun')
         
-        # 2. Intent + Extraction en UN SEUL appel LLM (optimisation latence)
-        combined_prompt = get_combined_prompt(query)
-        combined_json = await self.llm_service.generate_response(combined_prompt)
-        
-        try:
-            cleaned = combined_json.replace("```json", "").replace("```", "").strip()
-            parsed = json.loads(cleaned)
-            intent = parsed.get("intent", "GENERAL").strip().upper()
-            culture = parsed.get("culture", "Non spécifié").strip()
-            region_entity = parsed.get("region", "Non spécifié").strip()
-        except Exception as e:
-            print(f"Warning: Failed to parse combined JSON for EconomicAgent: {e}")
-            intent = "GENERAL"
-            culture = "Non spécifié"
-            region_entity = "Non spécifié"
-        
-        # Validation de l'intent
-        valid_intents = ["PRICES", "PROFITABILITY", "TRENDS", "STRATEGY", "OPPORTUNITIES", "COST_CALCULATION", "GENERAL"]
-        if intent not in valid_intents:
-            intent = "GENERAL"
+        # 2. Intent + Extraction en UN SEUL appel LLM (déjà faite si routage fusionné)
+        extraction = extracted if extracted is not None else await self.extract(query, context)
+        intent = extraction.intent
+        culture = extraction.culture
+        region_entity = extraction.region
         
         if region_entity == "Non spécifié":
             region_entity = region_name
@@ -76,4 +69,15 @@ class EconomicAgent(BaseAgent):
         else:  # GENERAL
             system_prompt = get_system_prompt()
             full_context_prompt = f"{system_prompt}\n\nContexte actuel: Région={region_entity}, Culture={culture}"
-            return await self.llm_service.generate_response(query, full_context_prompt)
+            return await self.llm_service.generate_response(query, full_context_prompt, kind="tool")
+
+    def fallback(self, query: str, context: RequestContext,
+                 extracted: Optional[EconomicExtraction] = None) -> str:
+        """Repli sans LLM : prix de référence local de la culture, si elle est connue."""
+        price = None
+        if extracted is not None and extracted.culture != "Non spécifié":
+            price = get_price_by_crop(extracted.culture)
+        if price is None:
+            return super().fallback(query, context, extracted)
+        return (f"💰 {price.crop_name} : ~{price.price_avg_fcfa:.0f} FCFA/{price.unit} "
+                f"(tendance : {price.trend}, relevé du {price.last_updated}). Analyse détaillée indisponible pour le moment.")
@@ -0,0 +1,16 @@
+from typing import ClassVar, Tuple
+
+from pydantic import Field
+
+from app.models.extraction import ExtractionSchema, NOT_SPECIFIED
+
+
+class EconomicExtraction(ExtractionSchema):
+    """Intention, culture et marché d'une requête économique (voir get_combined_prompt)."""
+
+    INTENTS: ClassVar[Tuple[str, ...]] = (
+        "PRICES", "PROFITABILITY", "TRENDS", "STRATEGY", "OPPORTUNITIES", "COST_CALCULATION", "GENERAL",
+    )
+
+    culture: str = Field(NOT_SPECIFIED, description="nom culture ou Non spécifié")
+    region: str = Field(NOT_SPECIFIED, description="nom région/marché ou Non spécifié")
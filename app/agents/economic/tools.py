@@ -22,7 +22,7 @@ Données disponibles: {prices_context}
 Fournis: prix bord champ vs marché urbain, variations récentes.
 MAX 150 mots. Chiffres FCFA uniquement."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "get_market_prices", "crop": crop, "prices_analysis": response}
 
 async def analyze_profitability(
@@ -35,7 +35,7 @@ async def analyze_profitability(
 Fournis: coûts (intrants, MO, transport), rendement, revenu brut, marge nette, ROI%.
 MAX 150 mots. Tous montants en FCFA."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "analyze_profitability", "crop": crop, "profitability": response}
 
 async def get_market_trends(
@@ -47,7 +47,7 @@ async def get_market_trends(
 Fournis: demande locale vs export, évolution consommation, impact saisons, prévisions.
 MAX 150 mots."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "get_market_trends", "crop": crop, "trends": response}
 
 async def recommend_sales_strategy(
@@ -59,7 +59,7 @@ async def recommend_sales_strategy(
 Fournis: moment vente, canal recommandé, conditionnement, négociation prix.
 MAX 150 mots. Conseils pratiques pour petit producteur."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "recommend_sales_strategy", "crop": crop, "strategy": response}
 
 async def calculate_production_costs(
@@ -71,7 +71,7 @@ async def calculate_production_costs(
 Détaille: terrain, semences, fertilisants, phyto, MO, transport.
 MAX 150 mots. Estimations FCFA."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "calculate_production_costs", "crop": crop, "costs": response}
 
 async def analyze_market_opportunities(
@@ -83,5 +83,5 @@ async def analyze_market_opportunities(
 Fournis: cultures haute valeur, créneaux insatisfaits, transformation locale.
 MAX 150 mots."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "analyze_market_opportunities", "region": region, "opportunities": response}
@@ -1,6 +1,8 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.context import RequestContext
+from typing import Optional
 import json
+from .schemas import FertilizerExtraction
 from .prompt import get_system_prompt, get_combined_prompt
 from .tools import (
     calculate_npk_requirements,
@@ -13,40 +15,29 @@ from .tools import (
 
 
 class FertilizerAgent(BaseAgent):
+    extraction_schema = FertilizerExtraction
+
     def __init__(self):
         super().__init__(
             name="FertilizerAgent",
             description="Expert en fertilisation au Cameroun. Calcule besoins NPK, recommande engrais organiques/chimiques, diagnostique carences, conseille sur compost et amendements."
         )
 
-    async def process(self, query: str, context: Dict[str, Any]) -> str:
+    async def extract(self, query: str, context: RequestContext) -> FertilizerExtraction:
+        combined_prompt = get_combined_prompt(query)
+        return await self.llm_service.generate_json(combined_prompt, FertilizerExtraction)
+
+    async def process(self, query: str, context: RequestContext, extracted: Optional[FertilizerExtraction] = None) -> str:
         # 1. Récupération contexte
         region_name = context.get('region', 'Cameroun')
         
-        # 2. Intent + Extraction en UN SEUL appel LLM (optimisation latence)
-        combined_prompt = get_combined_prompt(query)
-        combined_json = await self.llm_service.generate_response(combined_prompt)
-        
-        try:
-            cleaned = combined_json.replace("```json", "").replace("```", "").strip()
-            entities = json.loads(cleaned)
-            intent = entities.get("intent", "GENERAL").strip().upper()
-            culture = entities.get("culture", "Non spécifié").strip()
-            area = float(entities.get("superficie_ha", 1.0))
-            symptoms = entities.get("symptomes", "Non spécifié").strip()
-            stage = entities.get("stade", "Non spécifié").strip()
-        except Exception as e:
-            print(f"Warning: Failed to parse combined JSON for FertilizerAgent: {e}")
-            intent = "GENERAL"
-            culture = "Non spécifié"
-            area = 1.0
-            symptoms = "Non spécifié"
-            stage = "mature"
-        
-        # Validation intent
-        valid_intents = ["NPK_CALC", "ORGANIC", "DEFICIENCY", "SCHEDULE", "SOIL", "GENERAL"]
-        if intent not in valid_intents:
-            intent = "GENERAL"
+        # 2. Intent + Extraction en UN SEUL appel LLM (déjà faite si routage fusionné)
+        extraction = extracted if extracted is not None else await self.extract(query, context)
+        intent = extraction.intent
+        culture = extraction.culture
+        area = extraction.superficie_ha
+        symptoms = extraction.symptomes
+        stage = extraction.stade
         
         if stage == "Non spécifié":
             stage = "mature"
@@ -112,4 +103,4 @@ RÉGION: {region_name}
 
 Réponds de manière CONCISE (Max 150 mots) avec CHIFFRES PRÉCIS. Format avec icônes et structure claire."""
 
-        return await self.llm_service.generate_response(full_prompt)
+        return await self.llm_service.generate_response(full_prompt, kind="tool")
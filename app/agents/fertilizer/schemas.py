@@ -0,0 +1,23 @@
+from typing import Any, ClassVar, Tuple
+
+from pydantic import Field, field_validator
+
+from app.models.extraction import ExtractionSchema, NOT_SPECIFIED, first_number
+
+
+class FertilizerExtraction(ExtractionSchema):
+    """Intention et entités d'une requête fertilisation (voir get_combined_prompt)."""
+
+    INTENTS: ClassVar[Tuple[str, ...]] = ("NPK_CALC", "ORGANIC", "DEFICIENCY", "SCHEDULE", "SOIL", "GENERAL")
+
+    culture: str = Field(NOT_SPECIFIED, description="nom culture ou Non spécifié")
+    superficie_ha: float = Field(1.0, description="superficie en hectares, défaut 1.0")
+    symptomes: str = Field(NOT_SPECIFIED, description="description symptômes ou Non spécifié")
+    stade: str = Field(NOT_SPECIFIED, description="jeune/mature/vieux ou Non spécifié")
+
+    @field_validator("superficie_ha", mode="before")
+    @classmethod
+    def _parse_area(cls, value: Any) -> float:
+        # "2,5 ha", "2.5" ou 2.5 ; superficie nulle ou négative → 1 ha
+        area = first_number(value, 1.0)
+        return area if area > 0 else 1.0
@@ -103,7 +103,7 @@ async def calculate_npk_requirements(llm_service: LLMService, crop: str, area_ha
         # Utiliser LLM pour estimation
         prompt = f"""Estime besoins NPK (kg/ha) pour {crop} en général.
 Format JSON: {{"N": X, "P": Y, "K": Z, "notes": "..."}}"""
-        response = await llm_service.generate_response(prompt)
+        response = await llm_service.generate_response(prompt, kind="tool")
         return {"error": f"Culture {crop} non en base. Estimation générique requise.", "llm_estimate": response}
     
     crop_data = CROP_NPK_REQUIREMENTS[crop_lower]
@@ -198,7 +198,7 @@ Culture: {crop}
 Symptômes: {symptoms}
 
 Identifie carence probable (N, P, K, Ca, Mg, Fe, etc.) et traitement. Format concis."""
-        llm_diagnosis = await llm_service.generate_response(prompt)
+        llm_diagnosis = await llm_service.generate_response(prompt, kind="tool")
         return {"diagnostic": "Non concluant (base données)", "analyse_llm": llm_diagnosis}
     
     return {
@@ -297,7 +297,7 @@ async def get_soil_amendment_advice(llm_service: LLMService, soil_type: str, tar
     if not amendment_data:
         prompt = f"""Conseils amendement pour sol: {soil_type}, culture: {target_crop}.
 Format: problème, amendement recommandé, dose, timing."""
-        llm_advice = await llm_service.generate_response(prompt)
+        llm_advice = await llm_service.generate_response(prompt, kind="tool")
         return {"type_sol": soil_type, "conseil_llm": llm_advice}
     
     return {
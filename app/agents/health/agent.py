@@ -1,6 +1,7 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
-import json
+from app.core.context import RequestContext
+from typing import Optional
+from .schemas import HealthExtraction
 from .prompt import get_system_prompt, get_combined_prompt, get_intent_prompt, get_extraction_prompt, return_instructions_health
 from .tools import (
     diagnose_plant_disease,
@@ -10,36 +11,27 @@ from .tools import (
 )
 
 class HealthAgent(BaseAgent):
+    extraction_schema = HealthExtraction
+
     def __init__(self):
         super().__init__(
             name="HealthAgent",
             description="Phytopathologiste expert. Diagnostique les maladies, identifie les parasites et recommande des traitements adaptés au contexte camerounais."
         )
 
-    async def process(self, query: str, context: Dict[str, Any]) -> str:
+    async def extract(self, query: str, context: RequestContext) -> HealthExtraction:
+        combined_prompt = get_combined_prompt(query)
+        return await self.llm_service.generate_json(combined_prompt, HealthExtraction)
+
+    async def process(self, query: str, context: RequestContext, extracted: Optional[HealthExtraction] = None) -> str:
         # 1. Récupération du contexte
         region_name = context.get('region', 'Cameroun')
         
-        # 2. Intent + Extraction en UN SEUL appel LLM (optimisation latence)
-        combined_prompt = get_combined_prompt(query)
-        combined_json = await self.llm_service.generate_response(combined_prompt)
-        
-        try:
-            cleaned = combined_json.replace("```json", "").replace("```", "").strip()
-            parsed = json.loads(cleaned)
-            intent = parsed.get("intent", "GENERAL").strip().upper()
-            culture = parsed.get("culture", "Non spécifié").strip()
-            symptomes = parsed.get("symptomes", "Non spécifié").strip()
-        except Exception as e:
-            print(f"Warning: Failed to parse combined JSON for HealthAgent: {e}")
-            intent = "GENERAL"
-            culture = "Non spécifié"
-            symptomes = "Non spécifié"
-        
-        # Validation de l'intent
-        valid_intents = ["DIAGNOSIS", "PEST_ID", "TREATMENT", "PREVENTION", "GENERAL"]
-        if intent not in valid_intents:
-            intent = "GENERAL"
+        # 2. Intent + Extraction en UN SEUL appel LLM (déjà faite si routage fusionné)
+        extraction = extracted if extracted is not None else await self.extract(query, context)
+        intent = extraction.intent
+        culture = extraction.culture
+        symptomes = extraction.symptomes
         
         print(f"DEBUG: Intent detected by HealthAgent: {intent}")
 
@@ -64,4 +56,4 @@ class HealthAgent(BaseAgent):
             from .prompt import get_system_prompt
             system_prompt = get_system_prompt()
             full_context_prompt = f"{system_prompt}\n\nContexte actuel: Région={region_name}, Culture={culture}"
-            return await self.llm_service.generate_response(query, full_context_prompt)
+            return await self.llm_service.generate_response(query, full_context_prompt, kind="tool")
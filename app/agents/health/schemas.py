@@ -0,0 +1,14 @@
+from typing import ClassVar, Tuple
+
+from pydantic import Field
+
+from app.models.extraction import ExtractionSchema, NOT_SPECIFIED
+
+
+class HealthExtraction(ExtractionSchema):
+    """Intention, culture et symptômes d'une requête phytosanitaire (voir get_combined_prompt)."""
+
+    INTENTS: ClassVar[Tuple[str, ...]] = ("DIAGNOSIS", "PEST_ID", "TREATMENT", "PREVENTION", "GENERAL")
+
+    culture: str = Field(NOT_SPECIFIED, description="nom culture ou Non spécifié")
+    symptomes: str = Field(NOT_SPECIFIED, description="description symptômes ou Non spécifié")
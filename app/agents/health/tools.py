@@ -15,7 +15,7 @@ Culture: {crop} | Symptômes: {symptoms} | Région: {region}
 Fournis: Maladie probable, cause, gravité, traitement immédiat.
 MAX 150 mots. Noms scientifiques, doses exactes produits."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "diagnose_plant_disease", "crop": crop, "diagnosis": response}
 
 async def get_treatment_recommendations(
@@ -29,7 +29,7 @@ Priorité: bio (neem, cendre, savon noir) puis chimique si nécessaire.
 Fournis: produit, dose, fréquence, précautions.
 MAX 150 mots."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "get_treatment_recommendations", "problem": diagnosis, "recommendations": response}
 
 async def get_pest_identification(
@@ -43,7 +43,7 @@ Description: {description} | Culture: {crop}
 Fournis: Nom (commun + scientifique), dégâts, lutte immédiate.
 MAX 150 mots."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "get_pest_identification", "description": description, "identification": response}
 
 async def get_prevention_strategies(
@@ -56,5 +56,5 @@ async def get_prevention_strategies(
 Fournis: choix variétal, pratiques culturales, surveillance, produits préventifs.
 MAX 150 mots. Prioriser méthodes locales et économiques."""
     
-    response = await llm_service.generate_response(prompt)
+    response = await llm_service.generate_response(prompt, kind="tool")
     return {"tool": "get_prevention_strategies", "target": disease_or_pest, "strategies": response}
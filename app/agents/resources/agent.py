@@ -1,6 +1,7 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
-import json
+from app.core.context import RequestContext
+from typing import Optional
+from .schemas import ResourcesExtraction
 from .prompt import get_system_prompt, get_combined_prompt
 from .tools import (
     analyze_soil_requirements,
@@ -10,24 +11,22 @@ from .tools import (
 )
 
 class ResourcesAgent(BaseAgent):
+    extraction_schema = ResourcesExtraction
+
     def __init__(self):
         super().__init__(
             name="ResourcesAgent",
             description="Spécialiste en gestion des sols, de l'eau et des ressources agricoles. Analyse sols, optimise irrigation, évalue aptitude terrains et recommande amendements."
         )
 
-    async def process(self, query: str, context: Dict[str, Any]) -> str:
-        # Intent en UN SEUL appel LLM (optimisation latence)
+    async def extract(self, query: str, context: RequestContext) -> ResourcesExtraction:
         combined_prompt = get_combined_prompt(query)
-        combined_json = await self.llm_service.generate_response(combined_prompt)
-        
-        try:
-            cleaned = combined_json.replace("```json", "").replace("```", "").strip()
-            parsed = json.loads(cleaned)
-            intent = parsed.get("intent", "GENERAL").strip().upper()
-        except Exception as e:
-            print(f"Warning: Failed to parse combined JSON for ResourcesAgent: {e}")
-            intent = "GENERAL"
+        return await self.llm_service.generate_json(combined_prompt, ResourcesExtraction)
+
+    async def process(self, query: str, context: RequestContext, extracted: Optional[ResourcesExtraction] = None) -> str:
+        # Intent en UN SEUL appel LLM (déjà fait si routage fusionné)
+        extraction = extracted if extracted is not None else await self.extract(query, context)
+        intent = extraction.intent
 
         print(f"DEBUG: Intent detected by ResourcesAgent: {intent}")
 
@@ -42,4 +41,4 @@ class ResourcesAgent(BaseAgent):
             return await suggest_soil_amendments(self.llm_service, query)
         else:
             system_prompt = get_system_prompt()
-            return await self.llm_service.generate_response(query, system_prompt)
+            return await self.llm_service.generate_response(query, system_prompt, kind="tool")
@@ -0,0 +1,13 @@
+from typing import ClassVar, Tuple
+
+from pydantic import Field
+
+from app.models.extraction import ExtractionSchema, NOT_SPECIFIED
+
+
+class ResourcesExtraction(ExtractionSchema):
+    """Intention et culture d'une requête sols / eau (voir get_combined_prompt)."""
+
+    INTENTS: ClassVar[Tuple[str, ...]] = ("SOIL_ANALYSIS", "IRRIGATION", "SUITABILITY", "AMENDMENTS", "GENERAL")
+
+    culture: str = Field(NOT_SPECIFIED, description="nom culture ou Non spécifié")
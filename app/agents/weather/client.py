@@ -0,0 +1,116 @@
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config import Config
+from app.services.io_loop import io_loop
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+
+
+class WeatherClient:
+    """
+    Client HTTP Open-Meteo partagé.
+
+    Les agents sont des coroutines : un appel bloquant (requests.get) y gèle
+    toute la boucle, y compris les autres agents lancés en parallèle. Ce
+    client fournit une version asynchrone (un seul httpx.AsyncClient, sur la
+    boucle d'E/S partagée io_loop : Flask créant une boucle par requête, c'est
+    ce qui permet de réutiliser le pool keep-alive d'une requête à l'autre)
+    et une version synchrone (un httpx.Client pour tout le processus) pour
+    les appels hors boucle (outils synchrones, rafraîchissement, CLI).
+
+    Les erreurs httpx sont propagées : c'est à l'appelant de décider du repli.
+    """
+
+    def __init__(self, base_url: str = OPEN_METEO_URL, timeout: float = 10, max_connections: int = 10,
+                 transport: Optional[httpx.BaseTransport] = None,
+                 async_transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        # Transports injectables (tests) ; None = réseau
+        self._transport = transport
+        self._async_transport = async_transport
+
+        self._lock = threading.Lock()
+        self._async: Optional[httpx.AsyncClient] = None
+        self._sync: Optional[httpx.Client] = None
+        self.requests = 0
+        self.errors = 0
+
+    def _options(self) -> Dict[str, Any]:
+        return {
+            "timeout": httpx.Timeout(self.timeout),
+            "limits": httpx.Limits(max_connections=self.max_connections,
+                                   max_keepalive_connections=self.max_connections),
+        }
+
+    def _async_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async is None:
+                self._async = httpx.AsyncClient(transport=self._async_transport, **self._options())
+            return self._async
+
+    def _sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._sync is None:
+                self._sync = httpx.Client(transport=self._transport, **self._options())
+            return self._sync
+
+    async def _get(self, params: Dict[str, Any]) -> httpx.Response:
+        return await self._async_client().get(self.base_url, params=params)
+
+    async def aclose(self) -> None:
+        """Ferme les pools de connexions (le client asynchrone sur io_loop)."""
+        with self._lock:
+            async_client, self._async = self._async, None
+            sync_client, self._sync = self._sync, None
+        if async_client is not None:
+            await io_loop.run(async_client.aclose())
+        if sync_client is not None:
+            sync_client.close()
+
+    def _count(self, ok: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += int(not ok)
+
+    async def get_json(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = await io_loop.run(self._get(params))
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            self._count(False)
+            raise
+        self._count(True)
+        return data
+
+    def get_json_sync(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = self._sync_client().get(self.base_url, params=params)
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            self._count(False)
+            raise
+        self._count(True)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "async_client": self._async is not None,
+                "sync_client": self._sync is not None,
+                "requests": self.requests,
+                "errors": self.errors,
+            }
+
+
+# Instance globale
+weather_client = WeatherClient(
+    timeout=Config.WEATHER_HTTP_TIMEOUT,
+    max_connections=Config.WEATHER_HTTP_MAX_CONNECTIONS,
+)
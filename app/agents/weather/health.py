@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Any, Dict, Iterable
+
+import httpx
+
+from config import Config
+from app.services.resilience import CircuitBreaker, get_breaker
+
+
+def is_outage(error: BaseException) -> bool:
+    """Panne côté Open-Meteo (délai, connexion, 429, 5xx), par opposition à une requête refusée."""
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+
+class OpenMeteoGuard:
+    """
+    Protège les outils météo quand Open-Meteo est lent ou en panne.
+
+    - Cache négatif par région : après un échec, la région n'est plus
+      interrogée pendant `negative_ttl` secondes (les outils d'une même
+      requête, et les requêtes suivantes, n'attendent pas chacun le délai).
+    - Disjoncteur partagé (app.services.resilience) : après plusieurs pannes
+      consécutives, plus aucun appel ; tous les outils passent sur les
+      normales climatiques (FALLBACK_CLIMATE_DATA). Après `reset_timeout`,
+      un seul appel de test (semi-ouvert) décide de la reprise.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, negative_ttl: float = 30):
+        self.breaker = breaker
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        self._failed_until: Dict[str, float] = {}
+        self.short_circuits = 0
+        self.failures = 0
+
+    def allow(self, region_name: str) -> bool:
+        """Vrai si la région peut être interrogée maintenant (consomme l'appel de test en semi-ouvert)."""
+        with self._lock:
+            failed_until = self._failed_until.get(region_name)
+            if failed_until is not None and failed_until > time.monotonic():
+                self.short_circuits += 1
+                return False
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuits += 1
+            return False
+        return True
+
+    def allow_bulk(self) -> bool:
+        """Rafraîchissement groupé : soumis au disjoncteur seulement (il sert aussi d'appel de test)."""
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuits += 1
+            return False
+        return True
+
+    def record_success(self, regions: Iterable[str]) -> None:
+        self.breaker.record_success()
+        with self._lock:
+            for region_name in regions:
+                self._failed_until.pop(region_name, None)
+
+    def record_failure(self, regions: Iterable[str], error: BaseException) -> None:
+        if is_outage(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()  # l'API a répondu : elle est joignable
+        until = time.monotonic() + self.negative_ttl
+        with self._lock:
+            self.failures += 1
+            for region_name in regions:
+                self._failed_until[region_name] = until
+
+    def release_probe(self) -> None:
+        self.breaker.release_probe()
+
+    @property
+    def healthy(self) -> bool:
+        return self.breaker.state == CircuitBreaker.CLOSED
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            negative = {r: round(t - now, 1) for r, t in self._failed_until.items() if t > now}
+            short_circuits, failures = self.short_circuits, self.failures
+        breaker = self.breaker.stats()
+        return {
+            "healthy": breaker["state"] == CircuitBreaker.CLOSED,
+            "breaker": breaker,
+            "negative_cache": negative,
+            "failures": failures,
+            "short_circuits": short_circuits,
+        }
+
+
+# Instance globale
+weather_guard = OpenMeteoGuard(
+    get_breaker("open-meteo", failure_threshold=Config.WEATHER_BREAKER_FAILURES,
+                reset_timeout=Config.WEATHER_BREAKER_RESET),
+    negative_ttl=Config.WEATHER_NEGATIVE_TTL,
+)
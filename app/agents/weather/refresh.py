@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import Config
+from . import tools
+
+
+class WeatherRefresher:
+    """
+    Rafraîchit le cache météo de toutes les régions avant son expiration
+    (refresh-ahead), en une requête Open-Meteo groupée : les requêtes
+    utilisateur lisent toujours un cache chaud et n'attendent jamais l'API.
+
+    Tourne dans un thread d'arrière-plan, un par processus (le cache météo
+    est propre à chaque worker). Après un échec, nouvelle tentative après
+    `retry_interval` ; le cache existant reste servi jusqu'à son expiration.
+    """
+
+    def __init__(self, interval: float, retry_interval: float = 60):
+        self.interval = interval
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh_at: Optional[float] = None
+        self.last_duration_ms: Optional[float] = None
+
+    def refresh_once(self) -> bool:
+        start = time.monotonic()
+        updated = tools.fetch_all_regions_weather()
+        with self._lock:
+            self.last_duration_ms = round((time.monotonic() - start) * 1000, 1)
+            if updated:
+                self.refreshes += 1
+                self.last_refresh_at = time.time()
+            else:
+                self.failures += 1
+        return bool(updated)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="weather-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ok = self.refresh_once()
+            except Exception as e:
+                print(f"WARNING: Rafraîchissement météo échoué: {e}")
+                ok = False
+            self._stop.wait(self.interval if ok else self.retry_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval": self.interval,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "last_refresh_age": round(time.time() - self.last_refresh_at, 1) if self.last_refresh_at else None,
+                "last_duration_ms": self.last_duration_ms,
+            }
+
+
+# Instance globale
+weather_refresher = WeatherRefresher(
+    interval=max(tools._cache_ttl - Config.WEATHER_REFRESH_AHEAD, 60),
+    retry_interval=Config.WEATHER_REFRESH_RETRY,
+)
@@ -0,0 +1,25 @@
+from typing import Any, ClassVar, Tuple
+
+from pydantic import Field, field_validator
+
+from app.models.extraction import ExtractionSchema, NOT_SPECIFIED, first_number
+
+
+class WeatherExtraction(ExtractionSchema):
+    """Intention, culture et période d'une requête météo (voir get_combined_prompt)."""
+
+    INTENTS: ClassVar[Tuple[str, ...]] = (
+        "CURRENT", "FORECAST", "IRRIGATION", "PLANTING", "ALERT", "MONITORING", "GENERAL",
+    )
+
+    culture: str = Field(NOT_SPECIFIED, description="nom culture ou Non spécifié")
+    period_days: int = Field(7, description="durée demandée en jours : 7, 14 ou 30, défaut 7")
+
+    @field_validator("period_days", mode="before")
+    @classmethod
+    def _snap_period(cls, value: Any) -> int:
+        # Périodes supportées par les outils : 7, 14 ou 30 jours
+        days = int(first_number(value, 7))
+        if days in (7, 14, 30):
+            return days
+        return 30 if days > 14 else 7
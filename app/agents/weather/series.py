@@ -0,0 +1,112 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+RAINY_DAY_MM = 0.5
+
+
+def _column(daily: Dict[str, List[Any]], key: str, length: int, default: float = np.nan) -> np.ndarray:
+    """Colonne float64 de longueur `length` ; valeurs nulles ou colonne absente → `default`."""
+    values = daily.get(key)
+    if values is None:
+        return np.full(length, default)
+    column = np.asarray(values[:length], dtype=np.float64)  # None → nan
+    if len(column) < length:
+        column = np.concatenate((column, np.full(length - len(column), np.nan)))
+    if not np.isnan(default):
+        column = np.where(np.isnan(column), default, column)
+    return column
+
+
+def _prefix_sum(column: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0.0], np.cumsum(column)))
+
+
+def _extremum(prefix: Optional[np.ndarray], j: int) -> Optional[float]:
+    """Extremum préfixe des `j` premiers jours ; None si aucune valeur (colonne absente ou toute nulle)."""
+    if prefix is None or not j:
+        return None
+    value = float(prefix[j - 1])
+    return None if np.isnan(value) else value
+
+
+class WeatherSeries:
+    """
+    Séries journalières Open-Meteo en colonnes NumPy, analysées une fois par
+    instantané : précipitations, températures max/min, ET0, vent max.
+
+    Sommes cumulées, extrema préfixes et bilan hydrique (pluie - ET0) sont
+    précalculés : les agrégats demandés par les outils (« pluie sur 3 jours »,
+    « pluie de la semaine 2 », « minimum sur 7 jours »…) sont des lectures
+    O(1), quelle que soit la fenêtre, partagées entre outils et requêtes.
+
+    Pluie et ET0 manquantes valent 0 (ET0 absente : 5 mm/j, comme le plan de
+    suivi) ; les températures manquantes sont ignorées par les extrema, qui
+    valent None quand aucune valeur n'est disponible.
+    """
+
+    __slots__ = (
+        "dates", "precip", "tmax", "tmin", "et0", "wind", "balance",
+        "_cum_precip", "_cum_et0", "_cum_tmax", "_cum_tmax_n", "_cum_rainy",
+        "_min_tmin", "_max_tmax", "_max_wind",
+    )
+
+    def __init__(self, daily: Dict[str, List[Any]]):
+        self.dates: List[str] = list(daily.get("time") or [])
+        n = len(self.dates)
+        self.precip = _column(daily, "precipitation_sum", n, default=0.0)
+        self.tmax = _column(daily, "temperature_2m_max", n)
+        self.tmin = _column(daily, "temperature_2m_min", n)
+        self.et0 = _column(daily, "et0_fao_evapotranspiration", n, default=5.0)
+        self.wind = _column(daily, "windspeed_10m_max", n) if "windspeed_10m_max" in daily else None
+        self.balance = self.precip - self.et0  # bilan hydrique journalier
+
+        self._cum_precip = _prefix_sum(self.precip)
+        self._cum_et0 = _prefix_sum(self.et0)
+        self._cum_tmax = _prefix_sum(np.nan_to_num(self.tmax))
+        self._cum_tmax_n = _prefix_sum((~np.isnan(self.tmax)).astype(np.float64))
+        self._cum_rainy = _prefix_sum((self.precip > RAINY_DAY_MM).astype(np.float64))
+        self._min_tmin = np.fmin.accumulate(self.tmin) if n else self.tmin
+        self._max_tmax = np.fmax.accumulate(self.tmax) if n else self.tmax
+        self._max_wind = np.fmax.accumulate(self.wind) if self.wind is not None and n else self.wind
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def _span(self, days: int, start: int = 0):
+        start = min(max(start, 0), len(self))
+        return start, min(start + max(days, 0), len(self))
+
+    def rain(self, days: int, start: int = 0) -> float:
+        """Pluie totale (mm) sur `days` jours à partir de `start`."""
+        i, j = self._span(days, start)
+        return float(self._cum_precip[j] - self._cum_precip[i])
+
+    def et0_total(self, days: int, start: int = 0) -> float:
+        i, j = self._span(days, start)
+        return float(self._cum_et0[j] - self._cum_et0[i])
+
+    def water_balance(self, days: int) -> float:
+        """Pluie - ET0 cumulées sur les `days` premiers jours (mm)."""
+        return self.rain(days) - self.et0_total(days)
+
+    def rainy_days(self, days: int) -> int:
+        _, j = self._span(days)
+        return int(self._cum_rainy[j])
+
+    def tmax_mean(self, days: int) -> Optional[float]:
+        _, j = self._span(days)
+        count = self._cum_tmax_n[j]
+        return float(self._cum_tmax[j] / count) if count else None
+
+    def tmin_min(self, days: int) -> Optional[float]:
+        _, j = self._span(days)
+        return _extremum(self._min_tmin, j)
+
+    def tmax_max(self, days: int) -> Optional[float]:
+        _, j = self._span(days)
+        return _extremum(self._max_tmax, j)
+
+    def wind_max(self, days: int) -> Optional[float]:
+        _, j = self._span(days)
+        return _extremum(self._max_wind, j)
@@ -0,0 +1,53 @@
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .series import WeatherSeries
+
+# Numéro de version des données, croissant à chaque récupération (tous les processus ont leur propre suite)
+_versions = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class WeatherSnapshot:
+    """
+    Météo d'une région issue d'UNE réponse Open-Meteo : conditions actuelles
+    et séries journalières sur 14 jours. C'est l'unique entrée du cache par
+    région et tous les outils météo la lisent, si bien qu'une région coûte
+    au plus une requête à l'API par fenêtre de TTL.
+
+    `series` : séries journalières en colonnes NumPy, analysées une seule
+    fois à la création de l'instantané (None sans données journalières).
+    """
+    region: str
+    current: Dict[str, Any]
+    daily: Optional[Dict[str, List[Any]]]
+    fetched_at: float
+    version: int
+    series: Optional[WeatherSeries] = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def from_payload(cls, region: str, payload: Dict[str, Any],
+                     fetched_at: Optional[float] = None) -> "WeatherSnapshot":
+        daily = payload.get('daily')
+        return cls(
+            region=region,
+            current=payload.get('current_weather') or {},
+            daily=daily,
+            fetched_at=time.time() if fetched_at is None else fetched_at,
+            version=next(_versions),
+            series=WeatherSeries(daily) if daily else None,
+        )
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def as_payload(self, daily: bool = True) -> Dict[str, Any]:
+        """Format de réponse Open-Meteo (current_weather, daily)."""
+        payload: Dict[str, Any] = {}
+        if self.current:
+            payload['current_weather'] = self.current
+        if daily and self.daily is not None:
+            payload['daily'] = self.daily
+        return payload
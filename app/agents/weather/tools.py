@@ -1,10 +1,18 @@
-import requests
+import asyncio
+import httpx
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 import time
 
-# Cache simple pour éviter appels répétés (TTL: 15 minutes)
-_weather_cache = {}
+import numpy as np
+
+from app.core.memo import memoized
+from .client import weather_client
+from .health import weather_guard
+from .snapshot import WeatherSnapshot
+
+# Cache simple pour éviter appels répétés (TTL: 15 minutes) : un instantané par région
+_weather_cache: Dict[str, WeatherSnapshot] = {}
 _cache_ttl = 900  # 15 minutes en secondes
 
 REGION_COORDINATES = {
@@ -20,6 +28,9 @@ REGION_COORDINATES = {
     "Extrême-Nord": {"lat": 10.5972, "lon": 14.3158},
 }
 
+# Régions d'altitude concernées par le risque de gel
+MOUNTAIN_REGIONS = ["Ouest", "Nord-Ouest", "Adamaoua"]
+
 # Données climatiques de fallback par région
 FALLBACK_CLIMATE_DATA = {
     "Centre": {"temp_avg": 24, "rainfall_annual": 1600, "climate": "Équatorial"},
@@ -35,99 +46,233 @@ FALLBACK_CLIMATE_DATA = {
 }
 
 
-def _get_cache_key(region_name: str, data_type: str) -> str:
-    """Génère une clé de cache."""
-    return f"{region_name}_{data_type}"
+def normalize_region(region_name: str) -> str:
+    """Normalise le nom de région (case-insensitive, gestion accents)."""
+    # Correspondance exacte d'abord
+    for key in REGION_COORDINATES:
+        if key.lower() == region_name.lower():
+            return key
+    # Correspondance partielle
+    for key in REGION_COORDINATES:
+        if region_name.lower() in key.lower() or key.lower() in region_name.lower():
+            return key
+    # Fallback
+    return "Centre"
 
 
-def _is_cache_valid(cache_key: str) -> bool:
+def _is_cache_valid(region_name: str) -> bool:
     """Vérifie si le cache est encore valide."""
-    if cache_key not in _weather_cache:
-        return False
-    cached_time = _weather_cache[cache_key].get('_cached_at', 0)
-    return (time.time() - cached_time) < _cache_ttl
+    snapshot = _weather_cache.get(region_name)
+    return snapshot is not None and snapshot.age() < _cache_ttl
 
 
-def fetch_weather_data(region_name: str, daily: bool = False) -> Optional[Dict[str, Any]]:
+def _weather_params(coords: Dict[str, Any]) -> Dict[str, Any]:
+    """Paramètres de la requête Open-Meteo : conditions actuelles et séries journalières sur 14 jours."""
+    return {
+        "latitude": coords['lat'],
+        "longitude": coords['lon'],
+        "current_weather": "true",
+        "daily": "precipitation_sum,temperature_2m_max,temperature_2m_min,et0_fao_evapotranspiration,windspeed_10m_max",
+        "timezone": "auto",
+        "forecast_days": 14,
+    }
+
+
+def _temp(value: float) -> str:
+    """Température journalière arrondie ; « n/d » si Open-Meteo ne l'a pas fournie (NaN)."""
+    return "n/d" if np.isnan(value) else f"{value:.0f}"
+
+
+def _climate_normals(region_name: str) -> str:
+    """Normales climatiques de la région (FALLBACK_CLIMATE_DATA), servies quand Open-Meteo est indisponible."""
+    fallback = FALLBACK_CLIMATE_DATA.get(region_name, {})
+    parts = [f"Climat {fallback.get('climate', 'N/A')}"]
+    if 'temp_avg' in fallback:
+        parts.append(f"~{fallback['temp_avg']}°C")
+    if 'rainfall_annual' in fallback:
+        parts.append(f"~{fallback['rainfall_annual'] / 12:.0f}mm/mois")
+    return f"📍 Normales {region_name}: " + ", ".join(parts)
+
+
+def _report_fetch_error(region_name: str, error: Exception) -> None:
+    if isinstance(error, httpx.TimeoutException):
+        print(f"Timeout lors de la récupération météo pour {region_name}")
+    elif isinstance(error, httpx.TransportError):
+        print(f"Erreur de connexion à l'API météo pour {region_name}")
+    elif isinstance(error, httpx.HTTPStatusError):
+        print(f"Erreur HTTP {error.response.status_code} pour {region_name}")
+    else:
+        print(f"Erreur inattendue lors de la récupération météo: {error}")
+
+
+@memoized("weather.snapshot")
+def get_weather_snapshot(region_name: str) -> Optional[WeatherSnapshot]:
     """
-    Récupère les données météo pour une région via Open-Meteo API.
-    Utilise un cache de 15 minutes pour éviter les appels répétés.
+    Instantané météo d'une région (conditions actuelles + 14 jours) via
+    Open-Meteo, en cache 15 minutes. None si l'API est indisponible : après
+    un échec la région n'est plus interrogée pendant WEATHER_NEGATIVE_TTL, et
+    aucune ne l'est tant que le disjoncteur Open-Meteo est ouvert.
+
+    Version synchrone (bloquante) : depuis une coroutine, utiliser
+    get_weather_snapshot_async.
     """
-    cache_key = _get_cache_key(region_name, "daily" if daily else "current")
-    
-    # Vérifier le cache
-    if _is_cache_valid(cache_key):
-        return _weather_cache[cache_key]['data']
-    
+    if _is_cache_valid(region_name):
+        return _weather_cache[region_name]
+
     coords = REGION_COORDINATES.get(region_name)
     if not coords:
         print(f"Région inconnue: {region_name}")
         return None
-    
+
+    if not weather_guard.allow(region_name):
+        return None  # échec récent ou API en panne : normales climatiques, sans attendre le délai
+
     try:
-        url = f"https://api.open-meteo.com/v1/forecast?latitude={coords['lat']}&longitude={coords['lon']}&current_weather=true"
-        if daily:
-            url += "&daily=precipitation_sum,temperature_2m_max,temperature_2m_min,et0_fao_evapotranspiration,windspeed_10m_max&timezone=auto&forecast_days=14"
-        
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Mise en cache
-        _weather_cache[cache_key] = {
-            'data': data,
-            '_cached_at': time.time()
-        }
-        
-        return data
-        
-    except requests.exceptions.Timeout:
-        print(f"Timeout lors de la récupération météo pour {region_name}")
+        payload = weather_client.get_json_sync(_weather_params(coords))
+    except Exception as e:
+        weather_guard.record_failure([region_name], e)
+        _report_fetch_error(region_name, e)
         return None
-    except requests.exceptions.ConnectionError:
-        print(f"Erreur de connexion à l'API météo pour {region_name}")
+    weather_guard.record_success([region_name])
+    snapshot = _weather_cache[region_name] = WeatherSnapshot.from_payload(region_name, payload)
+    return snapshot
+
+
+@memoized("weather.snapshot")
+async def get_weather_snapshot_async(region_name: str) -> Optional[WeatherSnapshot]:
+    """Version asynchrone de get_weather_snapshot : n'immobilise pas la boucle des agents."""
+    if _is_cache_valid(region_name):
+        return _weather_cache[region_name]
+
+    coords = REGION_COORDINATES.get(region_name)
+    if not coords:
+        print(f"Région inconnue: {region_name}")
         return None
-    except requests.exceptions.HTTPError as e:
-        print(f"Erreur HTTP {e.response.status_code} pour {region_name}")
+
+    if not weather_guard.allow(region_name):
         return None
+
+    try:
+        payload = await weather_client.get_json(_weather_params(coords))
+    except asyncio.CancelledError:
+        weather_guard.release_probe()
+        raise
     except Exception as e:
-        print(f"Erreur inattendue lors de la récupération météo: {e}")
+        weather_guard.record_failure([region_name], e)
+        _report_fetch_error(region_name, e)
         return None
+    weather_guard.record_success([region_name])
+    snapshot = _weather_cache[region_name] = WeatherSnapshot.from_payload(region_name, payload)
+    return snapshot
+
+
+def fetch_weather_data(region_name: str, daily: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Récupère les données météo pour une région via Open-Meteo API.
+    Utilise un cache de 15 minutes pour éviter les appels répétés.
+
+    Réponse au format Open-Meteo, construite depuis l'instantané de la région
+    (une seule requête, que `daily` soit demandé ou non).
+    """
+    snapshot = get_weather_snapshot(region_name)
+    return snapshot.as_payload(daily) if snapshot is not None else None
+
+
+async def fetch_weather_data_async(region_name: str, daily: bool = False) -> Optional[Dict[str, Any]]:
+    """Version asynchrone de fetch_weather_data."""
+    snapshot = await get_weather_snapshot_async(region_name)
+    return snapshot.as_payload(daily) if snapshot is not None else None
 
 
+def fetch_all_regions_weather() -> int:
+    """
+    Récupère en UNE requête Open-Meteo (coordonnées multiples) les conditions
+    actuelles et les séries sur 14 jours de toutes les régions, puis remplace
+    le cache de toutes les régions d'un seul bloc. Retourne le nombre de
+    régions mises à jour (0 en cas d'échec : le cache existant est conservé).
+    """
+    regions = list(REGION_COORDINATES)
+    coords = {
+        "lat": ",".join(str(REGION_COORDINATES[r]['lat']) for r in regions),
+        "lon": ",".join(str(REGION_COORDINATES[r]['lon']) for r in regions),
+    }
+    if not weather_guard.allow_bulk():
+        return 0  # disjoncteur ouvert ; en semi-ouvert, ce rafraîchissement sert d'appel de test
+
+    try:
+        payload = weather_client.get_json_sync(_weather_params(coords))
+    except Exception as e:
+        weather_guard.record_failure([], e)
+        _report_fetch_error("toutes les régions", e)
+        return 0
+
+    # Une liste (ordre des coordonnées) ; un seul objet si une seule région
+    if isinstance(payload, dict):
+        payload = [payload]
+    if len(payload) != len(regions):
+        print(f"WARNING: Réponse météo groupée inattendue ({len(payload)} lieux pour {len(regions)} régions)")
+        weather_guard.release_probe()
+        return 0
+
+    now = time.time()
+    snapshots = {
+        region_name: WeatherSnapshot.from_payload(region_name, data, fetched_at=now)
+        for region_name, data in zip(regions, payload)
+    }
+    _weather_cache.update(snapshots)  # une seule opération : pas de cache à moitié rafraîchi
+    weather_guard.record_success(regions)
+    return len(regions)
+
+
+@memoized("weather.get_weather_forecast")
 def get_weather_forecast(region_name: str) -> str:
     """Obtient les prévisions à 3, 7 et 14 jours de manière concise."""
-    data = fetch_weather_data(region_name, daily=True)
-    if not data or 'daily' not in data:
-        return "❌ Prévisions indisponibles."
+    return _weather_forecast(region_name, get_weather_snapshot(region_name))
+
+
+@memoized("weather.get_weather_forecast")
+async def get_weather_forecast_async(region_name: str) -> str:
+    return _weather_forecast(region_name, await get_weather_snapshot_async(region_name))
+
+
+def _weather_forecast(region_name: str, snapshot: Optional[WeatherSnapshot]) -> str:
+    if snapshot is None or snapshot.series is None:
+        return f"❌ Prévisions indisponibles.\n{_climate_normals(region_name)}"
     
-    daily = data['daily']
+    series = snapshot.series
     forecasts = []
     for days in [3, 7, 14]:
         idx = days - 1
-        if idx < len(daily['time']):
-            date = daily['time'][idx]
-            tmax = daily['temperature_2m_max'][idx]
-            tmin = daily['temperature_2m_min'][idx]
-            precip = daily['precipitation_sum'][idx]
-            forecasts.append(f"J+{days}: {tmin:.0f}-{tmax:.0f}°C, {precip:.1f}mm")
+        if idx < len(series):
+            tmax = series.tmax[idx]
+            tmin = series.tmin[idx]
+            precip = series.precip[idx]
+            forecasts.append(f"J+{days}: {_temp(tmin)}-{_temp(tmax)}°C, {precip:.1f}mm")
     
     return "\n".join(forecasts) if forecasts else "Données insuffisantes"
 
 
+@memoized("weather.get_irrigation_advice")
 def get_irrigation_advice(region_name: str) -> str:
     """Conseils d'irrigation basés sur précipitations et évapotranspiration."""
-    data = fetch_weather_data(region_name, daily=True)
-    if not data or 'daily' not in data:
+    return _irrigation_advice(region_name, get_weather_snapshot(region_name))
+
+
+@memoized("weather.get_irrigation_advice")
+async def get_irrigation_advice_async(region_name: str) -> str:
+    return _irrigation_advice(region_name, await get_weather_snapshot_async(region_name))
+
+
+def _irrigation_advice(region_name: str, snapshot: Optional[WeatherSnapshot]) -> str:
+    if snapshot is None or snapshot.series is None:
         fallback = FALLBACK_CLIMATE_DATA.get(region_name, {})
         rainfall = fallback.get('rainfall_annual', 1500)
         if rainfall < 1000:
             return "⚠️ Zone à faible pluviométrie. Irrigation fortement recommandée."
         return "ℹ️ Données temps réel indisponibles. Suivez calendrier local."
     
-    daily = data['daily']
-    total_precip = sum(daily['precipitation_sum'][:3])
-    total_et0 = sum(daily['et0_fao_evapotranspiration'][:3])
+    total_precip = snapshot.series.rain(3)
+    total_et0 = snapshot.series.et0_total(3)
     
     if total_precip < total_et0 * 0.5:
         deficit = total_et0 - total_precip
@@ -138,46 +283,63 @@ def get_irrigation_advice(region_name: str) -> str:
         return f"✅ Irrigation non nécessaire. Précipitations suffisantes: {total_precip:.1f}mm."
 
 
+@memoized("weather.get_climate_alerts")
 def get_climate_alerts(region_name: str) -> str:
     """Détecte conditions météo dangereuses pour agriculture."""
-    data = fetch_weather_data(region_name, daily=True)
-    if not data or 'current_weather' not in data:
-        return "ℹ️ Surveillance météo indisponible."
+    return _climate_alerts(region_name, get_weather_snapshot(region_name))
+
+
+@memoized("weather.get_climate_alerts")
+async def get_climate_alerts_async(region_name: str) -> str:
+    return _climate_alerts(region_name, await get_weather_snapshot_async(region_name))
+
+
+def _climate_alerts(region_name: str, snapshot: Optional[WeatherSnapshot]) -> str:
+    if snapshot is None or not snapshot.current:
+        return f"ℹ️ Surveillance météo indisponible.\n{_climate_normals(region_name)}"
     
-    current = data['current_weather']
+    current = snapshot.current
     wind = current.get('windspeed', 0)
     
     alerts = []
     if wind > 40:
         alerts.append(f"🌪️ ALERTE VENT: {wind:.0f} km/h. Protégez cultures fragiles.")
     
-    if 'daily' in data:
-        daily = data['daily']
-        next_3d_rain = sum(daily['precipitation_sum'][:3])
+    series = snapshot.series
+    if series is not None:
+        next_3d_rain = series.rain(3)
         if next_3d_rain > 100:
             alerts.append(f"⛈️ ALERTE PLUIE: {next_3d_rain:.0f}mm prévus. Risque inondation/érosion.")
         elif next_3d_rain > 50:
             alerts.append(f"🌧️ Fortes pluies: {next_3d_rain:.0f}mm. Drainage requis.")
         
         # Vérifier vents violents prévus
-        if 'windspeed_10m_max' in daily:
-            max_wind = max(daily['windspeed_10m_max'][:3])
+        max_wind = series.wind_max(3)
+        if max_wind is not None:
             if max_wind > 50:
                 alerts.append(f"💨 Vents violents prévus: {max_wind:.0f} km/h.")
     
     return "\n".join(alerts) if alerts else "✅ Aucune alerte météo."
 
 
+@memoized("weather.analyze_rainfall_patterns")
 def analyze_rainfall_patterns(region_name: str) -> str:
     """Analyse tendances pluviométriques sur 14 jours."""
-    data = fetch_weather_data(region_name, daily=True)
-    if not data or 'daily' not in data:
-        return "Analyse pluviométrique indisponible."
+    return _rainfall_patterns(region_name, get_weather_snapshot(region_name))
+
+
+@memoized("weather.analyze_rainfall_patterns")
+async def analyze_rainfall_patterns_async(region_name: str) -> str:
+    return _rainfall_patterns(region_name, await get_weather_snapshot_async(region_name))
+
+
+def _rainfall_patterns(region_name: str, snapshot: Optional[WeatherSnapshot]) -> str:
+    if snapshot is None or snapshot.series is None:
+        return f"Analyse pluviométrique indisponible.\n{_climate_normals(region_name)}"
     
-    precip_list = data['daily']['precipitation_sum']
-    rainy_days = len([p for p in precip_list if p > 0.5])
-    total_rain = sum(precip_list)
-    avg_rain = total_rain / len(precip_list) if precip_list else 0
+    series = snapshot.series
+    rainy_days = series.rainy_days(len(series))
+    total_rain = series.rain(len(series))
     
     if total_rain < 10:
         pattern = "SEC 🌵"
@@ -195,73 +357,85 @@ def analyze_rainfall_patterns(region_name: str) -> str:
     return f"{pattern} | Total 14j: {total_rain:.0f}mm ({rainy_days}j pluie) | {advice}"
 
 
+@memoized("weather.get_agricultural_weather_summary")
 def get_agricultural_weather_summary(region_name: str) -> str:
     """
     Synthèse météo agricole concise combinant conditions actuelles et prévisions.
     """
-    current_data = fetch_weather_data(region_name, daily=False)
-    daily_data = fetch_weather_data(region_name, daily=True)
-    
-    if not current_data or 'current_weather' not in current_data:
-        fallback = FALLBACK_CLIMATE_DATA.get(region_name, {})
-        return f"📍 {region_name}: Données temps réel indisponibles. Climat: {fallback.get('climate', 'N/A')}"
+    return _weather_summary(region_name, get_weather_snapshot(region_name))
+
+
+@memoized("weather.get_agricultural_weather_summary")
+async def get_agricultural_weather_summary_async(region_name: str) -> str:
+    return _weather_summary(region_name, await get_weather_snapshot_async(region_name))
+
+
+def _weather_summary(region_name: str, snapshot: Optional[WeatherSnapshot]) -> str:
+    if snapshot is None or not snapshot.current:
+        return f"Données temps réel indisponibles.\n{_climate_normals(region_name)}"
     
-    current = current_data['current_weather']
+    current = snapshot.current
     temp = current.get('temperature', 0)
     wind = current.get('windspeed', 0)
     
     summary = f"🌡️ Actuellement: {temp:.1f}°C, Vent: {wind:.0f}km/h"
     
-    if daily_data and 'daily' in daily_data:
-        daily = daily_data['daily']
-        next_3d = sum(daily['precipitation_sum'][:3])
+    if snapshot.series is not None:
+        next_3d = snapshot.series.rain(3)
         summary += f"\n💧 Pluie 3j: {next_3d:.0f}mm"
     
     return summary
 
 
+@memoized("weather.get_frost_risk")
 def get_frost_risk(region_name: str) -> str:
     """
     Évalue risque de gel pour régions montagneuses (Ouest, Nord-Ouest, Adamaoua).
     """
-    mountain_regions = ["Ouest", "Nord-Ouest", "Adamaoua"]
-    
-    if region_name not in mountain_regions:
+    if region_name not in MOUNTAIN_REGIONS:
         return "ℹ️ Risque de gel non pertinent pour cette région."
+    return _frost_risk(region_name, get_weather_snapshot(region_name))
+
+
+@memoized("weather.get_frost_risk")
+async def get_frost_risk_async(region_name: str) -> str:
+    if region_name not in MOUNTAIN_REGIONS:
+        return "ℹ️ Risque de gel non pertinent pour cette région."
+    return _frost_risk(region_name, await get_weather_snapshot_async(region_name))
+
+
+def _frost_risk(region_name: str, snapshot: Optional[WeatherSnapshot]) -> str:
+    min_temp = snapshot.series.tmin_min(7) if snapshot is not None and snapshot.series is not None else None
+    if min_temp is None:
+        return f"⚠️ Évaluation risque gel indisponible.\n{_climate_normals(region_name)}"
     
-    data = fetch_weather_data(region_name, daily=True)
-    if not data or 'daily' not in data:
-        return "⚠️ Évaluation risque gel indisponible."
-    
-    daily = data['daily']
-    min_temps = daily['temperature_2m_min'][:7]  # 7 prochains jours
-    
-    critical_temps = [t for t in min_temps if t < 5]
-    frost_temps = [t for t in min_temps if t < 0]
-    
-    if frost_temps:
-        min_temp = min(frost_temps)
+    if min_temp < 0:
         return f"❄️ ALERTE GEL: {min_temp:.1f}°C prévu. Protégez cultures sensibles!"
-    elif critical_temps:
-        min_temp = min(critical_temps)
+    elif min_temp < 5:
         return f"⚠️ Températures basses: {min_temp:.1f}°C. Surveillez cultures."
     else:
-        min_temp = min(min_temps)
         return f"✅ Pas de risque gel. Minimum: {min_temp:.1f}°C."
 
 
+@memoized("weather.get_optimal_planting_conditions")
 def get_optimal_planting_conditions(region_name: str, crop_type: str = "général") -> str:
     """
     Évalue si conditions actuelles sont optimales pour plantation.
     """
-    data = fetch_weather_data(region_name, daily=True)
-    if not data or 'daily' not in data:
-        return "⚠️ Évaluation conditions plantation indisponible."
+    return _planting_conditions(region_name, get_weather_snapshot(region_name))
+
+
+@memoized("weather.get_optimal_planting_conditions")
+async def get_optimal_planting_conditions_async(region_name: str, crop_type: str = "général") -> str:
+    return _planting_conditions(region_name, await get_weather_snapshot_async(region_name))
+
+
+def _planting_conditions(region_name: str, snapshot: Optional[WeatherSnapshot]) -> str:
+    if snapshot is None or snapshot.series is None:
+        return f"⚠️ Évaluation conditions plantation indisponible.\n{_climate_normals(region_name)}"
     
-    daily = data['daily']
-    next_7d_rain = sum(daily['precipitation_sum'][:7])
-    next_7d_temps = daily['temperature_2m_max'][:7]
-    avg_temp = sum(next_7d_temps) / len(next_7d_temps) if next_7d_temps else 0
+    next_7d_rain = snapshot.series.rain(7)
+    avg_temp = snapshot.series.tmax_mean(7) or 0
     
     conditions = []
     score = 0
@@ -309,6 +483,7 @@ def format_weather_data(data: Dict[str, Any]) -> str:
     return f"{temp}°C, vent {wind}km/h"
 
 
+@memoized("weather.get_crop_monitoring_plan")
 def get_crop_monitoring_plan(region_name: str, crop: str = "culture", period_days: int = 7) -> str:
     """
     Génère un plan de suivi météo-agronomique structuré sur 7 ou 30 jours.
@@ -319,13 +494,21 @@ def get_crop_monitoring_plan(region_name: str, crop: str = "culture", period_day
         crop: Culture concernée (maïs, cacao, etc.)
         period_days: Durée du suivi (7 ou 30 jours)
     """
-    data = fetch_weather_data(region_name, daily=True)
+    return _crop_monitoring_plan(region_name, get_weather_snapshot(region_name), crop, period_days)
+
+
+@memoized("weather.get_crop_monitoring_plan")
+async def get_crop_monitoring_plan_async(region_name: str, crop: str = "culture", period_days: int = 7) -> str:
+    return _crop_monitoring_plan(region_name, await get_weather_snapshot_async(region_name), crop, period_days)
+
+
+def _crop_monitoring_plan(region_name: str, snapshot: Optional[WeatherSnapshot], crop: str, period_days: int) -> str:
     fallback = FALLBACK_CLIMATE_DATA.get(region_name, {"temp_avg": 25, "rainfall_annual": 1500, "climate": "Tropical"})
     
     # Limiter à 14 jours max (limite API Open-Meteo gratuite)
     effective_days = min(period_days, 14)
     
-    if not data or 'daily' not in data:
+    if snapshot is None or snapshot.series is None or len(snapshot.series) == 0:
         # Fallback climatologique si API indisponible
         climate = fallback.get('climate', 'Tropical')
         temp_avg = fallback.get('temp_avg', 25)
@@ -362,30 +545,30 @@ def get_crop_monitoring_plan(region_name: str, crop: str = "culture", period_day
         return "\n".join(plan_lines)
     
     # Plan avec données réelles
-    daily = data['daily']
-    dates = daily['time'][:effective_days]
-    precips = daily['precipitation_sum'][:effective_days]
-    tmax = daily['temperature_2m_max'][:effective_days]
-    tmin = daily['temperature_2m_min'][:effective_days]
-    et0_list = daily.get('et0_fao_evapotranspiration', [5.0] * effective_days)[:effective_days]
+    series = snapshot.series
+    days = min(effective_days, len(series))
+    dates = series.dates[:days]
     
-    total_rain = sum(precips)
-    avg_tmax = sum(tmax) / len(tmax) if tmax else 25
-    rainy_days = len([p for p in precips if p > 0.5])
+    total_rain = series.rain(days)
+    total_et0 = series.et0_total(days)
+    avg_tmax = series.tmax_mean(days) or 25
+    rainy_days = series.rainy_days(days)
+    tmin, tmax = series.tmin_min(days), series.tmax_max(days)
+    temperatures = f"{tmin:.0f}–{tmax:.0f}°C" if tmin is not None and tmax is not None else "non disponibles"
     
     plan_lines = [
         f"📍 **Plan de suivi météo-agronomique — {crop} — {region_name}**",
         f"📅 Période : {dates[0]} → {dates[-1]} ({effective_days} jours de données réelles)",
         f"",
         f"**📊 Résumé météo de la période :**",
-        f"  🌡️ Températures : {min(tmin):.0f}–{max(tmax):.0f}°C (moy. max: {avg_tmax:.0f}°C)",
+        f"  🌡️ Températures : {temperatures} (moy. max: {avg_tmax:.0f}°C)",
         f"  💧 Pluie totale : {total_rain:.0f}mm sur {effective_days}j ({rainy_days} jours pluvieux)",
-        f"  🌿 ET0 cumulée : {sum(et0_list):.0f}mm (besoin en eau des plantes)",
+        f"  🌿 ET0 cumulée : {total_et0:.0f}mm (besoin en eau des plantes)",
         f"",
     ]
     
     # Bilan hydrique global
-    water_balance = total_rain - sum(et0_list)
+    water_balance = series.water_balance(days)
     if water_balance > 20:
         plan_lines.append(f"  ✅ Bilan hydrique EXCÉDENTAIRE (+{water_balance:.0f}mm) — Risque maladies fongiques")
     elif water_balance < -20:
@@ -398,15 +581,16 @@ def get_crop_monitoring_plan(region_name: str, crop: str = "culture", period_day
     plan_lines.append("")
     
     # Générer les actions par semaine groupée
-    for i, (date, precip, tx, tn, et0) in enumerate(zip(dates, precips, tmax, tmin, et0_list)):
+    for i, date in enumerate(dates):
         day_num = i + 1
-        deficit = et0 - precip
+        precip, tx, tn = series.precip[i], series.tmax[i], series.tmin[i]
+        deficit = -series.balance[i]
         
         # En-tête de semaine
         if i % 7 == 0:
             week_num = i // 7 + 1
             week_end = min(i + 7, effective_days)
-            week_rain = sum(precips[i:i+7])
+            week_rain = series.rain(min(7, days - i), start=i)
             plan_lines.append(f"🗓️ **Semaine {week_num} (J{day_num}–J{week_end}) — Pluie: {week_rain:.0f}mm**")
         
         # Actions du jour
@@ -420,10 +604,12 @@ def get_crop_monitoring_plan(region_name: str, crop: str = "culture", period_day
         else:
             actions.append(f"☀️ Sec ({precip:.1f}mm) — Surveiller humidité sol")
         
-        if tx > 35:
+        if np.isnan(tx):
+            actions.append("🌡️ Température max. non disponible — Surveiller la chaleur")
+        elif tx > 35:
             actions.append(f"🌡️ Chaleur ({tx:.0f}°C) — Ombrage si possible")
         
-        plan_lines.append(f"  J{day_num} ({date}): {tx:.0f}/{tn:.0f}°C | " + " | ".join(actions))
+        plan_lines.append(f"  J{day_num} ({date}): {_temp(tx)}/{_temp(tn)}°C | " + " | ".join(actions))
     
     # Si période > 14j, ajouter projection climatologique pour le reste
     if period_days > effective_days:
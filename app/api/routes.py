@@ -1,13 +1,28 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, url_for
 import traceback
 from app.core.orchestrator import AgentOrchestrator
+from app.core.context import RequestContext
+from app.core.batch import run_batch
+from app.core.jobs import job_queue
 from app.agents.weather import WeatherAgent
+from app.agents.weather.health import weather_guard
+from app.agents.weather.refresh import weather_refresher
 from app.agents.crop import CropAgent
 from app.agents.health import HealthAgent
 from app.agents.economic import EconomicAgent
 from app.agents.resources import ResourcesAgent
 from app.agents.fertilizer import FertilizerAgent
+from app.services.llm_service import (
+    get_cache_stats, get_single_flight_stats, get_governor_stats, get_client_stats,
+    get_provider_stats
+)
+from app.services.semantic_cache import semantic_cache
+from app.services.resilience import get_breaker_stats
+from app.core.local_router import local_router
+from app.core.speculation import speculator
+from app.api.sse import sse_stream
 import asyncio
+from config import Config
 
 api_bp = Blueprint('api', __name__)
 
@@ -22,6 +37,64 @@ agents = [
 ]
 orchestrator = AgentOrchestrator(agents)
 
+
+def _request_budget(data: dict, default: float = None, ceiling: float = None) -> float:
+    """Budget de latence demandé (budget_s), borné à REQUEST_BUDGET_MAX ; REQUEST_BUDGET par défaut."""
+    default = default or Config.REQUEST_BUDGET
+    try:
+        budget = float(data.get('budget_s') or default)
+    except (TypeError, ValueError):
+        budget = default
+    return min(max(budget, 1.0), ceiling or Config.REQUEST_BUDGET_MAX)
+
+
+def _request_context(data: dict, region: str) -> RequestContext:
+    """Contexte propre à la requête (l'orchestrateur est partagé entre threads), avec son échéance."""
+    return RequestContext.from_dict({
+        "region": region,
+        "soil_type": data.get('soil_type'),
+        "session": data.get('session_id'),
+        "synthesis": data.get('synthesis'),
+        "trace_id": request.headers.get('X-Request-ID'),
+    }).with_budget(_request_budget(data))
+
+
+def _query_response(user_query: str, region: str, context: RequestContext, result) -> dict:
+    return {
+        "query": user_query,
+        "region": region,
+        "trace_id": context.trace_id,
+        "orchestration": {
+            "selected_agents": list(result.responses.keys()),
+            "individual_responses": result.responses
+        },
+        "final_response": result.final_response,
+        "degraded": result.degraded
+    }
+
+
+def _batch_items(data: dict):
+    """Questions d'un lot, complétées des valeurs par défaut du lot ; (items, None) ou (None, (erreur, code))."""
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return None, ("items must be a non-empty list", 400)
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return None, (f"Batch too large (max {Config.BATCH_MAX_ITEMS} items)", 413)
+
+    defaults = {
+        "region": data.get('region', 'Centre'),
+        "synthesis": data.get('synthesis'),
+    }
+    batch = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"query": item}
+        if not isinstance(item, dict) or not isinstance(item.get('query'), str) or not item['query'].strip():
+            return None, (f"Item {index}: query parameter is required", 400)
+        batch.append({**defaults, **{k: v for k, v in item.items() if v}})
+    return batch, None
+
+
 @api_bp.route('/query', methods=['POST'])
 async def handle_query():
     """
@@ -46,6 +119,24 @@ async def handle_query():
               type: string
               description: "La région concernée (ex: Centre, Nord)."
               default: Centre
+            soil_type:
+              type: string
+              description: "Type de sol de la parcelle (optionnel, ex: ferralitique)."
+            session_id:
+              type: string
+              description: Identifiant de session du client (optionnel).
+            budget_s:
+              type: number
+              description: "Budget de latence de la requête en secondes (défaut REQUEST_BUDGET, max REQUEST_BUDGET_MAX)."
+            synthesis:
+              type: string
+              enum: [auto, llm, template]
+              description: "Synthèse multi-agents : LLM, locale sans appel (template) ou automatique selon la charge."
+      - in: header
+        name: X-Request-ID
+        type: string
+        required: false
+        description: Identifiant de trace ; généré si absent.
     responses:
       200:
         description: Réponse du système multi-agents
@@ -62,6 +153,11 @@ async def handle_query():
             orchestration:
               type: object
               description: Détails de l'orchestration (agents consultés).
+            degraded:
+              type: array
+              items:
+                type: string
+              description: Parties servies en mode dégradé (agents en repli, "synthesis" si synthèse sautée).
       400:
         description: Paramètre manquant
       500:
@@ -75,29 +171,342 @@ async def handle_query():
     if not user_query:
         return jsonify({"error": "Query parameter is required"}), 400
 
-    # Mise à jour du contexte
-    orchestrator.update_context('region', region)
+    context = _request_context(data, region)
 
     try:
-        # 1. Routing et réponses individuelles
-        agent_responses = await orchestrator.handle_query(user_query)
-        
-        # 2. Synthèse
-        final_response = await orchestrator.synthesize_response(user_query, agent_responses)
+        # Routing, réponses individuelles et synthèse, sous l'échéance de la requête
+        result = await orchestrator.answer(user_query, context)
         
-        return jsonify({
-            "query": user_query,
-            "region": region,
-            "orchestration": {
-                "selected_agents": list(agent_responses.keys()),
-                "individual_responses": agent_responses
-            },
-            "final_response": final_response
-        })
+        return jsonify(_query_response(user_query, region, context, result))
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@api_bp.route('/query/stream', methods=['POST'])
+def handle_query_stream():
+    """
+    Traite une requête en flux Server-Sent Events (réponse progressive).
+    ---
+    tags:
+      - Agriculture Agents
+    produces:
+      - text/event-stream
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - query
+          properties:
+            query:
+              type: string
+              description: La question de l'utilisateur.
+              example: "Quand planter le maïs et quelle météo prévoir ?"
+            region:
+              type: string
+              description: "La région concernée (ex: Centre, Nord)."
+              default: Centre
+            soil_type:
+              type: string
+              description: "Type de sol de la parcelle (optionnel)."
+            session_id:
+              type: string
+              description: Identifiant de session du client (optionnel).
+            budget_s:
+              type: number
+              description: "Budget de latence de la requête en secondes (défaut REQUEST_BUDGET, max REQUEST_BUDGET_MAX)."
+            synthesis:
+              type: string
+              enum: [auto, llm, template]
+              description: "Synthèse multi-agents : LLM, locale sans appel (template) ou automatique selon la charge."
+    responses:
+      200:
+        description: |
+          Flux d'événements SSE, dans l'ordre :
+          `routing` (agents choisis), `agent` (une réponse d'agent dès qu'elle est prête),
+          `synthesis` (fragments de la synthèse, si plusieurs agents),
+          `done` (réponse finale et parties dégradées) ou `error`.
+      400:
+        description: Paramètre manquant
+    """
+
+    data = request.get_json()
+    user_query = data.get('query')
+    region = data.get('region', 'Centre')
+
+    if not user_query:
+        return jsonify({"error": "Query parameter is required"}), 400
+
+    context = _request_context(data, region)
+    events = orchestrator.stream_query(user_query, context)
+    return Response(
+        sse_stream(events),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # pas de mise en tampon par un proxy nginx
+            "X-Request-ID": context.trace_id,
+        },
+    )
+
+@api_bp.route('/query/batch', methods=['POST'])
+async def handle_query_batch():
+    """
+    Traite un lot de questions (ex: une question par parcelle d'une coopérative).
+    ---
+    tags:
+      - Agriculture Agents
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - items
+          properties:
+            items:
+              type: array
+              description: "Questions du lot (BATCH_MAX_ITEMS au plus)."
+              items:
+                type: object
+                required:
+                  - query
+                properties:
+                  query:
+                    type: string
+                    example: "Quand planter le maïs ?"
+                  region:
+                    type: string
+                  soil_type:
+                    type: string
+            region:
+              type: string
+              description: Région par défaut des questions qui n'en précisent pas.
+              default: Centre
+            budget_s:
+              type: number
+              description: "Budget de latence de chaque question en secondes (défaut REQUEST_BUDGET, max REQUEST_BUDGET_MAX)."
+            synthesis:
+              type: string
+              enum: [auto, llm, template]
+              description: Mode de synthèse par défaut des questions du lot.
+    responses:
+      200:
+        description: |
+          Résultats dans l'ordre du lot (`results`) : réponse finale, agents consultés,
+          parties dégradées et latence par question ; les doublons (même question
+          normalisée, même région) renvoient au premier via `duplicate_of`.
+          `stats` : questions uniques, taux de déduplication, latences et hits de cache.
+      400:
+        description: Lot absent ou question invalide
+      413:
+        description: Lot trop grand
+    """
+
+    data = request.get_json() or {}
+    batch, error = _batch_items(data)
+    if error:
+        return jsonify({"error": error[0]}), error[1]
+
+    try:
+        result = await run_batch(orchestrator, batch, Config.BATCH_CONCURRENCY, _request_budget(data))
+        return jsonify(result)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# --- Tâches asynchrones ---
+
+_JOB_QUERY_FIELDS = ('query', 'region', 'soil_type', 'session_id', 'synthesis', 'budget_s')
+
+
+def _job_budget(payload: dict) -> float:
+    """Budget d'une tâche : jusqu'à JOB_TIMEOUT, compté à partir du début de son exécution."""
+    return _request_budget(payload, default=Config.REQUEST_BUDGET_MAX, ceiling=Config.JOB_TIMEOUT)
+
+
+async def _run_query_job(payload: dict) -> dict:
+    region = payload.get('region', 'Centre')
+    context = RequestContext.from_dict({
+        "region": region,
+        "soil_type": payload.get('soil_type'),
+        "session": payload.get('session_id'),
+        "synthesis": payload.get('synthesis'),
+        "trace_id": payload.get('trace_id'),
+    }).with_budget(_job_budget(payload))
+    result = await orchestrator.answer(payload['query'], context)
+    return _query_response(payload['query'], region, context, result)
+
+
+async def _run_batch_job(payload: dict) -> dict:
+    return await run_batch(orchestrator, payload['items'], Config.BATCH_CONCURRENCY, _job_budget(payload))
+
+
+job_queue.register("query", _run_query_job)
+job_queue.register("batch", _run_batch_job)
+
+
+def _job_view(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "expires_at": job["expires_at"],
+        "error": job["error"],
+        "status_url": url_for('api.get_job', job_id=job["id"]),
+        "result_url": url_for('api.get_job_result', job_id=job["id"]),
+    }
+
+
+@api_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Soumet une tâche longue (question multi-agents, plan de suivi, lot) à exécuter en arrière-plan.
+    ---
+    tags:
+      - Jobs
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            kind:
+              type: string
+              enum: [query, batch]
+              default: query
+            query:
+              type: string
+              description: "Question (kind=query)."
+              example: "Donne-moi un plan de suivi du maïs sur 30 jours"
+            region:
+              type: string
+              default: Centre
+            soil_type:
+              type: string
+            items:
+              type: array
+              description: "Questions du lot (kind=batch), comme pour /api/query/batch."
+              items:
+                type: object
+            budget_s:
+              type: number
+              description: "Budget de la tâche en secondes (défaut REQUEST_BUDGET_MAX, max JOB_TIMEOUT)."
+            idempotency_key:
+              type: string
+              description: Alternative à l'en-tête Idempotency-Key.
+      - in: header
+        name: Idempotency-Key
+        type: string
+        required: false
+        description: Une nouvelle soumission avec la même clé renvoie la tâche existante (jusqu'à son expiration).
+    responses:
+      202:
+        description: Tâche créée ; suivre status_url puis result_url.
+      200:
+        description: Tâche déjà soumise avec cette clé d'idempotence.
+      400:
+        description: Paramètre manquant ou type de tâche inconnu
+      503:
+        description: Tâches asynchrones désactivées
+    """
+
+    if not Config.JOBS_ENABLED:
+        return jsonify({"error": "Async jobs are disabled"}), 503
+
+    data = request.get_json() or {}
+    kind = data.get('kind', 'query')
+    if kind == 'query':
+        if not data.get('query'):
+            return jsonify({"error": "Query parameter is required"}), 400
+        payload = {k: data[k] for k in _JOB_QUERY_FIELDS if data.get(k)}
+        if request.headers.get('X-Request-ID'):
+            payload['trace_id'] = request.headers['X-Request-ID']
+    elif kind == 'batch':
+        items, error = _batch_items(data)
+        if error:
+            return jsonify({"error": error[0]}), error[1]
+        payload = {"items": items, "budget_s": data.get('budget_s')}
+    else:
+        return jsonify({"error": f"Unknown job kind: {kind} (expected one of {job_queue.kinds})"}), 400
+
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    try:
+        job, created = job_queue.submit(kind, payload, idempotency_key)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+    view = _job_view(job)
+    return jsonify(view), (202 if created else 200), {"Location": view["status_url"]}
+
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    État d'une tâche : queued, running, done ou failed.
+    ---
+    tags:
+      - Jobs
+    parameters:
+      - in: path
+        name: job_id
+        type: string
+        required: true
+    responses:
+      200:
+        description: État de la tâche (sans le résultat)
+      404:
+        description: Tâche inconnue ou expirée
+    """
+
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(_job_view(job))
+
+
+@api_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """
+    Résultat d'une tâche terminée (même format que /api/query ou /api/query/batch).
+    ---
+    tags:
+      - Jobs
+    parameters:
+      - in: path
+        name: job_id
+        type: string
+        required: true
+    responses:
+      200:
+        description: Résultat de la tâche
+      202:
+        description: Tâche pas encore terminée (réessayer après Retry-After secondes)
+      404:
+        description: Tâche inconnue ou expirée
+      500:
+        description: Tâche en échec
+    """
+
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    if job["status"] == "done":
+        return jsonify({"job_id": job["id"], "status": job["status"], "result": job["result"]})
+    if job["status"] == "failed":
+        return jsonify({"job_id": job["id"], "status": job["status"], "error": job["error"]}), 500
+    return jsonify(_job_view(job)), 202, {"Retry-After": "2"}
+
+
 @api_bp.route('/agents', methods=['GET'])
 def list_agents():
     """
@@ -123,3 +532,69 @@ def list_agents():
         {"name": a.name, "description": a.description} 
         for a in agents
     ])
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Métriques internes du service (cache LLM, etc.).
+    ---
+    tags:
+      - System
+    responses:
+      200:
+        description: Compteurs et statistiques d'exécution
+        schema:
+          type: object
+          properties:
+            llm_cache:
+              type: object
+              description: Statistiques du cache LLM (hits, misses, évictions, octets).
+            llm_single_flight:
+              type: object
+              description: Appels LLM dédupliqués (meneurs, suiveurs, en cours).
+            llm_governor:
+              type: object
+              description: Appels LLM en cours, file d'attente et temps d'attente par priorité.
+            llm_providers:
+              type: object
+              description: Latences p50/p95, taux d'erreur et requêtes hedgées par fournisseur.
+            circuit_breakers:
+              type: object
+              description: État des disjoncteurs par fournisseur (closed, open, half_open).
+            llm_clients:
+              type: object
+              description: Clients fournisseurs partagés et préchauffages de connexion.
+            semantic_cache:
+              type: object
+              description: Cache sémantique des réponses d'agents (hits, entrées, seuil).
+            router:
+              type: object
+              description: Décisions de routage locales vs LLM, taux de contournement du LLM et accord.
+            speculation:
+              type: object
+              description: Préparations spéculatives d'agents (utiles, gaspillées, hors budget).
+            weather_refresh:
+              type: object
+              description: Rafraîchissement groupé du cache météo (succès, échecs, âge du dernier).
+            weather_api:
+              type: object
+              description: Santé d'Open-Meteo (disjoncteur, régions en cache négatif, appels court-circuités).
+            jobs:
+              type: object
+              description: Tâches asynchrones (profondeur de file, en cours, terminées, temps d'attente et d'exécution).
+    """
+
+    return jsonify({
+        "llm_cache": get_cache_stats(),
+        "llm_single_flight": get_single_flight_stats(),
+        "llm_governor": get_governor_stats(),
+        "llm_clients": get_client_stats(),
+        "llm_providers": get_provider_stats(),
+        "circuit_breakers": get_breaker_stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "router": local_router.stats(),
+        "speculation": speculator.stats(),
+        "weather_refresh": weather_refresher.stats(),
+        "weather_api": weather_guard.stats(),
+        "jobs": job_queue.stats() if Config.JOBS_ENABLED else None
+    })
@@ -0,0 +1,39 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterator
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Un événement Server-Sent Events (JSON sur une ligne, accents conservés)."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def iterate_async(events: AsyncIterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Consomme un générateur asynchrone depuis un générateur synchrone (réponse
+    Flask en flux), sur une boucle asyncio propre à la requête. Si le client
+    se déconnecte, le générateur est fermé et le travail en cours annulé.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(events.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        try:
+            loop.run_until_complete(events.aclose())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+
+def sse_stream(events: AsyncIterator[Dict[str, Any]]) -> Iterator[str]:
+    """Événements {"event", "data"} de l'orchestrateur au format SSE ; une erreur termine le flux."""
+    try:
+        for event in iterate_async(events):
+            yield format_sse(event["event"], event["data"])
+    except Exception as e:
+        print(f"WARNING: Flux SSE interrompu: {e}")
+        yield format_sse("error", {"error": str(e) or type(e).__name__})
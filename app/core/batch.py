@@ -0,0 +1,114 @@
+"""Traitement par lots de questions (coopératives : une question par parcelle)."""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from app.core.context import RequestContext
+from app.services.llm_service import get_cache_stats, get_single_flight_stats
+from app.services.semantic_cache import semantic_cache
+from app.utils.text import normalize_query
+
+
+def _dedup_key(item: Dict[str, Any]) -> Tuple:
+    """Questions équivalentes après normalisation, pour la même région et le même sol."""
+    return (
+        normalize_query(item["query"]),
+        normalize_query(item.get("region") or Config.DEFAULT_REGION),
+        (item.get("soil_type") or "").strip().lower(),
+        item.get("synthesis") or "",
+    )
+
+
+def _counters() -> Dict[str, int]:
+    llm = get_cache_stats()
+    l2 = llm.get("l2") or {}
+    return {
+        "llm_cache_hits": llm["l1"]["hits"] + l2.get("hits", 0),
+        "llm_single_flight_followers": get_single_flight_stats().get("followers", 0),
+        "semantic_cache_hits": semantic_cache.stats()["hits"],
+    }
+
+
+async def run_batch(orchestrator, items: List[Dict[str, Any]], concurrency: int = 8,
+                    budget: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Traite une liste de {query, region, ...} sur la boucle asyncio courante
+    (un seul pool de connexions LLM) avec au plus `concurrency` questions en
+    cours. Les doublons (même question normalisée, même région) ne sont
+    calculés qu'une fois. Résultats dans l'ordre d'entrée, avec la latence
+    de chaque question ; l'échéance `budget` court à partir du début de
+    traitement de chaque question, pas de son entrée dans la file.
+    """
+    start = time.monotonic()
+    before = _counters()
+
+    first_index: Dict[Tuple, int] = {}
+    unique: List[int] = []
+    duplicate_of: Dict[int, int] = {}
+    for index, item in enumerate(items):
+        key = _dedup_key(item)
+        if key in first_index:
+            duplicate_of[index] = first_index[key]
+        else:
+            first_index[key] = index
+            unique.append(index)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(index: int) -> Dict[str, Any]:
+        item = items[index]
+        async with semaphore:
+            context = RequestContext.from_dict({
+                "region": item.get("region"),
+                "soil_type": item.get("soil_type"),
+                "session": item.get("session_id"),
+                "synthesis": item.get("synthesis"),
+            })
+            if budget is not None:
+                context = context.with_budget(budget)
+            item_start = time.monotonic()
+            try:
+                result = await orchestrator.answer(item["query"], context)
+                outcome = {
+                    "selected_agents": list(result.responses.keys()),
+                    "final_response": result.final_response,
+                    "degraded": result.degraded,
+                }
+            except Exception as e:
+                print(f"WARNING: Question {index} du lot en échec: {e}")
+                outcome = {"error": str(e) or type(e).__name__}
+            outcome["latency_ms"] = round((time.monotonic() - item_start) * 1000, 1)
+            return outcome
+
+    computed = dict(zip(unique, await asyncio.gather(*(run_one(i) for i in unique))))
+
+    results = []
+    for index, item in enumerate(items):
+        source = duplicate_of.get(index, index)
+        entry = {"index": index, "query": item["query"], "region": item.get("region") or Config.DEFAULT_REGION,
+                 **computed[source]}
+        if index in duplicate_of:
+            entry["duplicate_of"] = source
+            entry["latency_ms"] = 0.0
+        results.append(entry)
+
+    after = _counters()
+    latencies = sorted(computed[i]["latency_ms"] for i in unique)
+    return {
+        "results": results,
+        "stats": {
+            "items": len(items),
+            "unique": len(unique),
+            "duplicates": len(duplicate_of),
+            "dedup_rate": round(len(duplicate_of) / len(items), 4) if items else 0.0,
+            "errors": sum(1 for i in unique if "error" in computed[i]),
+            "concurrency": concurrency,
+            "total_ms": round((time.monotonic() - start) * 1000, 1),
+            "p50_ms": latencies[len(latencies) // 2] if latencies else None,
+            "max_ms": latencies[-1] if latencies else None,
+            # Écarts des compteurs du processus pendant le lot (inclut d'éventuelles requêtes concurrentes)
+            **{name: after[name] - before[name] for name in after},
+        },
+    }
@@ -0,0 +1,98 @@
+"""Contexte immuable d'une requête, propagé de l'API jusqu'aux outils."""
+
+import contextvars
+import dataclasses
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from config import Config
+from app.core.memo import RequestMemo
+
+
+def _new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    """
+    Contexte d'une requête utilisateur (région, type de sol, session, échéance,
+    mode de synthèse, identifiant de trace).
+
+    Immuable et créé par requête : l'orchestrateur et les agents restent sans
+    état et peuvent être partagés entre threads et boucles asyncio. Garde
+    l'interface `get()` d'un dict pour le code des agents.
+    """
+
+    region: str = Config.DEFAULT_REGION
+    soil_type: Optional[str] = None
+    session: Optional[str] = None
+    deadline: Optional[float] = None  # instant time.monotonic() limite
+    synthesis: Optional[str] = None  # mode de synthèse demandé ('llm', 'template', 'auto')
+    trace_id: str = field(default_factory=_new_trace_id)
+    # Résultats d'outils partagés entre les agents de la requête (seul état mutable)
+    memo: RequestMemo = field(default_factory=RequestMemo, compare=False, repr=False)
+
+    # Champs non transmis aux prompts
+    _INTERNAL = ("deadline", "synthesis", "trace_id", "memo")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None) if not key.startswith("_") else None
+        return default if value is None else value
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Champs renseignés utiles au prompt (sans échéance ni trace)."""
+        for f in dataclasses.fields(self):
+            value = getattr(self, f.name)
+            if value is not None and f.name not in self._INTERNAL:
+                yield f.name, value
+
+    def replace(self, **changes: Any) -> "RequestContext":
+        return dataclasses.replace(self, **changes)
+
+    def with_budget(self, seconds: float) -> "RequestContext":
+        """Copie avec une échéance à `seconds` secondes d'ici."""
+        return self.replace(deadline=time.monotonic() + seconds)
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def remaining(self) -> Optional[float]:
+        """Secondes restantes avant l'échéance (None si pas d'échéance)."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RequestContext":
+        """Construit un contexte depuis un corps de requête (clés inconnues ignorées)."""
+        known = {f.name for f in dataclasses.fields(cls)} - {"memo"}
+        values = {k: v for k, v in data.items() if k in known and v not in (None, "")}
+        return cls(**values)
+
+
+_current_context: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar(
+    "request_context", default=None
+)
+
+
+def get_current_context() -> Optional[RequestContext]:
+    """Contexte de la requête en cours dans cette tâche asyncio (None hors requête)."""
+    return _current_context.get()
+
+
+def set_current_context(context: RequestContext) -> contextvars.Token:
+    return _current_context.set(context)
+
+
+def reset_current_context(token: contextvars.Token) -> None:
+    _current_context.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Secondes restantes avant l'échéance de la requête en cours (None si pas d'échéance)."""
+    context = _current_context.get()
+    return context.remaining() if context is not None else None
@@ -0,0 +1,237 @@
+"""File de tâches asynchrones (plans de suivi, questions multi-agents longues)."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import Config
+from app.services.job_store import JobStore
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    Exécute les tâches soumises hors du cycle requête/réponse HTTP : la route
+    de soumission répond tout de suite (202) et libère le thread gunicorn, le
+    client interroge ensuite l'état puis le résultat.
+
+    Les tâches sont persistées dans un JobStore SQLite partagé entre workers ;
+    `concurrency` coroutines les exécutent sur une boucle asyncio propre,
+    dans un thread d'arrière-plan démarré au premier besoin. Une tâche
+    soumise réveille immédiatement les workers locaux ; celles soumises par
+    un autre processus sont prises au plus tard après `poll_interval`.
+    Les appels SQLite (bloquants jusqu'à 5 s si la base est verrouillée)
+    passent par asyncio.to_thread pour ne pas figer les autres workers.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, concurrency: int = 4,
+                 timeout: float = 120, poll_interval: float = 1.0):
+        self._store = store
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._running = 0
+
+        self.submitted = 0
+        self.idempotent_hits = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    @property
+    def store(self) -> JobStore:
+        # Base ouverte au premier usage : importer le module ne crée aucun fichier
+        with self._lock:
+            if self._store is None:
+                self._store = JobStore(Config.JOB_STORE_PATH, ttl=Config.JOB_TTL)
+            return self._store
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Associe un type de tâche à une coroutine handler(payload) -> résultat sérialisable en JSON."""
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self):
+        return sorted(self._handlers)
+
+    def submit(self, kind: str, payload: Dict[str, Any],
+               idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """Met une tâche en file ; retourne (tâche, créée). ValueError si le type est inconnu."""
+        if kind not in self._handlers:
+            raise ValueError(f"Type de tâche inconnu: {kind}")
+        job, created = self.store.create(kind, payload, idempotency_key)
+        with self._lock:
+            if created:
+                self.submitted += 1
+            else:
+                self.idempotent_hits += 1
+        if created:
+            self.start()
+            self._notify()
+        return job, created
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    # --- Cycle de vie ---
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name="job-queue", daemon=True)
+            self._thread.start()
+        ready.wait(5)
+
+    def stop(self, timeout: float = 5) -> None:
+        """Arrête les workers (les tâches en cours sont annulées et marquées en échec)."""
+        with self._lock:
+            thread, loop, stop_event = self._thread, self._loop, self._stop_event
+        if thread is None or loop is None or stop_event is None:
+            return
+        try:
+            loop.call_soon_threadsafe(stop_event.set)
+        except RuntimeError:
+            pass  # boucle déjà fermée
+        thread.join(timeout)
+
+    def _notify(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # boucle fermée entre-temps
+
+    def _run(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._wakeup = asyncio.Event()
+        self._stop_event = asyncio.Event()
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_until_complete(self._main())
+        finally:
+            self._loop = None
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    async def _main(self) -> None:
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        while not self._stop_event.is_set():
+            await asyncio.to_thread(self._maintain)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), 60)
+            except asyncio.TimeoutError:
+                pass
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def _maintain(self) -> None:
+        """Purge des tâches expirées ; échec des tâches abandonnées par un worker arrêté."""
+        try:
+            self.store.purge_expired()
+            self.store.fail_stale()
+        except sqlite3.Error as e:
+            print(f"WARNING: Maintenance de la file de tâches impossible: {e}")
+
+    async def _worker(self) -> None:
+        while True:
+            # Effacé avant la réservation : une soumission concurrente n'est pas perdue
+            self._wakeup.clear()
+            try:
+                # Échéance laissée aux autres workers : délai d'exécution plus la marge d'écriture
+                job = await asyncio.to_thread(self.store.claim, self.timeout * 2)
+            except sqlite3.Error as e:
+                print(f"WARNING: File de tâches indisponible: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        handler = self._handlers.get(job["kind"])
+        with self._lock:
+            self._running += 1
+            self._wait_total += job["started_at"] - job["created_at"]
+        start = time.monotonic()
+        try:
+            if handler is None:
+                raise ValueError(f"Type de tâche inconnu: {job['kind']}")
+            result = await asyncio.wait_for(handler(job["payload"]), self.timeout)
+            if await asyncio.to_thread(self.store.complete, job["id"], result):
+                with self._lock:
+                    self.completed += 1
+            else:
+                # Échéance dépassée : un autre worker l'a déjà déclarée abandonnée
+                print(f"WARNING: Tâche {job['id']} ({job['kind']}) terminée après son échéance, résultat ignoré")
+                with self._lock:
+                    self.failed += 1
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.store.fail, job["id"], "Tâche annulée (arrêt du worker)")
+            with self._lock:
+                self.failed += 1
+            raise
+        except Exception as e:
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            error = f"Délai dépassé ({self.timeout:.0f}s)" if timed_out else (str(e) or type(e).__name__)
+            print(f"WARNING: Tâche {job['id']} ({job['kind']}) en échec: {error}")
+            await asyncio.to_thread(self.store.fail, job["id"], error)
+            with self._lock:
+                self.failed += 1
+                self.timeouts += int(timed_out)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_total += time.monotonic() - start
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            counts = self.store.counts()
+        except sqlite3.Error as e:
+            print(f"WARNING: Statistiques de la file de tâches indisponibles: {e}")
+            counts = {}
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "queue_depth": counts.get(JobStore.QUEUED, 0),
+                "jobs": counts,
+                "concurrency": self.concurrency,
+                "running_here": self._running,
+                "worker_alive": self._thread is not None and self._thread.is_alive(),
+                "submitted": self.submitted,
+                "idempotent_hits": self.idempotent_hits,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self._wait_total / finished * 1000, 1) if finished else 0.0,
+                "avg_run_ms": round(self._run_total / finished * 1000, 1) if finished else 0.0,
+            }
+
+
+# Instance globale
+job_queue = JobQueue(
+    concurrency=Config.JOB_CONCURRENCY,
+    timeout=Config.JOB_TIMEOUT,
+    poll_interval=Config.JOB_POLL_INTERVAL,
+)
@@ -0,0 +1,350 @@
+"""Routage local (sans appel LLM) des questions vers les agents."""
+
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+from app.utils.text import hashed_vector, normalize_query, tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows (développement) : verrou entre threads seulement
+    fcntl = None
+
+# Mots-clés et alias par agent (sans accents, forme canonique de normalize_query).
+# Poids 1.0 : terme sans ambiguïté ; 0.5 : terme partagé entre plusieurs agents.
+AGENT_KEYWORDS: Dict[str, Dict[str, float]] = {
+    "WeatherAgent": {
+        "meteo": 1.0, "pluie": 1.0, "pluviometrie": 1.0, "temperature": 1.0, "climat": 1.0,
+        "prevision": 1.0, "secheresse": 1.0, "vent": 1.0, "humidite": 1.0, "orage": 1.0,
+        "chaleur": 1.0, "froid": 1.0, "gel": 1.0, "temps": 0.5, "suivi": 0.5, "irriguer": 0.5,
+    },
+    "CropAgent": {
+        "planter": 1.0, "calendrier": 1.0, "variete": 1.0, "rotation": 1.0, "assolement": 1.0,
+        "recolte": 1.0, "recolter": 1.0, "itineraire": 1.0, "espacement": 1.0, "bouture": 1.0,
+        "cultiver": 1.0, "culture": 0.5,
+    },
+    "HealthAgent": {
+        "maladie": 1.0, "ravageur": 1.0, "insecte": 1.0, "chenille": 1.0, "parasite": 1.0,
+        "symptome": 1.0, "tache": 1.0, "jaunissent": 1.0, "pourriture": 1.0, "champignon": 1.0,
+        "fongicide": 1.0, "insecticide": 1.0, "mildiou": 1.0, "anthracnose": 1.0, "puceron": 1.0,
+        "traiter": 0.5, "traitement": 0.5,
+    },
+    "EconomicAgent": {
+        "prix": 1.0, "marche": 1.0, "vendre": 1.0, "vente": 1.0, "rentabilite": 1.0,
+        "rentable": 1.0, "benefice": 1.0, "fcfa": 1.0, "revenu": 1.0, "export": 1.0,
+        "acheter": 1.0, "commercialisation": 1.0,
+    },
+    "ResourcesAgent": {
+        "sol": 0.5, "eau": 1.0, "terrain": 1.0, "aptitude": 1.0, "amendement": 0.5,
+        "chaux": 0.5, "ph": 0.5, "argileux": 1.0, "sableux": 1.0, "erosion": 1.0, "irriguer": 0.5,
+    },
+    "FertilizerAgent": {
+        "engrais": 1.0, "npk": 1.0, "uree": 1.0, "compost": 1.0, "fumier": 1.0,
+        "fertilisation": 1.0, "fertiliser": 1.0, "carence": 1.0, "azote": 1.0, "potassium": 1.0,
+        "phosphore": 1.0, "amendement": 0.5, "chaux": 0.5, "sol": 0.5,
+    },
+}
+
+# Conjonctions qui signalent une question multi-agents ("quand planter et quelle météo ?")
+_CONJUNCTIONS = {"et", "puis", "ainsi"}
+
+
+def _stem(token: str) -> str:
+    """Pluriel simple : 'maladies' → 'maladie', 'prix' reste 'prix'."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Agents choisis localement, avec une confiance entre 0 et 1."""
+
+    agents: List[str]
+    confidence: float
+    source: str  # "keywords", "classifier", "hybrid" ou "none"
+
+
+class LocalRouter:
+    """
+    Routeur local à deux étages :
+
+    1. Index de mots-clés/alias insensible aux accents et aux pluriels ;
+    2. Classifieur linéaire (régression logistique un-contre-tous) sur les
+       n-grammes de caractères hachés, entraîné sur les décisions de routage
+       du LLM journalisées en JSONL.
+
+    La décision n'est utilisée que si sa confiance dépasse le seuil ; sinon
+    l'orchestrateur interroge le LLM, dont la réponse enrichit le journal
+    d'entraînement (borné à 2 × `max_samples` lignes). Le modèle est
+    réentraîné en arrière-plan tous les `retrain_every` nouveaux exemples.
+    """
+
+    def __init__(self, log_path: Optional[str] = None, threshold: float = 0.75, dim: int = 512,
+                 min_samples: int = 50, retrain_every: int = 100, max_samples: int = 5000):
+        self.log_path = log_path
+        self.threshold = threshold
+        self.dim = dim
+        self.min_samples = min_samples
+        self.retrain_every = retrain_every
+        self.max_samples = max_samples
+
+        self._index: Dict[str, Dict[str, float]] = {}
+        for agent, keywords in AGENT_KEYWORDS.items():
+            for keyword, weight in keywords.items():
+                self._index.setdefault(_stem(keyword), {})[agent] = weight
+
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._weights: Optional[np.ndarray] = None
+        self._bias: Optional[np.ndarray] = None
+        self._labels: List[str] = []
+        self._training = False
+        self._new_samples = 0
+
+        self._metrics = {"local_keywords": 0, "local_classifier": 0, "local_hybrid": 0, "llm": 0}
+        self._agreements = 0
+        self._shadowed = 0
+        self._confidence_sum = 0.0
+        self.trained_samples = 0
+
+        if log_path and os.path.exists(log_path):
+            self.retrain_async()
+
+    # --- Décision ---
+
+    def keyword_scores(self, query: str) -> Dict[str, float]:
+        scores: Dict[str, float] = {}
+        # Ordre d'apparition conservé : à score égal, le premier agent cité passe devant
+        for token in dict.fromkeys(_stem(t) for t in normalize_query(query).split()):
+            for agent, weight in self._index.get(token, {}).items():
+                scores[agent] = scores.get(agent, 0.0) + weight
+        return scores
+
+    def classifier_probs(self, query: str) -> Optional[Dict[str, float]]:
+        with self._lock:
+            weights, bias, labels = self._weights, self._bias, self._labels
+        if weights is None:
+            return None
+        x = hashed_vector(normalize_query(query), self.dim)
+        probs = 1.0 / (1.0 + np.exp(-(x @ weights + bias)))
+        return {label: float(p) for label, p in zip(labels, probs)}
+
+    def route(self, query: str, candidates: Optional[List[str]] = None) -> RouteDecision:
+        """Meilleure décision locale ; `candidates` restreint aux agents enregistrés."""
+        allowed = set(candidates) if candidates is not None else None
+        scores = {a: s for a, s in self.keyword_scores(query).items() if allowed is None or a in allowed}
+        probs = self.classifier_probs(query)
+        if probs is not None and allowed is not None:
+            probs = {a: p for a, p in probs.items() if a in allowed}
+
+        if scores:
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            agents = ranked[:1]
+            multi = _CONJUNCTIONS & set(tokenize(query))
+            if multi and len(ranked) > 1 and scores[ranked[1]] >= 1.0:
+                agents = ranked[:2]
+            total = sum(scores.values())
+            # Part des mots-clés captée par les agents choisis, saturée par la force du signal
+            kw_confidence = sum(scores[a] for a in agents) / total * min(1.0, min(scores[a] for a in agents))
+            # Le classifieur n'apprend que des questions ambiguës (routées par le LLM) : il ne
+            # peut que confirmer un signal faible, jamais désavouer des mots-clés nets
+            if not probs or kw_confidence >= self.threshold:
+                return RouteDecision(agents, round(kw_confidence, 4), "keywords")
+            clf_confidence = min(probs.get(a, 0.0) for a in agents)
+            return RouteDecision(agents, round(max(kw_confidence, clf_confidence), 4), "hybrid")
+
+        if probs:
+            ranked = sorted(probs, key=probs.get, reverse=True)
+            agents = [a for a in ranked[:2] if probs[a] >= 0.5] or ranked[:1]
+            return RouteDecision(agents, round(min(probs[a] for a in agents), 4), "classifier")
+
+        return RouteDecision([], 0.0, "none")
+
+    def prior(self, query: str, candidates: Optional[List[str]] = None, k: int = 2) -> List[tuple]:
+        """
+        Les `k` agents les plus probables avec un score entre 0 et 1 (part des
+        mots-clés ou probabilité du classifieur), même sous le seuil de confiance.
+        """
+        scores = self.keyword_scores(query)
+        total = sum(scores.values())
+        probs = self.classifier_probs(query) or {}
+        combined = {
+            agent: max(scores.get(agent, 0.0) / total if total else 0.0, probs.get(agent, 0.0))
+            for agent in {**scores, **probs}
+            if candidates is None or agent in candidates
+        }
+        ranked = sorted(combined.items(), key=lambda item: item[1], reverse=True)
+        return [(agent, round(score, 4)) for agent, score in ranked[:k] if score > 0]
+
+    def is_confident(self, decision: RouteDecision) -> bool:
+        return bool(decision.agents) and decision.confidence >= self.threshold
+
+    # --- Métriques et journal d'entraînement ---
+
+    def record_local(self, decision: RouteDecision) -> None:
+        with self._lock:
+            self._metrics[f"local_{decision.source}"] += 1
+            self._confidence_sum += decision.confidence
+
+    async def record_llm(self, query: str, agents: List[str], local: RouteDecision) -> None:
+        """
+        Décision du LLM : comptée, comparée à la proposition locale et
+        journalisée (écriture du fichier hors de la boucle asyncio).
+        """
+        with self._lock:
+            self._metrics["llm"] += 1
+            if local.agents:
+                self._shadowed += 1
+                if set(local.agents) == set(agents):
+                    self._agreements += 1
+        if not agents or not self.log_path:
+            return
+        entry = {"query": query, "agents": agents, "ts": round(time.time(), 3)}
+        if await asyncio.to_thread(self._append_log, entry):
+            self.retrain_async()
+
+    @contextlib.contextmanager
+    def _log_locked(self):
+        """
+        Accès exclusif au journal : entre threads, et entre workers gunicorn
+        (flock sur un fichier voisin) pour qu'un compactage ne perde pas les
+        lignes ajoutées par un autre processus entre la lecture et le remplacement.
+        """
+        with self._log_lock:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(f"{self.log_path}.lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _append_log(self, entry: dict) -> bool:
+        """Ajoute une décision au journal ; vrai si un réentraînement est dû."""
+        try:
+            with self._log_locked(), open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"WARNING: Journal de routage non écrit ({self.log_path}): {e}")
+            return False
+        with self._lock:
+            self._new_samples += 1
+            return self._new_samples >= self.retrain_every
+
+    def _load_samples(self) -> List[dict]:
+        try:
+            with self._log_locked():
+                with open(self.log_path, encoding="utf-8") as f:
+                    lines = f.readlines()
+                if len(lines) > 2 * self.max_samples:
+                    lines = lines[-self.max_samples:]
+                    self._compact_log(lines)
+        except OSError:
+            return []
+
+        samples = []
+        for line in lines[-self.max_samples:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("query") and entry.get("agents"):
+                samples.append(entry)
+        return samples
+
+    def _compact_log(self, lines: List[str]) -> None:
+        """
+        Réécrit le journal avec ses `max_samples` dernières lignes (les seules
+        utilisées pour l'entraînement) : il reste borné à 2 × max_samples.
+        Appelé sous _log_locked().
+        """
+        tmp_path = f"{self.log_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(tmp_path, self.log_path)
+        except OSError as e:
+            print(f"WARNING: Compactage du journal de routage échoué ({self.log_path}): {e}")
+
+    # --- Entraînement ---
+
+    def retrain_async(self) -> None:
+        with self._lock:
+            if self._training:
+                return
+            self._training = True
+            self._new_samples = 0
+        threading.Thread(target=self._retrain_guarded, daemon=True).start()
+
+    def _retrain_guarded(self) -> None:
+        try:
+            self.retrain()
+        except Exception as e:
+            print(f"WARNING: Entraînement du routeur local échoué: {e}")
+        finally:
+            with self._lock:
+                self._training = False
+
+    def retrain(self, epochs: int = 200, learning_rate: float = 2.0, l2: float = 1e-4) -> bool:
+        """Régression logistique un-contre-tous par descente de gradient (NumPy)."""
+        samples = self._load_samples() if self.log_path else []
+        if len(samples) < self.min_samples:
+            return False
+        labels = sorted({a for s in samples for a in s["agents"]})
+        column = {label: i for i, label in enumerate(labels)}
+        x = np.stack([hashed_vector(normalize_query(s["query"]), self.dim) for s in samples])
+        y = np.zeros((len(samples), len(labels)), dtype=np.float32)
+        for row, s in enumerate(samples):
+            for agent in s["agents"]:
+                y[row, column[agent]] = 1.0
+
+        weights = np.zeros((self.dim, len(labels)), dtype=np.float32)
+        bias = np.zeros(len(labels), dtype=np.float32)
+        n = len(samples)
+        for _ in range(epochs):
+            probs = 1.0 / (1.0 + np.exp(-(x @ weights + bias)))
+            error = probs - y
+            weights -= learning_rate * (x.T @ error / n + l2 * weights)
+            bias -= learning_rate * error.mean(axis=0)
+
+        with self._lock:
+            self._weights, self._bias, self._labels = weights, bias, labels
+            self.trained_samples = n
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            local = sum(v for k, v in self._metrics.items() if k != "llm")
+            total = local + self._metrics["llm"]
+            return {
+                "decisions": total,
+                **self._metrics,
+                "llm_bypass_rate": round(local / total, 4) if total else 0.0,
+                "avg_local_confidence": round(self._confidence_sum / local, 4) if local else 0.0,
+                "llm_agreement_rate": round(self._agreements / self._shadowed, 4) if self._shadowed else None,
+                "threshold": self.threshold,
+                "classifier_trained": self._weights is not None,
+                "trained_samples": self.trained_samples,
+            }
+
+
+# Instance globale
+local_router = LocalRouter(
+    log_path=Config.ROUTER_LOG_PATH,
+    threshold=Config.ROUTER_CONFIDENCE_THRESHOLD,
+    dim=Config.ROUTER_DIM,
+    min_samples=Config.ROUTER_MIN_SAMPLES,
+    retrain_every=Config.ROUTER_RETRAIN_EVERY,
+)
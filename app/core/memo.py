@@ -0,0 +1,129 @@
+"""Mémo des résultats d'outils, propre à une requête."""
+
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+# Résultat posé pour les appelants en attente quand le calcul est annulé
+_ABANDONED = object()
+
+
+class RequestMemo:
+    """
+    Résultats d'outils d'une requête, indexés par (outil, arguments) et
+    calculés au plus une fois : les agents d'une même requête consomment les
+    résultats des autres (ex: CropAgent réutilise la synthèse météo du
+    WeatherAgent) au lieu de les recalculer.
+
+    Les appels concurrents sur la même clé attendent le premier calcul, entre
+    threads (outils synchrones lancés via asyncio.to_thread) comme entre
+    tâches asyncio. Un calcul en échec n'est pas mémorisé ; un calcul annulé
+    est repris par l'un des appelants en attente, qui ne sont pas annulés.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[Hashable, Any] = {}
+        self._events: Dict[Hashable, threading.Event] = {}
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        while True:
+            with self._lock:
+                if key in self._values:
+                    self.hits += 1
+                    return self._values[key]
+                event = self._events.get(key)
+                if event is None:
+                    event = self._events[key] = threading.Event()
+                    self.misses += 1
+                    break
+            event.wait()  # calcul en cours dans un autre thread
+
+        try:
+            value = compute()
+            with self._lock:
+                self._values[key] = value
+            return value
+        finally:
+            with self._lock:
+                self._events.pop(key, None)
+            event.set()
+
+    async def aget_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            with self._lock:
+                if key in self._values:
+                    self.hits += 1
+                    return self._values[key]
+                future = self._futures.get(key)
+                if future is None:
+                    future = self._futures[key] = asyncio.get_running_loop().create_future()
+                    self.misses += 1
+                    break
+                self.hits += 1
+            value = await asyncio.shield(future)
+            if value is not _ABANDONED:
+                return value
+            # Le calcul attendu a été annulé (ex: préparation spéculative abandonnée) :
+            # l'annulation ne concerne que sa tâche, un des appelants en attente recalcule.
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            with self._lock:
+                self._futures.pop(key, None)
+            if isinstance(e, asyncio.CancelledError):
+                future.set_result(_ABANDONED)
+            else:
+                future.set_exception(e)
+                future.exception()  # évite « exception never retrieved » sans attente
+            raise
+        with self._lock:
+            self._values[key] = value
+            self._futures.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._values), "hits": self.hits, "misses": self.misses}
+
+
+def _current_memo() -> Optional[RequestMemo]:
+    from app.core.context import get_current_context  # import différé : context importe ce module
+    context = get_current_context()
+    return context.memo if context is not None else None
+
+
+def _key(tool: str, args: Tuple, kwargs: Dict[str, Any]) -> Hashable:
+    return (tool, args, tuple(sorted(kwargs.items())))
+
+
+def memoized(tool: str):
+    """
+    Décorateur d'outil : dans une requête, le résultat pour des arguments
+    donnés est calculé une seule fois ; hors requête, appel direct.
+    """
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                memo = _current_memo()
+                if memo is None:
+                    return await fn(*args, **kwargs)
+                return await memo.aget_or_compute(_key(tool, args, kwargs), lambda: fn(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            memo = _current_memo()
+            if memo is None:
+                return fn(*args, **kwargs)
+            return memo.get_or_compute(_key(tool, args, kwargs), lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorator
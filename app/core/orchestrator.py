@@ -1,18 +1,116 @@
 import asyncio
-from typing import List, Dict, Any
+import contextvars
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from pydantic import ValidationError
 from app.agents.base_agent import BaseAgent
-from app.services.llm_service import LLMService
+from app.models.extraction import ExtractionSchema, RoutingExtraction
+from app.services.llm_service import LLMService, is_error_response
+from app.services.semantic_cache import semantic_cache
+from app.core.local_router import RouteDecision, local_router
+from app.core.speculation import speculator
+from app.core.synthesizer import template_synthesizer
+from app.services.llm_governor import llm_governor
+from app.core.context import RequestContext, get_current_context, reset_current_context, set_current_context
+from config import Config
+
+
+@dataclass
+class QueryResult:
+    """Réponse complète d'une requête : réponses d'agents, réponse finale et parties dégradées."""
+    responses: Dict[str, str]
+    final_response: str
+    # Agents servis en repli (échec ou échéance) et "synthesis" si la synthèse LLM a été sautée
+    degraded: List[str] = field(default_factory=list)
+
 
 class AgentOrchestrator:
     def __init__(self, agents: List[BaseAgent]):
         self.agents = {agent.name: agent for agent in agents}
         self.llm_service = LLMService()
-        self.context = {}
 
-    def update_context(self, key: str, value: Any):
-        self.context[key] = value
+    async def route_query(self, query: str, context: Optional[RequestContext] = None) -> List[str]:
+        agent_names, _ = await self.route_and_extract(query, context=context)
+        return agent_names
+
+    async def route_and_extract(self, query: str, local: Optional[RouteDecision] = None,
+                                context: Optional[RequestContext] = None
+                                ) -> Tuple[List[str], Dict[str, ExtractionSchema]]:
+        """
+        Routage : d'abord le routeur local (mots-clés + classifieur, sans appel
+        réseau) ; le LLM n'est interrogé que si sa confiance est insuffisante.
+        En mode fusionné (ROUTER_FUSED), cet appel LLM retourne aussi
+        l'intention et les entités de chaque agent choisi, qui sautent alors
+        leur propre appel d'extraction.
+        """
+        if local is None and Config.ROUTER_LOCAL_ENABLED:
+            local = local_router.route(query, list(self.agents))
+        if local is not None and local_router.is_confident(local):
+            local_router.record_local(local)
+            return local.agents, {}
+
+        if Config.ROUTER_FUSED:
+            valid_agents, extracted = await self._fused_route(query, context or RequestContext())
+        else:
+            valid_agents, extracted = await self._llm_route(query), {}
+        if local is not None:
+            await local_router.record_llm(query, valid_agents, local)
+        if not valid_agents:
+            return [list(self.agents.keys())[0]], {}  # Fallback premier agent
+        return valid_agents, extracted
+
+    async def _fused_route(self, query: str, context: RequestContext
+                           ) -> Tuple[List[str], Dict[str, ExtractionSchema]]:
+        """Routage + extraction de tous les agents choisis en un seul appel structuré."""
+        specs = []
+        for name, agent in self.agents.items():
+            spec = f"- {name}: {agent.description}"
+            if agent.extraction_schema is not None:
+                spec += f"\n  {agent.extraction_schema.prompt_spec()}"
+            specs.append(spec)
+        agent_specs = "\n".join(specs)
+        region = context.get('region', Config.DEFAULT_REGION)
+
+        prompt = f"""ROUTAGE + EXTRACTION pour agents experts.
+
+Question: "{query}"
+Région: {region}
+
+Agents disponibles (intents et champs à extraire):
+{agent_specs}
+
+RÈGLES:
+1. Sélectionner 1-2 agents MAX (combinaison si nécessaire), le plus spécialisé d'abord
+2. Pour chaque agent: son intent et ses champs, extraits de la question
+3. Exemples:
+   - "Météo demain?" → WeatherAgent (FORECAST)
+   - "Engrais pour cacao?" → FertilizerAgent (NPK_CALC, culture: cacao)
+   - "Quand planter maïs et quelle météo?" → CropAgent (CALENDAR), WeatherAgent (PLANTING)
+
+Retourne UNIQUEMENT ce JSON (sans markdown, sans explication):
+{{"agents": [{{"name": "<NomAgent>", "intent": "<INTENT>", "<champ>": "<valeur>"}}]}}"""
+
+        routing = await self.llm_service.generate_json(prompt, RoutingExtraction, kind="extract")
+        names: List[str] = []
+        extracted: Dict[str, ExtractionSchema] = {}
+        for entry in routing.agents:
+            name = entry["name"]
+            if name not in self.agents or name in names:
+                continue
+            names.append(name)
+            schema = self.agents[name].extraction_schema
+            # Sans intent, l'agent refait sa propre extraction plutôt que de partir en GENERAL
+            if schema is not None and entry.get("intent"):
+                try:
+                    extracted[name] = schema.model_validate(entry)
+                except ValidationError as e:
+                    print(f"WARNING: Entités fusionnées invalides pour {name}: {e.error_count()} erreur(s)")
+            if len(names) == 2:
+                break
+        return names, extracted
 
-    async def route_query(self, query: str) -> List[str]:
+    async def _llm_route(self, query: str) -> List[str]:
         """Routage intelligent avec prompt optimisé."""
         agent_descriptions = "\n".join([f"- {name}: {a.description}" for name, a in self.agents.items()])
         
@@ -34,52 +132,305 @@ RÈGLES:
 
 Réponds UNIQUEMENT noms agents séparés virgules (ex: WeatherAgent, CropAgent)."""
         
-        response = await self.llm_service.generate_response(prompt)
+        response = await self.llm_service.generate_response(prompt, kind="route")
         selected_agents = [s.strip() for s in response.split(',')]
         
         # Validation
         valid_agents = [name for name in selected_agents if name in self.agents]
         
         # Limite à 2 agents max pour concision
-        if len(valid_agents) > 2:
-            valid_agents = valid_agents[:2]
-        
-        return valid_agents if valid_agents else [list(self.agents.keys())[0]]  # Fallback premier agent
+        return valid_agents[:2]
+
+    def _speculate(self, query: str, context: RequestContext,
+                   local: Optional[RouteDecision]) -> Dict[str, asyncio.Task]:
+        """
+        Si le routage doit passer par le LLM, prépare dès maintenant les agents
+        les plus probables selon l'a priori local. En mode fusionné l'extraction
+        viendra du routage : seule la partie sans LLM (préchargement) est lancée.
+        """
+        if not Config.SPECULATION_ENABLED or (local is not None and local_router.is_confident(local)):
+            return {}
+        prior = local_router.prior(query, list(self.agents), speculator.top_k)
+        return speculator.start(self.agents, query, context, prior,
+                                with_extraction=not Config.ROUTER_FUSED)
+
+    async def _run_agent(self, name: str, query: str, context: RequestContext,
+                         extracted: Optional[ExtractionSchema],
+                         speculative: Optional[asyncio.Task]) -> str:
+        prepared = await speculator.claim(speculative)
+        if extracted is None:
+            extracted = prepared
+        return await self.agents[name].process(query, context, extracted)
+
+    async def _answer(self, name: str, query: str, context: RequestContext,
+                      extracted: Optional[ExtractionSchema],
+                      speculative: Optional[asyncio.Task]) -> Tuple[str, bool]:
+        """
+        Réponse d'un agent et indicateur de dégradation. En cas d'échec de
+        l'agent (exception ou erreur LLM, délai compris), la réponse de repli
+        est servie ; une vraie réponse est mise en cache sémantique.
+        """
+        try:
+            result = await self._run_agent(name, query, context, extracted, speculative)
+        except Exception as e:
+            print(f"WARNING: Agent {name} a échoué: {e}")
+            return self._fallback(name, query, context, extracted), True
+        if is_error_response(result):
+            return self._fallback(name, query, context, extracted), True
+        if Config.SEMANTIC_CACHE_ENABLED:
+            semantic_cache.store(query, context.get('region', Config.DEFAULT_REGION), name, result,
+                                 soil_type=context.get('soil_type'))
+        return result, False
 
-    async def handle_query(self, query: str) -> Dict[str, str]:
-        # 1. Routage
-        target_agent_names = await self.route_query(query)
+    def _fallback(self, name: str, query: str, context: RequestContext,
+                  extracted: Optional[ExtractionSchema]) -> str:
+        """Meilleure réponse sans LLM : réponse voisine en cache sémantique, sinon règles locales de l'agent."""
+        if Config.SEMANTIC_CACHE_ENABLED:
+            cached = semantic_cache.lookup(query, context.get('region', Config.DEFAULT_REGION), name,
+                                           threshold=Config.DEADLINE_FALLBACK_THRESHOLD,
+                                           soil_type=context.get('soil_type'))
+            if cached is not None:
+                return cached
+        return self.agents[name].fallback(query, context, extracted)
+
+    async def _plan(self, query: str, context: RequestContext
+                    ) -> Tuple[List[str], Dict[str, str], Dict[str, Any], Dict[str, ExtractionSchema]]:
+        """
+        Routage (+ extraction des entités en mode fusionné), avec préparation
+        spéculative des agents probables pendant l'appel LLM de routage, puis
+        cache sémantique. Retourne les agents choisis, les réponses déjà en
+        cache, les coroutines des agents restant à exécuter et les extractions.
+        """
+        local = local_router.route(query, list(self.agents)) if Config.ROUTER_LOCAL_ENABLED else None
+        speculative = self._speculate(query, context, local)
+        try:
+            target_agent_names, extracted = await self.route_and_extract(query, local, context)
+        except BaseException:
+            speculator.discard(speculative, keep=set())
+            raise
         print(f"DEBUG Orchestrator: Agents={target_agent_names}")
-        
-        # 2. Appel agents en PARALLÈLE via asyncio.gather
-        tasks = [self.agents[name].process(query, self.context) for name in target_agent_names]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        responses = {}
-        for name, result in zip(target_agent_names, results):
-            if isinstance(result, Exception):
-                print(f"WARNING: Agent {name} a échoué: {result}")
-                responses[name] = f"⚠️ Agent {name} indisponible."
+
+        # Cache sémantique (questions reformulées) par région, sol déclaré et agent
+        region = context.get('region', Config.DEFAULT_REGION)
+        soil_type = context.get('soil_type')
+        cached_responses = {}
+        pending = []
+        for name in target_agent_names:
+            cached = (semantic_cache.lookup(query, region, name, soil_type=soil_type)
+                      if Config.SEMANTIC_CACHE_ENABLED else None)
+            if cached is not None:
+                cached_responses[name] = cached
             else:
-                responses[name] = result
-            
-        return responses
-    
-    async def synthesize_response(self, query: str, agent_responses: Dict[str, str]) -> str:
-        """Synthèse optimisée pour CONCISION MAXIMALE."""
-        if not agent_responses:
-            return "❌ Aucune réponse disponible. Reformulez votre question."
-        
-        # Agent unique: retour direct sans appel LLM supplémentaire
-        if len(agent_responses) == 1:
-            return list(agent_responses.values())[0]
-        
-        # Multi-agents: synthèse intelligente
+                pending.append(name)
+        speculator.discard(speculative, keep=set(pending))
+
+        jobs = {name: self._answer(name, query, context, extracted.get(name), speculative.get(name))
+                for name in pending}
+        return target_agent_names, cached_responses, jobs, extracted
+
+    @staticmethod
+    def _agent_timeout(context: RequestContext, agent_count: int) -> Optional[float]:
+        """Temps laissé aux agents : jusqu'à l'échéance, moins une réserve de synthèse si plusieurs agents."""
+        remaining = context.remaining()
+        if remaining is None:
+            return None
+        if agent_count > 1 and remaining > 2 * Config.SYNTHESIS_MIN_TIME:
+            remaining -= Config.SYNTHESIS_MIN_TIME
+        return max(0.0, remaining)
+
+    async def _iter_answers(self, query: str, context: RequestContext, jobs: Dict[str, Any],
+                            extracted: Dict[str, ExtractionSchema], timeout: Optional[float]
+                            ) -> AsyncIterator[Tuple[str, str, bool]]:
+        """
+        Exécute les agents en parallèle et émet (nom, réponse, dégradée) dans
+        l'ordre d'arrivée. À l'échéance, les agents non terminés sont annulés
+        et remplacés par leur réponse de repli.
+        """
+        tasks = {asyncio.create_task(job): name for name, job in jobs.items()}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = set(tasks)
+        try:
+            while pending:
+                wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # échéance atteinte
+                for task in done:
+                    response, degraded = task.result()
+                    yield tasks[task], response, degraded
+            for task in pending:
+                task.cancel()
+                name = tasks[task]
+                print(f"WARNING: Agent {name} annulé (échéance de la requête atteinte)")
+                yield name, self._fallback(name, query, context, extracted.get(name)), True
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _respond(self, query: str, context: RequestContext) -> Tuple[Dict[str, str], List[str]]:
+        """Réponses des agents dans l'ordre de routage, et noms des agents servis en repli."""
+        target_agent_names, responses, jobs, extracted = await self._plan(query, context)
+        degraded = []
+        timeout = self._agent_timeout(context, len(target_agent_names))
+        async for name, response, is_degraded in self._iter_answers(query, context, jobs, extracted, timeout):
+            responses[name] = response
+            if is_degraded:
+                degraded.append(name)
+        return {name: responses[name] for name in target_agent_names}, degraded
+
+    async def handle_query(self, query: str, context: Optional[RequestContext] = None) -> Dict[str, str]:
+        """
+        Traite une requête dans son propre contexte (région, sol, échéance...).
+        L'orchestrateur ne garde aucun état par requête : une même instance
+        sert des requêtes concurrentes de régions différentes sans mélange.
+        """
+        context = context or RequestContext()
+        token = set_current_context(context)
+        try:
+            responses, _ = await self._respond(query, context)
+            return responses
+        finally:
+            reset_current_context(token)
+
+    async def answer(self, query: str, context: Optional[RequestContext] = None) -> QueryResult:
+        """
+        handle_query + synthèse sous l'échéance du contexte : agents en retard
+        remplacés par leur repli, synthèse locale si le temps manque ou si la
+        synthèse LLM échoue. Les parties dégradées sont listées dans le résultat.
+        """
+        context = context or RequestContext()
+        token = set_current_context(context)
+        try:
+            responses, degraded = await self._respond(query, context)
+            final_response = await self._final_response(query, responses, context)
+            if final_response is None:
+                final_response = template_synthesizer.synthesize(query, responses)
+                degraded.append("synthesis")
+            return QueryResult(responses, final_response, degraded)
+        finally:
+            reset_current_context(token)
+
+    async def stream_query(self, query: str, context: Optional[RequestContext] = None
+                           ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Version progressive de answer() : émet des événements au fil du traitement.
+
+        - {"event": "routing", "data": {"agents": [...]}}
+        - {"event": "agent", "data": {"name": ..., "response": ..., "degraded": ...}} dès qu'un agent termine
+        - {"event": "synthesis", "data": {"delta": ...}} fragments de la synthèse (multi-agents)
+        - {"event": "done", "data": {"agents": [...], "final_response": ..., "degraded": [...]}}
+          (final_response fait foi : si la synthèse LLM échoue en cours de flux,
+          c'est la synthèse locale, et "synthesis" figure dans degraded)
+
+        Le travail tourne dans une tâche unique (contexte de requête posé une
+        fois) ; fermer le générateur annule le traitement en cours.
+        """
+        context = context or RequestContext()
+        events: asyncio.Queue = asyncio.Queue()
+        run_context = contextvars.copy_context()
+        run_context.run(set_current_context, context)
+        producer = asyncio.create_task(self._produce_events(query, context, events.put_nowait),
+                                       context=run_context)
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            await producer  # propage une éventuelle exception
+        finally:
+            producer.cancel()
+
+    async def _produce_events(self, query: str, context: RequestContext,
+                              emit: Callable[[Optional[Dict[str, Any]]], None]) -> None:
+        try:
+            target_agent_names, responses, jobs, extracted = await self._plan(query, context)
+            emit({"event": "routing", "data": {"agents": target_agent_names}})
+            for name, response in responses.items():
+                emit({"event": "agent", "data": {"name": name, "response": response,
+                                                 "cached": True, "degraded": False}})
+
+            # Chaque agent est émis dès qu'il termine, sans attendre les autres
+            degraded = []
+            timeout = self._agent_timeout(context, len(target_agent_names))
+            async for name, response, is_degraded in self._iter_answers(query, context, jobs, extracted, timeout):
+                responses[name] = response
+                if is_degraded:
+                    degraded.append(name)
+                emit({"event": "agent", "data": {"name": name, "response": response,
+                                                 "cached": False, "degraded": is_degraded}})
+
+            ordered = {name: responses[name] for name in target_agent_names}
+            final_response = None
+            mode = self._synthesis_mode(context)
+            if self._can_synthesize(context, ordered, mode):
+                parts = []
+                stream = self.synthesize_stream(query, ordered, context, mode=mode)
+                try:
+                    async for delta in stream:
+                        if delta and is_error_response(delta):
+                            parts = None  # erreur LLM (émise en dernier fragment) : synthèse locale
+                            break
+                        parts.append(delta)
+                        if len(ordered) > 1:
+                            emit({"event": "synthesis", "data": {"delta": delta}})
+                except Exception as e:
+                    print(f"WARNING: Synthèse échouée: {e}")
+                    parts = None
+                finally:
+                    await stream.aclose()
+                if parts is not None and not is_error_response("".join(parts)):
+                    final_response = "".join(parts)
+            if final_response is None:
+                final_response = template_synthesizer.synthesize(query, ordered)
+                degraded.append("synthesis")
+            emit({"event": "done", "data": {"agents": target_agent_names, "final_response": final_response,
+                                            "degraded": degraded}})
+        finally:
+            emit(None)
+
+    async def _final_response(self, query: str, responses: Dict[str, str],
+                              context: RequestContext) -> Optional[str]:
+        """
+        Synthèse finale, le mode étant décidé une seule fois pour la requête.
+        None si la synthèse LLM est impossible (temps insuffisant) ou échoue
+        (erreur, délai) : l'appelant sert alors la synthèse locale.
+        """
+        mode = self._synthesis_mode(context)
+        if not self._can_synthesize(context, responses, mode):
+            return None
+        try:
+            final_response = await self.synthesize_response(query, responses, context, mode=mode)
+        except Exception as e:
+            print(f"WARNING: Synthèse échouée: {e}")
+            return None
+        return None if is_error_response(final_response) else final_response
+
+    def _can_synthesize(self, context: RequestContext, agent_responses: Dict[str, str], mode: str) -> bool:
+        """Faux si une synthèse LLM serait nécessaire mais qu'il ne reste pas assez de temps."""
+        if len(agent_responses) <= 1 or mode == "template":
+            return True  # pas d'appel LLM
+        remaining = context.remaining()
+        return remaining is None or remaining >= Config.SYNTHESIS_MIN_TIME
+
+    @staticmethod
+    def _synthesis_mode(context: Optional[RequestContext]) -> str:
+        """
+        Mode de synthèse effectif : celui de la requête, sinon SYNTHESIS_MODE.
+        En 'auto', la synthèse locale est choisie quand le limiteur LLM a déjà
+        des appels en file : on n'y ajoute pas un aller-retour de plus.
+        """
+        mode = (context.get('synthesis') if context is not None else None) or Config.SYNTHESIS_MODE
+        if mode == "auto":
+            return "template" if llm_governor.queue_depth() >= Config.SYNTHESIS_AUTO_QUEUE else "llm"
+        return mode if mode in ("llm", "template") else "llm"
+
+    def _synthesis_prompt(self, query: str, agent_responses: Dict[str, str]) -> str:
         combined_text = ""
         for name, resp in agent_responses.items():
             combined_text += f"\n## {name}\n{resp}\n"
 
-        prompt = f"""SYNTHÈSE EXTRÊMEMENT CONCISE.
+        return f"""SYNTHÈSE EXTRÊMEMENT CONCISE.
 
 Question: "{query}"
 
@@ -94,5 +445,35 @@ IMPÉRATIF:
 ❌ AUCUNE phrase de conclusion.
 ❌ PAS de redondances.
 Va droit au but."""
+
+    async def synthesize_response(self, query: str, agent_responses: Dict[str, str],
+                                  context: Optional[RequestContext] = None, mode: Optional[str] = None) -> str:
+        """
+        Synthèse optimisée pour CONCISION MAXIMALE : par le LLM, ou localement
+        (sans appel) selon le mode de synthèse de la requête.
+        """
+        if not agent_responses:
+            return "❌ Aucune réponse disponible. Reformulez votre question."
         
-        return await self.llm_service.generate_response(prompt)
+        # Agent unique: retour direct sans appel LLM supplémentaire
+        if len(agent_responses) == 1:
+            return list(agent_responses.values())[0]
+        
+        if (mode or self._synthesis_mode(context or get_current_context())) == "template":
+            return template_synthesizer.synthesize(query, agent_responses)
+
+        # Multi-agents: synthèse intelligente
+        prompt = self._synthesis_prompt(query, agent_responses)
+        return await self.llm_service.generate_response(prompt, kind="synthesize")
+
+    async def synthesize_stream(self, query: str, agent_responses: Dict[str, str],
+                                context: Optional[RequestContext] = None,
+                                mode: Optional[str] = None) -> AsyncIterator[str]:
+        """Comme synthesize_response, mais la synthèse LLM multi-agents arrive par fragments."""
+        mode = mode or self._synthesis_mode(context or get_current_context())
+        if len(agent_responses) <= 1 or mode == "template":
+            yield await self.synthesize_response(query, agent_responses, context, mode=mode)
+            return
+        prompt = self._synthesis_prompt(query, agent_responses)
+        async for delta in self.llm_service.generate_stream(prompt, kind="synthesize"):
+            yield delta
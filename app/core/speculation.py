@@ -0,0 +1,107 @@
+"""Pré-exécution spéculative des agents pendant le routage LLM."""
+
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from app.services.llm_governor import llm_governor
+from app.core.context import RequestContext
+
+
+class Speculator:
+    """
+    Lance la moitié avant, sans effet de bord, des agents probables
+    (`agent.prepare` : extraction d'intention, préchargement météo) pendant
+    que le routage LLM est en vol.
+
+    Budget : au plus `top_k` agents par requête, uniquement ceux dont la
+    probabilité a priori dépasse `min_prior`, au plus `max_in_flight`
+    préparations spéculatives dans le processus, et aucune quand le limiteur
+    LLM a déjà des appels en file (la spéculation ne doit pas retarder le
+    trafic confirmé).
+    """
+
+    def __init__(self, top_k: int = 2, min_prior: float = 0.2, max_in_flight: int = 4):
+        self.top_k = top_k
+        self.min_prior = min_prior
+        self.max_in_flight = max_in_flight
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.started = 0
+        self.useful = 0
+        self.wasted = 0
+        self.failed = 0
+        self.skipped_budget = 0
+
+    def start(self, agents: Dict[str, Any], query: str, context: RequestContext,
+              prior: List[Tuple[str, float]], with_extraction: bool = True) -> Dict[str, asyncio.Task]:
+        """Démarre les préparations spéculatives ; retourne les tâches par nom d'agent."""
+        tasks: Dict[str, asyncio.Task] = {}
+        for name, score in prior[:self.top_k]:
+            if name not in agents or score < self.min_prior:
+                continue
+            if not with_extraction and not agents[name].has_prefetch:
+                continue  # rien à préparer pour cet agent
+            with self._lock:
+                if self._in_flight >= self.max_in_flight or llm_governor.queue_depth() > 0:
+                    self.skipped_budget += 1
+                    continue
+                self._in_flight += 1
+                self.started += 1
+            task = asyncio.create_task(agents[name].prepare(query, context, with_extraction))
+            task.add_done_callback(self._on_done)
+            tasks[name] = task
+        return tasks
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if not task.cancelled() and task.exception() is not None:
+                self.failed += 1
+
+    def discard(self, tasks: Dict[str, asyncio.Task], keep: set) -> None:
+        """Annule les préparations des agents non confirmés par le routage."""
+        for name in list(tasks):
+            if name in keep:
+                continue
+            task = tasks.pop(name)
+            task.cancel()
+            with self._lock:
+                self.wasted += 1
+
+    async def claim(self, task: Optional[asyncio.Task]) -> Optional[Any]:
+        """Résultat d'une préparation confirmée (None si absente ou en échec)."""
+        if task is None:
+            return None
+        try:
+            result = await task
+        except Exception as e:
+            print(f"WARNING: Préparation spéculative échouée: {e}")
+            return None
+        with self._lock:
+            self.useful += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            settled = self.useful + self.wasted
+            return {
+                "started": self.started,
+                "in_flight": self._in_flight,
+                "useful": self.useful,
+                "wasted": self.wasted,
+                "failed": self.failed,
+                "skipped_budget": self.skipped_budget,
+                "useful_rate": round(self.useful / settled, 4) if settled else 0.0,
+                "top_k": self.top_k,
+            }
+
+
+# Instance globale
+speculator = Speculator(
+    top_k=Config.SPECULATION_TOP_K,
+    min_prior=Config.SPECULATION_MIN_PRIOR,
+    max_in_flight=Config.SPECULATION_MAX_IN_FLIGHT,
+)
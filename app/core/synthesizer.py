@@ -0,0 +1,129 @@
+"""Synthèse déterministe des réponses multi-agents, sans appel LLM."""
+
+import re
+from typing import Dict, List, Set, Tuple
+
+from config import Config
+from app.utils.text import normalize_query
+
+# Titre de section par agent (les agents inconnus gardent leur nom)
+AGENT_TITLES = {
+    "WeatherAgent": "🌦️ Météo",
+    "CropAgent": "🌱 Cultures",
+    "HealthAgent": "🩺 Santé des plantes",
+    "EconomicAgent": "💰 Marché",
+    "ResourcesAgent": "🧰 Ressources",
+    "FertilizerAgent": "🧪 Fertilisation",
+}
+
+# Formules d'introduction / de conclusion sans information
+_FILLER = re.compile(
+    r"^(voici|en réponse|en résumé|pour répondre|n'hésitez|n hesitez|j'espère|bonne chance|"
+    r"cordialement|je reste|si vous avez)",
+    re.IGNORECASE,
+)
+_MARKUP = re.compile(r"^(#+\s*|[-*•]\s+|\d+[.)]\s+)")
+_NUMBER = re.compile(r"\d")
+
+
+def _is_icon(char: str) -> bool:
+    """Vrai pour un pictogramme (emoji, symbole) en tête de ligne."""
+    return not char.isalnum() and not char.isspace() and char not in "-*#•([\"'«"
+
+
+class TemplateSynthesizer:
+    """
+    Fusionne des réponses d'agents déjà concises en une réponse structurée de
+    `max_words` mots au plus (hors titres de section), de façon déterministe :
+
+    - lignes d'introduction ou de conclusion retirées ;
+    - doublons retirés, y compris entre agents (mêmes mots après normalisation) ;
+    - priorité aux lignes chiffrées et aux puces à icône ;
+    - budget de mots réparti à tour de rôle entre les agents, ordre d'origine
+      conservé dans chaque section.
+    """
+
+    def __init__(self, max_words: int = 150, overlap: float = 0.8):
+        self.max_words = max_words
+        self.overlap = overlap
+
+    @staticmethod
+    def _clean(line: str) -> str:
+        line = line.strip().replace("**", "").replace("__", "")
+        return _MARKUP.sub("", line).strip()
+
+    @staticmethod
+    def _score(line: str) -> int:
+        score = 0
+        if _NUMBER.search(line):
+            score += 2
+        if _is_icon(line[0]):
+            score += 2
+        if line.endswith(":"):
+            score -= 2  # titre sans contenu
+        return score
+
+    def _candidates(self, text: str, seen: List[Set[str]]) -> List[Tuple[int, int, str]]:
+        """(score, position, ligne) des lignes utiles d'une réponse, sans doublons."""
+        candidates = []
+        for position, raw in enumerate(text.splitlines()):
+            line = self._clean(raw)
+            if len(line) < 3 or _FILLER.match(line):
+                continue
+            if raw.lstrip().startswith("#") and not _NUMBER.search(line):
+                continue  # titre markdown : remplacé par le titre de section de l'agent
+            tokens = set(normalize_query(line).split())
+            if not tokens or any(
+                len(tokens & other) >= self.overlap * min(len(tokens), len(other)) for other in seen
+            ):
+                continue
+            seen.append(tokens)
+            candidates.append((self._score(line), position, line))
+        return candidates
+
+    def synthesize(self, query: str, agent_responses: Dict[str, str]) -> str:
+        if not agent_responses:
+            return "❌ Aucune réponse disponible. Reformulez votre question."
+
+        seen: List[Set[str]] = []
+        ranked = {
+            name: sorted(self._candidates(text, seen), key=lambda c: (-c[0], c[1]))
+            for name, text in agent_responses.items()
+        }
+
+        # Tour de rôle entre agents, meilleures lignes d'abord, dans la limite du budget
+        chosen: Dict[str, List[Tuple[int, str]]] = {name: [] for name in ranked}
+        budget = self.max_words
+        cursors = {name: 0 for name in ranked}
+        progress = True
+        while budget > 0 and progress:
+            progress = False
+            for name, lines in ranked.items():
+                while budget > 0 and cursors[name] < len(lines):
+                    _, position, line = lines[cursors[name]]
+                    cursors[name] += 1
+                    words = line.split()
+                    if len(words) > budget:
+                        if chosen[name]:
+                            continue  # ligne trop longue : on tente la suivante
+                        words = words[:budget]  # au moins un extrait par agent
+                        line = " ".join(words) + "…"
+                    chosen[name].append((position, line))
+                    budget -= len(words)
+                    progress = True
+                    break
+
+        sections = []
+        for name, lines in chosen.items():
+            if not lines:
+                continue
+            title = AGENT_TITLES.get(name, name)
+            body = "\n".join(
+                line if _is_icon(line[0]) else f"• {line}" for _, line in sorted(lines)
+            )
+            sections.append(f"**{title}**\n{body}")
+        return "\n\n".join(sections) or "❌ Aucune réponse disponible. Reformulez votre question."
+
+
+# Instance globale
+template_synthesizer = TemplateSynthesizer(max_words=Config.SYNTHESIS_MAX_WORDS)
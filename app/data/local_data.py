@@ -87,8 +87,8 @@ CAMEROON_REGIONS = [
 def get_all_regions():
     return CAMEROON_REGIONS
 
+# Index par nom (insensible à la casse) : recherche directe, appelée par chaque agent
+_REGIONS_BY_NAME = {region.name.lower(): region for region in CAMEROON_REGIONS}
+
 def get_region_by_name(name: str):
-    for region in CAMEROON_REGIONS:
-        if region.name.lower() == name.lower():
-            return region
-    return None
+    return _REGIONS_BY_NAME.get(name.lower())
@@ -0,0 +1,92 @@
+import re
+from typing import Any, ClassVar, Dict, List, Tuple
+
+from pydantic import BaseModel, ConfigDict, ValidationInfo, field_validator
+
+NOT_SPECIFIED = "Non spécifié"
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def first_number(value: Any, default: float) -> float:
+    """Premier nombre d'une valeur libre (ex: "2,5 ha" → 2.5), sinon `default`."""
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value or "").replace(",", "."))
+    return float(match.group()) if match else default
+
+
+class ExtractionSchema(BaseModel):
+    """
+    Base des schémas d'extraction (intention + entités) des agents.
+
+    Validation tolérante : intention normalisée en majuscules et ramenée à
+    GENERAL si inconnue, champs vides ou null remplacés par leur valeur par
+    défaut, clés inattendues ignorées. Un schéma sans aucune donnée reste
+    valide, ce qui garantit un repli sans nouvel appel LLM.
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    INTENTS: ClassVar[Tuple[str, ...]] = ("GENERAL",)
+
+    intent: str = "GENERAL"
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _blank_to_default(cls, value: Any, info: ValidationInfo) -> Any:
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return cls.model_fields[info.field_name].default
+        if cls.model_fields[info.field_name].annotation is str and not isinstance(value, str):
+            value = str(value)
+        return value.strip() if isinstance(value, str) else value
+
+    @field_validator("intent", mode="before")
+    @classmethod
+    def _normalize_intent(cls, value: Any) -> str:
+        intent = str(value or "").strip().upper()
+        return intent if intent in cls.INTENTS else "GENERAL"
+
+    @classmethod
+    def prompt_spec(cls) -> str:
+        """Intentions et champs attendus, pour décrire le schéma dans un prompt."""
+        fields = [
+            f"{name} ({field.description})" if field.description else name
+            for name, field in cls.model_fields.items() if name != "intent"
+        ]
+        spec = f"intents: {'|'.join(cls.INTENTS)}"
+        return f"{spec} ; champs: {', '.join(fields)}" if fields else spec
+
+
+class RoutingExtraction(BaseModel):
+    """
+    Sortie du routage fusionné : agents choisis, chacun avec son intention
+    et ses entités (validées ensuite par le schéma de l'agent).
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    agents: List[Dict[str, Any]] = []
+
+    @field_validator("agents", mode="before")
+    @classmethod
+    def _normalize_agents(cls, value: Any) -> List[Dict[str, Any]]:
+        # Formes tolérées : ["CropAgent"], {"CropAgent": {...}}, {"name": ...} ou [{"agent": ...}]
+        if isinstance(value, dict):
+            value = [value] if ("name" in value or "agent" in value) else [
+                {"name": name, **(entities if isinstance(entities, dict) else {})}
+                for name, entities in value.items()
+            ]
+        if not isinstance(value, list):
+            return []
+        entries = []
+        for item in value:
+            if isinstance(item, str):
+                item = {"name": item}
+            if isinstance(item, dict):
+                name = item.get("name") or item.get("agent")
+                if name:
+                    entries.append({**item, "name": str(name).strip()})
+        return entries
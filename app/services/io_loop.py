@@ -0,0 +1,80 @@
+"""Boucle asyncio d'E/S partagée par tout le processus."""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Optional
+
+
+class IOLoop:
+    """
+    Boucle asyncio longue durée, dans un thread démon démarré au premier besoin.
+
+    Flask exécute chaque vue asynchrone dans une nouvelle boucle : un
+    httpx.AsyncClient lié à la boucle de la requête ne resservirait jamais.
+    Les clients HTTP partagés (fournisseurs LLM, Open-Meteo) vivent donc sur
+    cette boucle : leurs connexions keep-alive, ouvertes une fois (et
+    préchauffées au démarrage), servent toutes les requêtes. Les appelants
+    attendent le résultat depuis leur propre boucle ; l'annulation est
+    propagée à l'appel en cours.
+    """
+
+    def __init__(self, name: str = "io-loop"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                threading.Thread(target=run, name=self.name, daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro: Awaitable[Any]):
+        """Lance `coro` sur la boucle partagée sans l'attendre (concurrent.futures.Future)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run(self, coro: Awaitable[Any]) -> Any:
+        """Exécute `coro` sur la boucle partagée et attend son résultat depuis la boucle courante."""
+        loop = self.loop
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    async def iterate(self, chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """Parcourt un générateur asynchrone exécuté sur la boucle partagée (flux LLM)."""
+        if asyncio.get_running_loop() is self.loop:
+            async for chunk in chunks:
+                yield chunk
+            return
+        try:
+            while True:
+                try:
+                    chunk = await self.run(chunks.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            try:
+                await asyncio.shield(self.run(chunks.aclose()))
+            except RuntimeError:
+                pass  # générateur encore en cours d'annulation : il se termine de lui-même
+
+
+# Instance globale
+io_loop = IOLoop()
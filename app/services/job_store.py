@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+
+class JobStore:
+    """
+    Stockage persistant des tâches asynchrones sur SQLite en mode WAL.
+
+    Partagé entre les workers gunicorn d'une même machine : une tâche soumise
+    à un worker peut être exécutée par un autre (réservation atomique) et
+    consultée depuis n'importe lequel. Chaque tâche expire `ttl` secondes
+    après sa création ; les tâches expirées sont invisibles puis purgées.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            idempotency_key TEXT UNIQUE,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            deadline_at REAL,
+            finished_at REAL,
+            expires_at REAL NOT NULL
+        )
+    """
+
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+    def __init__(self, path: str, ttl: float = 3600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(self._SCHEMA)
+        # Bases créées avant l'échéance par tâche
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "deadline_at" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN deadline_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Une connexion par thread (threads gunicorn + thread des workers de tâches)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def create(self, kind: str, payload: Dict[str, Any],
+               idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Enregistre une tâche en file. Retourne (tâche, créée) : avec une clé
+        d'idempotence déjà utilisée par une tâche non expirée, la tâche
+        existante est retournée et rien n'est créé.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if idempotency_key:
+                # Une clé expirée peut être réutilisée
+                conn.execute("DELETE FROM jobs WHERE idempotency_key = ? AND expires_at <= ?",
+                             (idempotency_key, now))
+                row = conn.execute("SELECT * FROM jobs WHERE idempotency_key = ?",
+                                   (idempotency_key,)).fetchone()
+                if row is not None:
+                    conn.execute("COMMIT")
+                    return self._to_dict(row), False
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, idempotency_key, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), self.QUEUED,
+                 idempotency_key or None, now, now + self.ttl),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self._to_dict(row), True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT * FROM jobs WHERE id = ? AND expires_at > ?", (job_id, time.time())
+        ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def claim(self, lease: float) -> Optional[Dict[str, Any]]:
+        """
+        Réserve la plus ancienne tâche en file (atomique entre workers) et la
+        passe en cours. Le worker qui la réserve fixe son échéance : au-delà
+        de `lease` secondes, elle est considérée comme abandonnée (fail_stale).
+        """
+        now = time.time()
+        row = self._conn().execute(
+            "UPDATE jobs SET status = ?, started_at = ?, deadline_at = ? WHERE id = ("
+            "  SELECT id FROM jobs WHERE status = ? AND expires_at > ? ORDER BY created_at LIMIT 1"
+            ") AND status = ? RETURNING *",
+            (self.RUNNING, now, now + lease, self.QUEUED, now, self.QUEUED),
+        ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def complete(self, job_id: str, result: Any) -> bool:
+        """
+        Enregistre le résultat d'une tâche en cours. Faux si elle ne l'est plus
+        (déjà déclarée abandonnée par fail_stale) : le résultat tardif est ignoré.
+        """
+        return self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ? AND status = ?",
+            (self.DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id, self.RUNNING),
+        ).rowcount > 0
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """Passe une tâche en cours en échec ; faux si elle ne l'est plus (erreur déjà enregistrée conservée)."""
+        return self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+            (self.FAILED, error, time.time(), job_id, self.RUNNING),
+        ).rowcount > 0
+
+    def fail_stale(self) -> int:
+        """
+        Tâches « en cours » dont l'échéance fixée à la réservation est passée
+        (worker arrêté) : échec. Chaque worker peut ainsi nettoyer les tâches
+        des autres sans connaître leur JOB_TIMEOUT.
+        """
+        now = time.time()
+        return self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+            "WHERE status = ? AND COALESCE(deadline_at, started_at + ?) <= ?",
+            (self.FAILED, "Tâche interrompue (worker arrêté)", now, self.RUNNING, self.ttl, now),
+        ).rowcount
+
+    def purge_expired(self) -> int:
+        return self._conn().execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE expires_at > ? GROUP BY status", (time.time(),)
+        ).fetchall()
+        counts = {status: 0 for status in (self.QUEUED, self.RUNNING, self.DONE, self.FAILED)}
+        counts.update({status: n for status, n in rows})
+        return counts
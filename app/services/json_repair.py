@@ -0,0 +1,172 @@
+import json
+import re
+from typing import Any
+
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None, "none": None}
+_ESCAPES = {'"': '"', "'": "'", "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JSONRepairError(ValueError):
+    """Aucune valeur JSON exploitable dans la sortie du LLM."""
+
+
+class _TolerantParser:
+    """
+    Analyseur JSON permissif, en une seule passe.
+
+    Accepte ce que les LLM produisent le plus souvent à tort : guillemets
+    simples, clés ou valeurs non quotées, virgules finales ou manquantes,
+    commentaires, guillemets non échappés dans une chaîne, et sortie tronquée
+    (plafond de tokens atteint) : les structures ouvertes sont refermées.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.n = len(text)
+
+    def parse(self) -> Any:
+        return self._value()
+
+    def _skip(self) -> None:
+        while self.pos < self.n:
+            if self.text[self.pos].isspace():
+                self.pos += 1
+            elif self.text.startswith("//", self.pos):
+                end = self.text.find("\n", self.pos)
+                self.pos = self.n if end < 0 else end + 1
+            elif self.text.startswith("/*", self.pos):
+                end = self.text.find("*/", self.pos + 2)
+                self.pos = self.n if end < 0 else end + 2
+            else:
+                break
+
+    def _peek(self) -> str:
+        self._skip()
+        return self.text[self.pos] if self.pos < self.n else ""
+
+    def _value(self) -> Any:
+        c = self._peek()
+        if c == "{":
+            return self._object()
+        if c == "[":
+            return self._array()
+        if c in ('"', "'"):
+            return self._string()
+        return self._bare(",}]\n")
+
+    def _object(self) -> dict:
+        self.pos += 1
+        result = {}
+        while True:
+            c = self._peek()
+            if c == "":
+                return result  # tronqué : on referme
+            if c in "}]":
+                self.pos += 1
+                return result
+            if c == ",":
+                self.pos += 1
+                continue
+            key = self._string() if c in ('"', "'") else self._bare(":,}]\n")
+            if self._peek() in (":", "="):
+                self.pos += 1
+            if self._peek() in ("", ",", "}"):
+                continue  # clé sans valeur (souvent une troncature) : ignorée
+            value = self._value()
+            if key is not None and key != "":
+                result[str(key)] = value
+
+    def _array(self) -> list:
+        self.pos += 1
+        result = []
+        while True:
+            c = self._peek()
+            if c == "":
+                return result
+            if c in "]}":
+                self.pos += 1
+                return result
+            if c == ",":
+                self.pos += 1
+                continue
+            result.append(self._value())
+
+    def _closes_string(self, index: int) -> bool:
+        """Un guillemet ne ferme la chaîne que s'il est suivi d'un délimiteur."""
+        j = index + 1
+        while j < self.n and self.text[j] in " \t\r":
+            j += 1
+        return j >= self.n or self.text[j] in ",:}]\n"
+
+    def _string(self) -> str:
+        quote = self.text[self.pos]
+        self.pos += 1
+        chars = []
+        while self.pos < self.n:
+            c = self.text[self.pos]
+            if c == "\\" and self.pos + 1 < self.n:
+                nxt = self.text[self.pos + 1]
+                if nxt == "u" and self.pos + 6 <= self.n:
+                    try:
+                        chars.append(chr(int(self.text[self.pos + 2:self.pos + 6], 16)))
+                        self.pos += 6
+                        continue
+                    except ValueError:
+                        pass
+                chars.append(_ESCAPES.get(nxt, nxt))
+                self.pos += 2
+                continue
+            if c == quote and self._closes_string(self.pos):
+                self.pos += 1
+                return "".join(chars)
+            chars.append(c)
+            self.pos += 1
+        return "".join(chars)  # chaîne tronquée
+
+    def _bare(self, stops: str) -> Any:
+        start = self.pos
+        while self.pos < self.n and self.text[self.pos] not in stops:
+            self.pos += 1
+        token = self.text[start:self.pos].strip()
+        if not token:
+            # Caractère parasite isolé : on avance pour ne pas boucler
+            if self.pos < self.n and self.pos == start:
+                self.pos += 1
+            return None
+        if token.lower() in _LITERALS:
+            return _LITERALS[token.lower()]
+        if _NUMBER.fullmatch(token):
+            return float(token) if any(ch in token for ch in ".eE") else int(token)
+        return token
+
+
+def _start_index(text: str) -> int:
+    brace = text.find("{")
+    return brace if brace >= 0 else text.find("[")
+
+
+def repair_json(text: str) -> Any:
+    """
+    Extrait la valeur JSON d'une réponse LLM.
+
+    Chemin rapide : json standard sur le premier objet trouvé (la prose et les
+    balises ``` autour sont ignorées). Sinon, analyse tolérante qui répare la
+    sortie au lieu de la rejeter.
+    """
+    if not text or not text.strip():
+        raise JSONRepairError("réponse vide")
+    cleaned = _FENCE.sub("", text).strip()
+    start = _start_index(cleaned)
+    if start < 0:
+        raise JSONRepairError("aucun objet JSON dans la réponse")
+    candidate = cleaned[start:]
+    try:
+        value, _ = json.JSONDecoder().raw_decode(candidate)
+        return value
+    except json.JSONDecodeError:
+        pass
+    return _TolerantParser(candidate).parse()
+
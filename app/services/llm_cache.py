@@ -0,0 +1,203 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class LLMCache:
+    """
+    Cache LRU + TTL borné pour les réponses LLM.
+
+    - Limite en nombre d'entrées et en octets (taille UTF-8 des réponses).
+    - Éviction LRU quand une des deux limites est dépassée.
+    - Balayage actif des entrées expirées (pas seulement ignorées à la lecture).
+    - Compteurs hits / misses / evictions / expirations.
+
+    Thread-safe : gunicorn tourne avec plusieurs threads par worker.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 8 * 1024 * 1024,
+                 ttl: float = 300, sweep_interval: float = 60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+
+        # clé → (valeur, expire_à, taille_octets)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _sizeof(value: str) -> int:
+        return len(value.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            self._maybe_sweep(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            # Une réponse plus grosse que le budget total n'est jamais mise en cache
+            return
+        now = time.monotonic()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._maybe_sweep(now)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def sweep(self) -> int:
+        """Supprime toutes les entrées expirées. Retourne le nombre supprimé."""
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Internes (appelés sous self._lock) ---
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep(now)
+
+    def _sweep(self, now: float) -> int:
+        expired = [k for k, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        self._last_sweep = now
+        return len(expired)
+
+
+class TieredLLMCache:
+    """
+    Cache à deux niveaux : L1 en mémoire (LLMCache) devant un L2 persistant
+    partagé entre workers (DiskLLMCache). Une lecture L2 réussie est promue
+    en L1 avec son TTL restant ; une écriture va dans les deux niveaux.
+    Depuis une coroutine, utiliser aget/aset : SQLite n'y bloque pas la boucle.
+    """
+
+    def __init__(self, l1: LLMCache, l2=None):
+        self.l1 = l1
+        self.l2 = l2
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.l1.get(key)
+        if value is not None or self.l2 is None:
+            return value
+        value, ttl_left = self.l2.get(key)
+        if value is not None:
+            self.l1.set(key, value, ttl=min(ttl_left, self.l1.ttl))
+        return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self.l1.set(key, value, ttl=ttl)
+        if self.l2 is not None:
+            self.l2.set(key, value, ttl=ttl)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """
+        get() depuis une coroutine : le L2 (SQLite, verrou d'écriture partagé
+        entre workers) est lu dans un thread, jamais sur la boucle.
+        """
+        value = self.l1.get(key)
+        if value is not None or self.l2 is None:
+            return value
+        value, ttl_left = await asyncio.to_thread(self.l2.get, key)
+        if value is not None:
+            self.l1.set(key, value, ttl=min(ttl_left, self.l1.ttl))
+        return value
+
+    async def aset(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """
+        set() depuis une coroutine : L1 immédiat (visible des appelants
+        concurrents), puis écriture L2 attendue dans un thread. Attendue : une
+        erreur n'est pas perdue, ni l'écriture à la fermeture de la boucle de
+        la vue Flask.
+        """
+        self.l1.set(key, value, ttl=ttl)
+        if self.l2 is not None:
+            await asyncio.to_thread(self.l2.set, key, value, ttl=ttl)
+
+    def warm(self, limit: int) -> int:
+        """Précharge en L1 les entrées L2 les plus récentes (démarrage à chaud)."""
+        if self.l2 is None or limit <= 0:
+            return 0
+        entries = self.l2.recent(min(limit, self.l1.max_entries))
+        # Du moins récent au plus récent pour conserver l'ordre LRU
+        for key, value, ttl_left in reversed(entries):
+            self.l1.set(key, value, ttl=min(ttl_left, self.l1.ttl))
+        return len(entries)
+
+    def clear(self) -> None:
+        self.l1.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "l1": self.l1.stats(),
+            "l2": self.l2.stats() if self.l2 is not None else None,
+        }
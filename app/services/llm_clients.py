@@ -0,0 +1,171 @@
+import importlib.util
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from config import Config
+from app.services.io_loop import io_loop
+
+# URL de base des fournisseurs compatibles OpenAI (None = URL par défaut du SDK)
+PROVIDER_BASE_URLS = {
+    "openrouter": "https://openrouter.ai/api/v1",
+    "grok": "https://api.x.ai/v1",
+    "openai": None,
+}
+
+
+def provider_settings(provider: str) -> Tuple[Optional[str], Optional[str]]:
+    """Retourne (clé API, URL de base) pour un fournisseur."""
+    provider = provider.lower()
+    if provider == "openrouter":
+        api_key = Config.OPENROUTER_API_KEY
+    elif provider == "grok":
+        api_key = Config.GROK_API_KEY
+    elif provider == "openai":
+        api_key = os.getenv("OPENAI_API_KEY")
+    elif provider == "gemini":
+        api_key = Config.GEMINI_API_KEY
+    else:
+        api_key = None
+    return api_key, PROVIDER_BASE_URLS.get(provider)
+
+
+def _http2_enabled() -> bool:
+    if not Config.LLM_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        print("WARNING: LLM_HTTP2 activé mais le paquet 'h2' est absent (pip install httpx[http2]). HTTP/1.1 utilisé.")
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=Config.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=Config.LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+class ClientRegistry:
+    """
+    Registre des clients fournisseurs partagés.
+
+    Un seul client asynchrone (et donc un seul pool de connexions HTTP
+    keep-alive) par (fournisseur, URL de base) pour tout le processus, au
+    lieu d'un AsyncOpenAI par agent. Les pools httpx asynchrones étant liés à
+    une boucle, ces clients vivent sur la boucle d'E/S partagée (io_loop) :
+    leurs appels doivent y être exécutés (io_loop.run / io_loop.iterate),
+    et la connexion préchauffée au démarrage sert dès la première requête.
+    Le client synchrone est lui aussi unique pour tout le processus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._async: Dict[tuple, tuple] = {}
+        self._sync: Dict[tuple, tuple] = {}
+        self._http2 = None
+        self.created = 0
+        self.prewarmed = 0
+
+    def _use_http2(self) -> bool:
+        if self._http2 is None:
+            self._http2 = _http2_enabled()
+        return self._http2
+
+    def _async_entry(self, provider: str) -> Optional[tuple]:
+        api_key, base_url = provider_settings(provider)
+        if not api_key:
+            return None
+        key = (provider, base_url)
+        with self._lock:
+            entry = self._async.get(key)
+            if entry is None:
+                http_client = httpx.AsyncClient(
+                    limits=_limits(),
+                    http2=self._use_http2(),
+                    timeout=httpx.Timeout(Config.LLM_HTTP_TIMEOUT, connect=Config.LLM_HTTP_CONNECT_TIMEOUT),
+                )
+                # Les nouvelles tentatives sont gérées par app.services.resilience
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+                entry = self._async[key] = (client, http_client)
+                self.created += 1
+            return entry
+
+    def get_async(self, provider: str) -> Optional[AsyncOpenAI]:
+        """Client asynchrone partagé du fournisseur, à utiliser sur la boucle io_loop."""
+        entry = self._async_entry(provider)
+        return entry[0] if entry is not None else None
+
+    def get_sync(self, provider: str) -> Optional[OpenAI]:
+        api_key, base_url = provider_settings(provider)
+        if not api_key:
+            return None
+        key = (provider, base_url)
+        with self._lock:
+            entry = self._sync.get(key)
+            if entry is None:
+                http_client = httpx.Client(
+                    limits=_limits(),
+                    http2=self._use_http2(),
+                    timeout=httpx.Timeout(Config.LLM_HTTP_TIMEOUT, connect=Config.LLM_HTTP_CONNECT_TIMEOUT),
+                )
+                client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+                entry = (client, http_client)
+                self._sync[key] = entry
+                self.created += 1
+            return entry[0]
+
+    async def _prewarm(self, provider: str) -> bool:
+        entry = self._async_entry(provider)
+        if entry is None:
+            return False
+        client, http_client = entry
+        try:
+            await http_client.head(str(client.base_url))
+        except httpx.HTTPError as e:
+            print(f"WARNING: Préchauffage de la connexion {provider} échoué: {e}")
+            return False
+        with self._lock:
+            self.prewarmed += 1
+        return True
+
+    async def prewarm(self, provider: str) -> bool:
+        """
+        Ouvre à l'avance la connexion TLS du client partagé (sur io_loop).
+        Le code HTTP importe peu : seule la connexion gardée en pool compte.
+        """
+        return await io_loop.run(self._prewarm(provider))
+
+    def prewarm_background(self, provider: str) -> None:
+        """prewarm() lancé sans attendre (démarrage de l'application)."""
+        io_loop.submit(self._prewarm(provider))
+
+    async def aclose(self) -> None:
+        """Ferme les pools de connexions asynchrones (sur io_loop)."""
+        with self._lock:
+            entries = list(self._async.values())
+            self._async.clear()
+
+        async def close_all():
+            for _, http_client in entries:
+                await http_client.aclose()
+
+        await io_loop.run(close_all())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "async_clients": len(self._async),
+                "sync_clients": len(self._sync),
+                "created": self.created,
+                "prewarmed": self.prewarmed,
+                "http2": bool(self._http2),
+            }
+
+
+# Instance globale
+client_registry = ClientRegistry()
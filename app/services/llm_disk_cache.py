@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class DiskLLMCache:
+    """
+    Cache LLM persistant (niveau L2) sur SQLite en mode WAL.
+
+    Partagé entre tous les workers gunicorn d'une même machine et conservé
+    entre les redémarrages. Les valeurs sont compressées (zlib), chaque
+    entrée a une date d'expiration, et la taille totale est bornée : au-delà
+    du budget, les entrées les moins récemment lues sont supprimées.
+
+    Toute erreur SQLite est absorbée : le cache ne doit jamais faire échouer
+    une requête utilisateur.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600,
+                 evict_every: int = 50):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evict_every = evict_every
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(self._SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Une connexion par thread (gunicorn --threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Tuple[Optional[str], float]:
+        """Retourne (valeur, TTL restant en secondes) ou (None, 0)."""
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None, 0
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return zlib.decompress(row[0]).decode("utf-8"), row[1] - now
+        except (sqlite3.Error, zlib.error) as e:
+            self._on_error("lecture", e)
+            return None, 0
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        blob = zlib.compress(value.encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires_at, now),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self._on_error("écriture", e)
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Supprime les entrées expirées puis les moins récemment lues au-delà du budget."""
+        removed = 0
+        try:
+            conn = self._conn()
+            removed += conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at"):
+                    victims.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+                removed += len(victims)
+            conn.commit()
+        except sqlite3.Error as e:
+            self._on_error("éviction", e)
+        self.evictions += removed
+        return removed
+
+    def recent(self, limit: int) -> List[Tuple[str, str, float]]:
+        """Entrées valides les plus récemment lues : (clé, valeur, TTL restant)."""
+        now = time.time()
+        try:
+            rows = self._conn().execute(
+                "SELECT key, value, expires_at FROM llm_cache WHERE expires_at > ? ORDER BY accessed_at DESC LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            return [(k, zlib.decompress(v).decode("utf-8"), exp - now) for k, v, exp in rows]
+        except (sqlite3.Error, zlib.error) as e:
+            self._on_error("préchargement", e)
+            return []
+
+    def clear(self) -> None:
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+        except sqlite3.Error as e:
+            self._on_error("purge", e)
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = 0, 0
+        try:
+            entries, size = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._on_error("statistiques", e)
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+    def _on_error(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        print(f"WARNING: Cache disque LLM ({operation}) indisponible: {error}")
@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+from config import Config
+
+# Classes de priorité : plus la valeur est basse, plus l'appel passe tôt
+PRIORITIES = {
+    "route": 0,
+    "extract": 1,
+    "tool": 2,
+    "synthesize": 3,
+}
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted", "cancelled")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+        self.cancelled = False
+
+
+class LLMGovernor:
+    """
+    Limiteur global des appels LLM sortants, partagé par tout le processus.
+
+    - Sémaphore à priorités pour le nombre d'appels simultanés : quand un
+      créneau se libère, il va à l'appel en attente de plus haute priorité
+      (routage et extraction d'intention avant les longues synthèses).
+    - Seau à jetons pour les requêtes/seconde et les tokens/minute.
+    - Métriques de temps d'attente par classe.
+
+    Fonctionne entre threads gunicorn : chaque requête Flask async a sa
+    propre boucle asyncio, les réveils passent par call_soon_threadsafe.
+    """
+
+    def __init__(self, max_in_flight: int = 8, requests_per_second: float = 5.0,
+                 tokens_per_minute: float = 200000):
+        self.max_in_flight = max_in_flight
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: list = []
+        self._seq = itertools.count()
+
+        # Seaux à jetons (capacité = 1 seconde de requêtes, 1 minute de tokens)
+        self._request_capacity = max(1.0, requests_per_second)
+        self._request_tokens = self._request_capacity
+        self._token_tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+
+        self._metrics = {
+            kind: {"calls": 0, "queued": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+            for kind in PRIORITIES
+        }
+        self.rate_limited = 0
+
+    @asynccontextmanager
+    async def slot(self, kind: str = "tool", estimated_tokens: int = 0):
+        """Réserve un créneau d'appel fournisseur pour la durée du bloc `async with`."""
+        kind = kind if kind in PRIORITIES else "tool"
+        start = time.monotonic()
+        with self._lock:
+            self._metrics[kind]["queued"] += 1
+        try:
+            await self._acquire(PRIORITIES[kind])
+        finally:
+            with self._lock:
+                self._metrics[kind]["queued"] -= 1
+        try:
+            await self._wait_rate(estimated_tokens)
+            self._record_wait(kind, (time.monotonic() - start) * 1000)
+            yield
+        finally:
+            self._release()
+
+    # --- Sémaphore à priorités ---
+
+    async def _acquire(self, priority: int) -> None:
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    waiter.cancelled = True
+                    raise
+            # Créneau déjà transmis : le rendre si le réveil a eu lieu
+            if not waiter.future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                try:
+                    # Le créneau est transmis tel quel : _in_flight ne bouge pas
+                    waiter.loop.call_soon_threadsafe(self._grant, waiter)
+                    return
+                except RuntimeError:
+                    # Boucle fermée entre-temps
+                    continue
+            self._in_flight -= 1
+
+    def _grant(self, waiter: _Waiter) -> None:
+        if waiter.future.done():
+            # L'appelant a été annulé avant le réveil : passer le créneau au suivant
+            self._release()
+        else:
+            waiter.future.set_result(None)
+
+    # --- Seaux à jetons ---
+
+    def _reserve(self, tokens: int) -> float:
+        """Consomme les jetons si possible ; sinon retourne le délai d'attente estimé."""
+        tokens = min(tokens, self.tokens_per_minute)
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_refill
+            self._last_refill = now
+            self._request_tokens = min(self._request_capacity,
+                                       self._request_tokens + elapsed * self.requests_per_second)
+            self._token_tokens = min(float(self.tokens_per_minute),
+                                     self._token_tokens + elapsed * self.tokens_per_minute / 60)
+            if self._request_tokens >= 1 and self._token_tokens >= tokens:
+                self._request_tokens -= 1
+                self._token_tokens -= tokens
+                return 0.0
+            wait_requests = max(0.0, (1 - self._request_tokens) / self.requests_per_second)
+            wait_tokens = max(0.0, (tokens - self._token_tokens) * 60 / self.tokens_per_minute)
+            return max(wait_requests, wait_tokens, 0.001)
+
+    async def _wait_rate(self, tokens: int) -> None:
+        limited = False
+        while True:
+            delay = self._reserve(tokens)
+            if delay <= 0:
+                break
+            limited = True
+            await asyncio.sleep(delay)
+        if limited:
+            with self._lock:
+                self.rate_limited += 1
+
+    # --- Métriques ---
+
+    def _record_wait(self, kind: str, wait_ms: float) -> None:
+        with self._lock:
+            m = self._metrics[kind]
+            m["calls"] += 1
+            m["total_wait_ms"] += wait_ms
+            m["max_wait_ms"] = max(m["max_wait_ms"], wait_ms)
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return sum(1 for _, _, w in self._waiters if not w.cancelled)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_kind = {
+                kind: {
+                    "calls": m["calls"],
+                    "queued": m["queued"],
+                    "avg_wait_ms": round(m["total_wait_ms"] / m["calls"], 2) if m["calls"] else 0.0,
+                    "max_wait_ms": round(m["max_wait_ms"], 2),
+                }
+                for kind, m in self._metrics.items()
+            }
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "queue_depth": sum(1 for _, _, w in self._waiters if not w.cancelled),
+                "requests_per_second": self.requests_per_second,
+                "tokens_per_minute": self.tokens_per_minute,
+                "rate_limited": self.rate_limited,
+                "by_kind": by_kind,
+            }
+
+
+# Instance globale
+llm_governor = LLMGovernor(
+    max_in_flight=Config.LLM_MAX_IN_FLIGHT,
+    requests_per_second=Config.LLM_REQUESTS_PER_SECOND,
+    tokens_per_minute=Config.LLM_TOKENS_PER_MINUTE,
+)
@@ -1,108 +1,315 @@
-import asyncio
 import hashlib
-import time
-from openai import AsyncOpenAI, OpenAI
+import sqlite3
+from typing import AsyncIterator, Type, TypeVar
+from pydantic import BaseModel, ValidationError
 from config import Config
-import os
+from app.services.llm_cache import LLMCache, TieredLLMCache
+from app.services.llm_disk_cache import DiskLLMCache
+from app.services.single_flight import SingleFlight
+from app.services.llm_governor import llm_governor
+from app.services.llm_clients import client_registry
+from app.services.provider_pool import provider_pool
+from app.services.json_repair import JSONRepairError, repair_json
+from app.core.context import remaining_budget
 
-# Cache en mémoire : clé → (réponse, timestamp)
-_llm_cache: dict = {}
-_CACHE_TTL = 300  # 5 minutes
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
 
+# Cache à deux niveaux : L1 mémoire borné (LRU + TTL) + L2 SQLite partagé entre workers
+def _build_cache() -> TieredLLMCache:
+    l1 = LLMCache(
+        max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+        max_bytes=Config.LLM_CACHE_MAX_BYTES,
+        ttl=Config.LLM_CACHE_TTL,
+        sweep_interval=Config.LLM_CACHE_SWEEP_INTERVAL,
+    )
+    l2 = None
+    if Config.LLM_DISK_CACHE_ENABLED:
+        try:
+            l2 = DiskLLMCache(
+                Config.LLM_DISK_CACHE_PATH,
+                max_bytes=Config.LLM_DISK_CACHE_MAX_BYTES,
+                ttl=Config.LLM_DISK_CACHE_TTL,
+            )
+        except (OSError, sqlite3.Error) as e:
+            print(f"WARNING: Cache disque LLM désactivé ({Config.LLM_DISK_CACHE_PATH}): {e}")
+    cache = TieredLLMCache(l1, l2)
+    cache.warm(Config.LLM_CACHE_WARM_ENTRIES)
+    return cache
+
+
+_llm_cache = _build_cache()
+
+# Déduplication des appels identiques en cours
+_single_flight = SingleFlight()
+
+
+def get_profile(kind: str) -> dict:
+    """Profil d'appel (modèle, max_tokens, température, budget) d'une classe d'appel."""
+    return Config.LLM_PROFILES.get(kind, Config.LLM_PROFILES["tool"])
 
-def _cache_key(prompt: str, system_instruction: str | None) -> str:
-    raw = f"{system_instruction or ''}||{prompt}"
+
+def call_budget(kind: str) -> float:
+    """Budget de latence d'un appel : celui du profil, borné par l'échéance de la requête en cours."""
+    timeout = get_profile(kind)["timeout"]
+    remaining = remaining_budget()
+    return timeout if remaining is None else min(timeout, remaining)
+
+
+def _cache_key(prompt: str, system_instruction: str | None, model: str = None,
+               temperature: float | None = None, max_tokens: int | None = None,
+               schema_name: str | None = None) -> str:
+    raw = (f"{model or Config.LLM_MODEL}||{temperature}||{max_tokens}||{schema_name or ''}"
+           f"||{system_instruction or ''}||{prompt}")
     return hashlib.md5(raw.encode()).hexdigest()
 
 
-def _cache_get(key: str) -> str | None:
-    entry = _llm_cache.get(key)
-    if entry and (time.time() - entry[1]) < _CACHE_TTL:
-        return entry[0]
-    return None
+async def _cache_get(key: str) -> str | None:
+    return await _llm_cache.aget(key)
+
+
+async def _cache_set(key: str, value: str, ttl: float | None = None) -> None:
+    await _llm_cache.aset(key, value, ttl=ttl)
+
+
+def get_cache_stats() -> dict:
+    """Statistiques du cache LLM (hits, misses, évictions, taille)."""
+    return _llm_cache.stats()
 
 
-def _cache_set(key: str, value: str) -> None:
-    _llm_cache[key] = (value, time.time())
+def is_error_response(text: str) -> bool:
+    """Vrai si le texte est un message d'erreur du service plutôt qu'une vraie réponse."""
+    return not text or "Erreur LLM (" in text or "Service IA non configuré" in text
+
+
+def get_single_flight_stats() -> dict:
+    """Statistiques de déduplication des appels LLM en cours."""
+    return _single_flight.stats()
+
+
+def get_client_stats() -> dict:
+    """Clients fournisseurs partagés (pools de connexions) et préchauffages."""
+    return client_registry.stats()
+
+
+def get_provider_stats() -> dict:
+    """Latences glissantes, taux d'erreur et requêtes hedgées par fournisseur."""
+    return provider_pool.stats()
+
+
+def get_governor_stats() -> dict:
+    """Appels en cours, file d'attente et temps d'attente par classe d'appel."""
+    return llm_governor.stats()
 
 
 class LLMService:
+    """
+    Façade d'accès au LLM. Les clients fournisseurs ne sont plus construits
+    par instance : ils viennent du registre partagé (un pool de connexions
+    par fournisseur pour le processus), ce qui rend l'instanciation gratuite.
+    """
+
     def __init__(self):
-        self.client = None
         self.provider = Config.LLM_PROVIDER.lower()
-        
-        api_key = None
-        base_url = None
-        
-        if self.provider == "openrouter":
-            api_key = Config.OPENROUTER_API_KEY
-            base_url = "https://openrouter.ai/api/v1"
-        elif self.provider == "grok":
-            api_key = Config.GROK_API_KEY
-            base_url = "https://api.x.ai/v1"
-        elif self.provider == "openai":
-             api_key = os.getenv("OPENAI_API_KEY") 
-
-        if api_key:
-            self.client = AsyncOpenAI(
-                api_key=api_key,
-                base_url=base_url
-            )
-            self.sync_client = OpenAI(
-                api_key=api_key,
-                base_url=base_url
-            )
-        else:
+        self.pool = provider_pool
+        if not self.pool.available():
             print(f"WARNING: API Key for {self.provider} not found. AI features disabled.")
 
-    async def generate_response(self, prompt: str, system_instruction: str = None, temperature: float = None) -> str:
-        if not self.client:
+    @property
+    def client(self):
+        """Client asynchrone partagé, lié à la boucle io_loop (None si non configuré)."""
+        return client_registry.get_async(self.provider)
+
+    @property
+    def sync_client(self):
+        return client_registry.get_sync(self.provider)
+
+    async def prewarm(self) -> bool:
+        """Ouvre la connexion fournisseur partagée avant le premier appel."""
+        return await client_registry.prewarm(self.provider)
+
+    async def generate_response(self, prompt: str, system_instruction: str = None, temperature: float = None,
+                                kind: str = "tool") -> str:
+        """
+        Génère une réponse LLM.
+
+        `kind` est la classe d'appel ("route", "extract", "tool", "synthesize") :
+        elle choisit le profil de Config.LLM_PROFILES (modèle, plafond de
+        tokens, température, budget de latence) et la priorité dans le
+        limiteur global. Une `temperature` explicite prime sur le profil.
+        Le budget est borné par l'échéance de la requête en cours (contexte).
+        """
+        return await self._generate(prompt, system_instruction, temperature, kind)
+
+    async def generate_json(self, prompt: str, schema: Type[SchemaT], system_instruction: str = None,
+                            kind: str = "extract") -> SchemaT:
+        """
+        Extraction structurée : retourne une instance validée de `schema`.
+
+        Le mode JSON du fournisseur (json_schema, sinon json_object) est demandé
+        quand il est disponible ; la sortie passe ensuite par l'analyseur JSON
+        tolérant (balises, virgules, troncature...) puis par la validation
+        pydantic. En cas d'échec, le schéma par défaut (intention GENERAL) est
+        retourné : jamais de nouvel appel LLM pour une sortie mal formée.
+        """
+        raw = await self._generate(prompt, system_instruction, None, kind, schema.model_json_schema())
+        data = {}
+        if not is_error_response(raw):
+            try:
+                data = repair_json(raw)
+            except JSONRepairError as e:
+                print(f"WARNING: Sortie JSON inexploitable pour {schema.__name__}: {e}")
+        if not isinstance(data, dict):
+            data = {}
+        try:
+            return schema.model_validate(data)
+        except ValidationError as e:
+            print(f"WARNING: Validation {schema.__name__} échouée, valeurs par défaut: {e.error_count()} erreur(s)")
+            return schema()
+
+    async def generate_stream(self, prompt: str, system_instruction: str = None, temperature: float = None,
+                              kind: str = "synthesize") -> AsyncIterator[str]:
+        """
+        Génère une réponse LLM fragment par fragment, dès leur arrivée du
+        fournisseur. Même clé de cache que generate_response : une réponse
+        déjà en cache est émise d'un bloc, et la réponse complète d'un flux
+        réussi est mise en cache. Une erreur est émise comme dernier fragment.
+        """
+        if not self.pool.available():
+            yield "Service IA non configuré."
+            return
+
+        profile = get_profile(kind)
+        if temperature is None:
+            temperature = profile["temperature"]
+
+        key = _cache_key(prompt, system_instruction, profile["model"], temperature, profile["max_tokens"])
+        cached = await _cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+        budget = call_budget(kind)
+        if budget <= 0:
+            yield f"Erreur LLM ({self.provider}): échéance de la requête dépassée"
+            return
+
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": prompt})
+
+        parts = []
+        served = {}
+        try:
+            async for chunk in self.pool.stream(
+                messages,
+                kind=kind,
+                model=profile["model"],
+                max_tokens=profile["max_tokens"],
+                temperature=temperature,
+                budget=budget,
+                served=served,
+            ):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            separator = "\n" if parts else ""
+            yield f"{separator}Erreur LLM ({self.provider}): {str(e) or type(e).__name__}"
+            return
+
+        result = "".join(parts)
+        if not is_error_response(result):
+            await _cache_set(key, result, ttl=self._cache_ttl(served))
+
+    async def _generate(self, prompt: str, system_instruction: str | None, temperature: float | None,
+                        kind: str, json_schema: dict | None = None) -> str:
+        if not self.pool.available():
             return "Service IA non configuré."
 
-        # --- Cache non-bloquant : lecture ---
-        key = _cache_key(prompt, system_instruction)
-        cached = _cache_get(key)
+        profile = get_profile(kind)
+        if temperature is None:
+            temperature = profile["temperature"]
+
+        # --- Cache : lecture ---
+        key = _cache_key(prompt, system_instruction, profile["model"], temperature, profile["max_tokens"],
+                         json_schema.get("title") if json_schema else None)
+        cached = await _cache_get(key)
         if cached is not None:
             return cached
 
+        # --- Échéance de la requête : pas d'appel qui ne pourrait pas aboutir à temps ---
+        budget = call_budget(kind)
+        if budget <= 0:
+            return f"Erreur LLM ({self.provider}): échéance de la requête dépassée"
+
         # --- Appel LLM ---
         messages = []
         if system_instruction:
             messages.append({"role": "system", "content": system_instruction})
         messages.append({"role": "user", "content": prompt})
 
+        kwargs = {
+            "model": profile["model"],
+            "messages": messages,
+            "max_tokens": profile["max_tokens"]
+        }
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        if json_schema is not None:
+            kwargs["json_schema"] = json_schema
+
         try:
-            kwargs = {
-                "model": Config.LLM_MODEL,
-                "messages": messages,
-                "max_tokens": 2048
-            }
-            if temperature is not None:
-                kwargs["temperature"] = temperature
-            response = await self.client.chat.completions.create(**kwargs)
-            result = response.choices[0].message.content
+            # Les appels identiques en cours partagent une seule requête fournisseur
+            return await _single_flight.do(key, lambda: self._complete(key, kwargs, kind, budget))
+        except Exception as e:
+            return f"Erreur LLM ({self.provider}): {str(e) or type(e).__name__}"
 
-            # --- Cache non-bloquant : écriture en arrière-plan ---
-            async def _write_cache():
-                _cache_set(key, result)
-            asyncio.create_task(_write_cache())
+    async def _complete(self, key: str, kwargs: dict, kind: str, budget: float) -> str:
+        """
+        Appel via le pool de fournisseurs (routage selon la latence, bascule,
+        requête hedgée pour les classes courtes) ; le cache est rempli avant
+        de libérer les appelants en attente.
+        """
+        served = {}
+        result = await self.pool.complete(
+            kwargs["messages"],
+            kind=kind,
+            model=kwargs["model"],
+            max_tokens=kwargs["max_tokens"],
+            temperature=kwargs.get("temperature"),
+            budget=budget,
+            hedge=Config.LLM_HEDGE_ENABLED and kind in Config.LLM_HEDGE_KINDS,
+            json_schema=kwargs.get("json_schema"),
+            served=served,
+        )
+        # Jamais de message d'erreur ni de réponse vide en cache
+        if not is_error_response(result):
+            await _cache_set(key, result, ttl=self._cache_ttl(served))
+        return result
 
-            return result
-        except Exception as e:
-            return f"Erreur LLM ({self.provider}): {str(e)}"
+    def _cache_ttl(self, served: dict) -> float | None:
+        """
+        La clé de cache porte le modèle du principal : une réponse d'un
+        fournisseur de secours n'y est gardée que brièvement (dédoublonnage
+        pendant la panne), jamais servie ensuite comme celle du principal.
+        """
+        return None if served.get("provider") == self.pool.primary else Config.LLM_FALLBACK_CACHE_TTL
 
-    def generate_sync(self, prompt: str, temperature: float = None) -> str:
-        if not self.sync_client:
+    def generate_sync(self, prompt: str, temperature: float = None, kind: str = "tool") -> str:
+        sync_client = self.sync_client
+        if not sync_client:
              return "Service IA non configuré."
+        profile = get_profile(kind)
+        if temperature is None:
+            temperature = profile["temperature"]
         try:
             kwargs = {
-                "model": Config.LLM_MODEL,
+                "model": profile["model"],
                 "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 2048
+                "max_tokens": profile["max_tokens"]
             }
             if temperature is not None:
                 kwargs["temperature"] = temperature
-            response = self.sync_client.chat.completions.create(**kwargs)
+            response = sync_client.chat.completions.create(**kwargs)
             return response.choices[0].message.content
         except Exception as e:
              return f"Error: {e}"
@@ -0,0 +1,453 @@
+import asyncio
+import importlib.util
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import openai
+
+from config import Config
+from app.services.io_loop import io_loop
+from app.services.llm_clients import client_registry, provider_settings
+from app.services.llm_governor import llm_governor
+from app.services.resilience import (
+    CircuitBreaker, CircuitOpenError, call_with_resilience, get_breaker, is_retryable
+)
+
+
+class ProviderStats:
+    """Latences et erreurs glissantes d'un fournisseur (fenêtre des N derniers appels)."""
+
+    def __init__(self, window: int = 100):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.hedges_won = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency)
+            else:
+                self.errors += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return 1 - sum(self._outcomes) / len(self._outcomes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate(), 4),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "hedges_won": self.hedges_won,
+        }
+
+
+class LLMProvider(ABC):
+    """Fournisseur LLM du pool : un nom, un modèle, un disjoncteur et des statistiques."""
+
+    # Mode de sortie structurée effectif (None = JSON demandé par le prompt seulement)
+    json_mode: Optional[str] = None
+
+    def __init__(self, name: str, model: str):
+        self.name = name
+        self.model = model
+        self.stats = ProviderStats()
+        self.breaker: CircuitBreaker = get_breaker(
+            f"llm:{name}", Config.LLM_BREAKER_FAILURES, Config.LLM_BREAKER_RESET
+        )
+
+    @abstractmethod
+    def available(self) -> bool:
+        """Vrai si le fournisseur est configuré (clé API, dépendance installée)."""
+
+    @abstractmethod
+    async def complete(self, messages: List[dict], model: str, max_tokens: int,
+                       temperature: Optional[float], json_schema: Optional[dict] = None) -> str:
+        """`json_schema` (schéma JSON) demande une sortie structurée si le fournisseur le permet."""
+
+    async def stream(self, messages: List[dict], model: str, max_tokens: int,
+                     temperature: Optional[float]) -> AsyncIterator[str]:
+        """Réponse par fragments ; par défaut, la réponse complète en un seul fragment."""
+        yield await self.complete(messages, model, max_tokens, temperature)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """OpenRouter, Grok ou OpenAI via le SDK openai et le registre de clients partagé."""
+
+    # Modes de sortie structurée, du plus strict au plus permissif
+    JSON_MODES = ("json_schema", "json_object", None)
+
+    def __init__(self, name: str, model: str):
+        super().__init__(name, model)
+        self.json_mode = Config.LLM_JSON_MODE if Config.LLM_JSON_MODE in self.JSON_MODES else None
+
+    def available(self) -> bool:
+        return bool(provider_settings(self.name)[0])
+
+    def _response_format(self, json_schema: Optional[dict]) -> Optional[dict]:
+        if json_schema is None or self.json_mode is None:
+            return None
+        if self.json_mode == "json_schema":
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": json_schema.get("title", "extraction"), "schema": json_schema},
+            }
+        return {"type": "json_object"}
+
+    async def complete(self, messages, model, max_tokens, temperature, json_schema=None):
+        client = client_registry.get_async(self.name)
+        kwargs = {"model": model, "messages": messages, "max_tokens": max_tokens}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        while True:
+            response_format = self._response_format(json_schema)
+            if response_format is not None:
+                kwargs["response_format"] = response_format
+            else:
+                kwargs.pop("response_format", None)
+            try:
+                # Client partagé lié à la boucle d'E/S du processus (pool keep-alive entre requêtes)
+                response = await io_loop.run(client.chat.completions.create(**kwargs))
+            except openai.BadRequestError:
+                if response_format is None:
+                    raise
+                # Mode refusé par ce fournisseur/modèle : on descend d'un cran, une fois pour toutes
+                downgraded = self.JSON_MODES[self.JSON_MODES.index(self.json_mode) + 1]
+                print(f"WARNING: {self.name} refuse response_format={self.json_mode}, repli sur {downgraded}.")
+                self.json_mode = downgraded
+                continue
+            return response.choices[0].message.content
+
+    async def stream(self, messages, model, max_tokens, temperature):
+        client = client_registry.get_async(self.name)
+        kwargs = {"model": model, "messages": messages, "max_tokens": max_tokens, "stream": True}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+
+        async def deltas():
+            response = await client.chat.completions.create(**kwargs)
+            async for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+        async for delta in io_loop.iterate(deltas()):
+            yield delta
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini via google-generativeai (dépendance optionnelle)."""
+
+    json_mode = "json_object"  # response_mime_type=application/json
+
+    def __init__(self, name: str, model: str):
+        super().__init__(name, model)
+        self._genai = None
+        if Config.GEMINI_API_KEY and importlib.util.find_spec("google.generativeai") is not None:
+            import google.generativeai as genai
+            genai.configure(api_key=Config.GEMINI_API_KEY)
+            self._genai = genai
+
+    def available(self) -> bool:
+        return self._genai is not None
+
+    @staticmethod
+    def _prompt(messages: List[dict]) -> str:
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        user = "\n".join(m["content"] for m in messages if m["role"] != "system")
+        return f"System: {system}\n\nUser: {user}" if system else user
+
+    async def complete(self, messages, model, max_tokens, temperature, json_schema=None):
+        generation_config = {"max_output_tokens": max_tokens}
+        if temperature is not None:
+            generation_config["temperature"] = temperature
+        if json_schema is not None:
+            generation_config["response_mime_type"] = "application/json"
+        gemini = self._genai.GenerativeModel(model)
+        # Client gRPC asynchrone lié à sa boucle : boucle d'E/S partagée, comme les clients OpenAI
+        response = await io_loop.run(
+            gemini.generate_content_async(self._prompt(messages), generation_config=generation_config))
+        return response.text
+
+    async def stream(self, messages, model, max_tokens, temperature):
+        generation_config = {"max_output_tokens": max_tokens}
+        if temperature is not None:
+            generation_config["temperature"] = temperature
+        gemini = self._genai.GenerativeModel(model)
+
+        async def texts():
+            response = await gemini.generate_content_async(
+                self._prompt(messages), generation_config=generation_config, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+        async for text in io_loop.iterate(texts()):
+            yield text
+
+
+def _build_provider(name: str, primary: str) -> LLMProvider:
+    if name == "gemini":
+        return GeminiProvider(name, Config.LLM_MODEL if name == primary else Config.GEMINI_MODEL)
+    # Le fournisseur principal garde LLM_MODEL ; les secours ont leur propre modèle
+    model = Config.LLM_MODEL if name == primary else Config.LLM_PROVIDER_MODELS.get(name, Config.LLM_MODEL)
+    return OpenAICompatibleProvider(name, model)
+
+
+class ProviderPool:
+    """
+    Pool de fournisseurs LLM avec routage selon la latence.
+
+    Chaque appel va au fournisseur sain (disjoncteur non ouvert) le plus
+    rapide d'après sa latence p50 glissante pondérée par son taux d'erreur ;
+    en cas d'échec, on bascule sur le suivant. Pour les classes d'appel
+    courtes (routage, extraction), une requête « hedgée » peut être envoyée
+    au fournisseur suivant (ou au même s'il est seul) après un délai basé
+    sur le p95 du premier : la première réponse gagne, l'autre est annulée.
+    """
+
+    def __init__(self, providers: List[LLMProvider], primary: str):
+        self.providers = providers
+        self.primary = primary
+        self.hedges_sent = 0
+
+    def available(self) -> List[LLMProvider]:
+        return [p for p in self.providers if p.available()]
+
+    def ranked(self) -> List[LLMProvider]:
+        """Fournisseurs disponibles, du plus prometteur au moins prometteur."""
+        candidates = [p for p in self.available() if p.breaker.state != CircuitBreaker.OPEN]
+        p50s = {p.name: p.stats.percentile(0.5) for p in candidates}
+        known = [v for v in p50s.values() if v is not None]
+        # Sans historique : a priori pessimiste (le plus lent des fournisseurs mesurés), pour
+        # qu'un secours jamais appelé ne passe pas devant le principal ; à égalité, le principal
+        prior = max(known) if known else Config.LLM_HEDGE_MAX_DELAY
+
+        def score(p: LLMProvider) -> tuple:
+            latency = p50s[p.name] if p50s[p.name] is not None else prior
+            return (latency * (1 + 4 * p.stats.error_rate()), p.name != self.primary)
+
+        return sorted(candidates, key=score)
+
+    def _model_for(self, provider: LLMProvider, model: Optional[str]) -> str:
+        # Le modèle demandé ne vaut que pour le principal ; les secours ont le leur
+        return model if (model and provider.name == self.primary) else provider.model
+
+    def _serve(self, served: Optional[Dict[str, str]], provider: LLMProvider, model: Optional[str]) -> None:
+        if served is not None:
+            served.update(provider=provider.name, model=self._model_for(provider, model))
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        p95 = provider.stats.percentile(0.95)
+        delay = p95 if p95 is not None else Config.LLM_HEDGE_MAX_DELAY
+        return min(max(delay, Config.LLM_HEDGE_MIN_DELAY), Config.LLM_HEDGE_MAX_DELAY)
+
+    async def _call(self, provider: LLMProvider, messages: List[dict], kind: str, model: Optional[str],
+                    max_tokens: int, temperature: Optional[float], budget: float,
+                    json_schema: Optional[dict] = None) -> str:
+        model = self._model_for(provider, model)
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        estimated_tokens = prompt_chars // 4 + max_tokens
+
+        async def attempt():
+            # Un créneau du limiteur par tentative : pas de créneau bloqué pendant le backoff
+            async with llm_governor.slot(kind, estimated_tokens):
+                start = time.monotonic()
+                try:
+                    result = await provider.complete(messages, model, max_tokens, temperature, json_schema)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Panne du fournisseur (délai, 429, 5xx) : comptée dans son taux d'erreur.
+                    # Requête refusée (4xx) : erreur de l'appelant, pas du fournisseur, non comptée
+                    if is_retryable(e):
+                        provider.stats.record(time.monotonic() - start, ok=False)
+                    raise
+                provider.stats.record(time.monotonic() - start, ok=True)
+                return result
+
+        return await call_with_resilience(
+            attempt,
+            budget=budget,
+            max_retries=Config.LLM_MAX_RETRIES,
+            backoff_base=Config.LLM_BACKOFF_BASE,
+            backoff_max=Config.LLM_BACKOFF_MAX,
+            breaker=provider.breaker,
+        )
+
+    async def complete(self, messages: List[dict], kind: str = "tool", model: Optional[str] = None,
+                       max_tokens: int = 2048, temperature: Optional[float] = None,
+                       budget: float = 30, hedge: bool = False, json_schema: Optional[dict] = None,
+                       served: Optional[Dict[str, str]] = None) -> str:
+        """
+        Réponse du premier fournisseur qui aboutit. `served`, si fourni, reçoit
+        le fournisseur et le modèle qui ont répondu (bascule ou requête hedgée).
+        """
+        ranked = self.ranked()
+        if not ranked:
+            raise CircuitOpenError("aucun fournisseur LLM disponible")
+
+        deadline = time.monotonic() + budget
+        last_error: Optional[BaseException] = None
+        for index, provider in enumerate(ranked):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                if hedge:
+                    backup = ranked[index + 1] if index + 1 < len(ranked) else provider
+                    return await self._hedged(provider, backup, messages, kind, model,
+                                              max_tokens, temperature, remaining, json_schema, served)
+                result = await self._call(provider, messages, kind, model, max_tokens, temperature,
+                                          remaining, json_schema)
+                self._serve(served, provider, model)
+                return result
+            except Exception as e:
+                last_error = e
+                print(f"WARNING: Fournisseur LLM {provider.name} en échec ({type(e).__name__}), bascule.")
+        raise last_error or asyncio.TimeoutError("budget de latence épuisé")
+
+    async def _hedged(self, primary: LLMProvider, backup: LLMProvider, messages, kind, model,
+                      max_tokens, temperature, budget: float, json_schema: Optional[dict] = None,
+                      served: Optional[Dict[str, str]] = None) -> str:
+        start = time.monotonic()
+        first = asyncio.create_task(
+            self._call(primary, messages, kind, model, max_tokens, temperature, budget, json_schema))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay(primary))
+            if done:
+                result = first.result()
+                self._serve(served, primary, model)
+                return result
+
+            self.hedges_sent += 1
+            remaining = budget - (time.monotonic() - start)
+            second = asyncio.create_task(
+                self._call(backup, messages, kind, model, max_tokens, temperature, remaining, json_schema))
+            pending.add(second)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            backup.stats.hedges_won += 1
+                        self._serve(served, primary if task is first else backup, model)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Requête perdante, ou les deux si l'appelant est annulé (échéance) : aucun créneau orphelin
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, messages: List[dict], kind: str = "synthesize", model: Optional[str] = None,
+                     max_tokens: int = 2048, temperature: Optional[float] = None,
+                     budget: float = 30, served: Optional[Dict[str, str]] = None) -> AsyncIterator[str]:
+        """
+        Réponse en flux depuis le fournisseur le mieux classé. Bascule sur le
+        suivant seulement tant qu'aucun fragment n'a été émis ; le budget de
+        latence s'applique à l'attente de chaque fragment et au total. Le
+        créneau du limiteur est tenu pendant toute la durée du flux. `served`
+        reçoit le fournisseur et le modèle du flux dès le premier fragment.
+        """
+        ranked = self.ranked()
+        if not ranked:
+            raise CircuitOpenError("aucun fournisseur LLM disponible")
+
+        deadline = time.monotonic() + budget
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        last_error: Optional[BaseException] = None
+        for provider in ranked:
+            if deadline - time.monotonic() <= 0:
+                break
+            if not provider.breaker.allow():
+                continue
+            provider_model = self._model_for(provider, model)
+            started = False
+            start = time.monotonic()
+            try:
+                async with llm_governor.slot(kind, prompt_chars // 4 + max_tokens):
+                    chunks = provider.stream(messages, provider_model, max_tokens, temperature)
+                    try:
+                        while True:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                raise asyncio.TimeoutError(f"budget de latence ({budget:.0f}s) épuisé")
+                            try:
+                                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                            except StopAsyncIteration:
+                                break
+                            if not started:
+                                started = True
+                                self._serve(served, provider, model)
+                            yield chunk
+                    finally:
+                        await chunks.aclose()
+            except (asyncio.CancelledError, GeneratorExit):
+                provider.breaker.release_probe()
+                raise
+            except Exception as e:
+                if is_retryable(e):
+                    provider.stats.record(time.monotonic() - start, ok=False)
+                    provider.breaker.record_failure()
+                else:
+                    provider.breaker.record_success()
+                if started:
+                    raise  # fragments déjà transmis : pas de bascule possible
+                last_error = e
+                print(f"WARNING: Fournisseur LLM {provider.name} en échec ({type(e).__name__}), bascule.")
+                continue
+            provider.stats.record(time.monotonic() - start, ok=True)
+            provider.breaker.record_success()
+            return
+        raise last_error or asyncio.TimeoutError("budget de latence épuisé")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "primary": self.primary,
+            "hedges_sent": self.hedges_sent,
+            "providers": {
+                p.name: {
+                    "model": p.model,
+                    "json_mode": p.json_mode,
+                    "available": p.available(),
+                    "breaker": p.breaker.state,
+                    **p.stats.snapshot(),
+                }
+                for p in self.providers
+            },
+        }
+
+
+def _build_pool() -> ProviderPool:
+    names = [n.strip().lower() for n in Config.LLM_PROVIDERS.split(",") if n.strip()]
+    primary = Config.LLM_PROVIDER.lower()
+    if primary not in names:
+        names.insert(0, primary)
+    return ProviderPool([_build_provider(n, primary) for n in names], primary)
+
+
+# Instance globale
+provider_pool = _build_pool()
@@ -0,0 +1,177 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+import openai
+
+
+class CircuitOpenError(Exception):
+    """Le disjoncteur est ouvert : le service est considéré indisponible."""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur simple (fermé → ouvert → semi-ouvert).
+
+    Après `failure_threshold` échecs consécutifs, le circuit s'ouvre et les
+    appels échouent immédiatement pendant `reset_timeout` secondes. Ensuite
+    un nombre limité d'appels de test passe (semi-ouvert) : un succès
+    referme le circuit, un échec le rouvre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def _refresh(self, now: float) -> None:
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+
+    def allow(self) -> bool:
+        """Vrai si un appel peut être tenté maintenant."""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._half_open_calls = 0
+
+    def release_probe(self) -> None:
+        """Rend un appel de test semi-ouvert abandonné sans verdict (ex: annulation)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 30) -> CircuitBreaker:
+    """Disjoncteur partagé par nom (ex: un par fournisseur LLM)."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.stats() for b in breakers}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Erreurs transitoires seulement : délais, connexion, 408/409/429 et 5xx."""
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError,
+                          httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Backoff exponentiel avec jitter complet."""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+async def call_with_resilience(fn: Callable[[], Awaitable[Any]], *, budget: float,
+                               max_retries: int = 2, backoff_base: float = 0.5,
+                               backoff_max: float = 4.0,
+                               breaker: Optional[CircuitBreaker] = None) -> Any:
+    """
+    Exécute `fn` avec un budget de latence total (tentatives + attentes),
+    des nouvelles tentatives uniquement pour les erreurs transitoires et un
+    disjoncteur optionnel qui échoue immédiatement si le service est malade.
+    """
+    deadline = time.monotonic() + budget
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError(f"budget de latence ({budget:.0f}s) épuisé")
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"{breaker.name} indisponible (circuit ouvert)")
+
+        try:
+            result = await asyncio.wait_for(fn(), timeout=remaining)
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                # Erreur côté requête (400, 401...) : le service a répondu, il est joignable
+                if breaker is not None:
+                    breaker.record_success()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            delay = backoff_delay(attempt, backoff_base, backoff_max)
+            if attempt >= max_retries or time.monotonic() + delay >= deadline:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+        return result
@@ -0,0 +1,263 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from app.utils.text import hashed_vector, normalize_query, query_signature
+
+
+class _ScopeIndex:
+    """
+    Index vectoriel d'un périmètre (région, sol, agent, nombres et cultures cités).
+
+    Les vecteurs sont stockés dans une matrice NumPy contiguë qui grandit par
+    doublement jusqu'à `max_entries`, puis fonctionne en tampon circulaire
+    (la plus ancienne entrée est remplacée). Au-delà de `brute_force_limit`
+    entrées, la recherche passe par un index LSH (hyperplans aléatoires,
+    plusieurs tables) pour rester sous la milliseconde.
+    """
+
+    def __init__(self, dim: int, max_entries: int, planes: np.ndarray, tables: int, bits: int):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.planes = planes
+        self.tables = tables
+        self.bits = bits
+        self._powers = (1 << np.arange(bits)).astype(np.int64)
+
+        capacity = min(16, max_entries)  # périmètres nombreux et souvent petits (une superficie, une culture)
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.expires = np.zeros(capacity, dtype=np.float64)
+        self.responses: list = [None] * capacity
+        self.queries: list = [None] * capacity
+        self.codes: list = [None] * capacity
+        self.buckets = [dict() for _ in range(tables)]
+        self.exact: Dict[str, int] = {}
+        self.size = 0
+        self._next = 0
+        self.latest_expiry = 0.0  # périmètre entièrement expiré au-delà : supprimé
+
+    def _codes(self, vec: np.ndarray) -> Tuple[int, ...]:
+        signs = (self.planes @ vec > 0).reshape(self.tables, self.bits)
+        return tuple(int(c) for c in signs @ self._powers)
+
+    def _grow(self) -> None:
+        capacity = min(len(self.responses) * 2, self.max_entries)
+        extra = capacity - len(self.responses)
+        self.vectors = np.vstack([self.vectors, np.zeros((extra, self.dim), dtype=np.float32)])
+        self.expires = np.concatenate([self.expires, np.zeros(extra, dtype=np.float64)])
+        self.responses.extend([None] * extra)
+        self.queries.extend([None] * extra)
+        self.codes.extend([None] * extra)
+
+    def _unlink(self, row: int) -> None:
+        old_query = self.queries[row]
+        if old_query is not None and self.exact.get(old_query) == row:
+            del self.exact[old_query]
+        if self.codes[row] is not None:
+            for table, code in enumerate(self.codes[row]):
+                bucket = self.buckets[table].get(code)
+                if bucket is not None:
+                    bucket.discard(row)
+                    if not bucket:
+                        del self.buckets[table][code]
+
+    def add(self, normalized: str, vec: np.ndarray, response: str, expires_at: float) -> None:
+        row = self.exact.get(normalized)
+        if row is None:
+            if self.size == len(self.responses) and self.size < self.max_entries:
+                self._grow()
+            row = self._next
+            self._next = (self._next + 1) % self.max_entries
+            self.size = min(self.size + 1, self.max_entries)
+        self._unlink(row)
+
+        codes = self._codes(vec)
+        self.vectors[row] = vec
+        self.expires[row] = expires_at
+        self.responses[row] = response
+        self.queries[row] = normalized
+        self.codes[row] = codes
+        self.latest_expiry = max(self.latest_expiry, expires_at)
+        self.exact[normalized] = row
+        for table, code in enumerate(codes):
+            self.buckets[table].setdefault(code, set()).add(row)
+
+    def search(self, normalized: str, vec: np.ndarray, now: float, brute_force_limit: int) -> Tuple[Optional[int], float]:
+        row = self.exact.get(normalized)
+        if row is not None and self.expires[row] > now:
+            return row, 1.0
+        if self.size == 0:
+            return None, 0.0
+
+        if self.size <= brute_force_limit:
+            # Petit périmètre : produit matrice-vecteur direct, sans copie
+            sims = self.vectors[:self.size] @ vec
+            sims[self.expires[:self.size] <= now] = -1.0
+            best = int(np.argmax(sims))
+            return best, float(sims[best])
+
+        rows = set()
+        for table, code in enumerate(self._codes(vec)):
+            rows.update(self.buckets[table].get(code, ()))
+        if not rows:
+            return None, 0.0
+        candidates = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        sims = self.vectors[candidates] @ vec
+        sims[self.expires[candidates] <= now] = -1.0
+        best = int(np.argmax(sims))
+        return int(candidates[best]), float(sims[best])
+
+
+class SemanticCache:
+    """
+    Cache sémantique local des réponses d'agents, par (région, sol, agent).
+
+    Les questions sont normalisées (accents, mots vides, synonymes) puis
+    vectorisées par hachage de n-grammes de caractères ; une réponse en cache
+    est réutilisée si la similarité cosinus dépasse `threshold`. Ainsi
+    « Quand planter le maïs ? » et « quand semer du mais » partagent la même
+    réponse, sans aucun service externe.
+
+    Les nombres et cultures cités (query_signature) font partie du périmètre :
+    « engrais pour 2 ha de maïs » ne réutilise jamais la dose calculée pour
+    20 ha, ni la réponse sur le cacao pour une question sur la tomate. Le
+    type de sol déclaré aussi (rotation, amendements, prompt des agents) :
+    une question reformulée n'obtient jamais la réponse faite pour un autre sol.
+
+    Les périmètres sont donc nombreux : au-delà de `max_total_entries`
+    entrées, les moins récemment utilisés sont supprimés (LRU), et un
+    périmètre dont toutes les entrées ont expiré est supprimé à la lecture
+    ou lors du balayage périodique (toutes les `sweep_interval` secondes).
+    """
+
+    def __init__(self, dim: int = 256, threshold: float = 0.92, max_entries_per_scope: int = 20000,
+                 ttl: float = 3600, lsh_tables: int = 12, lsh_bits: int = 16,
+                 brute_force_limit: int = 4096, seed: int = 13,
+                 max_total_entries: int = 100000, sweep_interval: float = 60):
+        self.dim = dim
+        self.threshold = threshold
+        self.max_entries_per_scope = max_entries_per_scope
+        self.ttl = ttl
+        self.lsh_tables = lsh_tables
+        self.lsh_bits = lsh_bits
+        self.brute_force_limit = brute_force_limit
+        self.max_total_entries = max_total_entries
+        self.sweep_interval = sweep_interval
+
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((lsh_tables * lsh_bits, dim)).astype(np.float32)
+        self._scopes: "OrderedDict[Tuple[str, str, str, Tuple[str, ...]], _ScopeIndex]" = OrderedDict()
+        self._entries = 0
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evicted_scopes = 0
+        self.expired_scopes = 0
+
+    @staticmethod
+    def _scope_key(region: str, soil_type: Optional[str], agent: str,
+                   query: str) -> Tuple[str, str, str, Tuple[str, ...]]:
+        return (normalize_query(region or ""), normalize_query(soil_type or ""), agent,
+                query_signature(query))
+
+    def _drop(self, key) -> None:
+        self._entries -= self._scopes.pop(key).size
+
+    def _sweep(self, now: float) -> None:
+        """Supprime les périmètres entièrement expirés (appelé sous verrou)."""
+        self._next_sweep = now + self.sweep_interval
+        for key in [k for k, scope in self._scopes.items() if scope.latest_expiry <= now]:
+            self._drop(key)
+            self.expired_scopes += 1
+
+    def lookup(self, query: str, region: str, agent: str, threshold: Optional[float] = None,
+               soil_type: Optional[str] = None) -> Optional[str]:
+        """Réponse en cache la plus proche, si sa similarité atteint `threshold` (seuil du cache par défaut)."""
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize_query(query)
+        if not normalized:
+            return None
+        vec = hashed_vector(normalized, self.dim)
+        now = time.monotonic()
+        with self._lock:
+            key = self._scope_key(region, soil_type, agent, query)
+            scope = self._scopes.get(key)
+            if scope is not None and scope.latest_expiry <= now:
+                self._drop(key)
+                self.expired_scopes += 1
+                scope = None
+            if scope is None:
+                self.misses += 1
+                return None
+            self._scopes.move_to_end(key)
+            row, similarity = scope.search(normalized, vec, now, self.brute_force_limit)
+            if row is None or similarity < threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return scope.responses[row]
+
+    def store(self, query: str, region: str, agent: str, response: str, ttl: Optional[float] = None,
+              soil_type: Optional[str] = None) -> None:
+        normalized = normalize_query(query)
+        if not normalized or not response:
+            return
+        vec = hashed_vector(normalized, self.dim)
+        now = time.monotonic()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            key = self._scope_key(region, soil_type, agent, query)
+            scope = self._scopes.get(key)
+            if scope is None:
+                scope = _ScopeIndex(self.dim, self.max_entries_per_scope, self._planes,
+                                    self.lsh_tables, self.lsh_bits)
+                self._scopes[key] = scope
+            else:
+                self._scopes.move_to_end(key)
+            size = scope.size
+            scope.add(normalized, vec, response, expires_at)
+            self._entries += scope.size - size
+            self.stores += 1
+            # Budget global : périmètres les moins récemment utilisés supprimés
+            while self._entries > self.max_total_entries and len(self._scopes) > 1:
+                self._drop(next(iter(self._scopes)))
+                self.evicted_scopes += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+            self._entries = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "scopes": len(self._scopes),
+                "entries": self._entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evicted_scopes": self.evicted_scopes,
+                "expired_scopes": self.expired_scopes,
+            }
+
+
+# Instance globale
+semantic_cache = SemanticCache(
+    dim=Config.SEMANTIC_CACHE_DIM,
+    threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+    max_entries_per_scope=Config.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=Config.SEMANTIC_CACHE_TTL,
+    max_total_entries=Config.SEMANTIC_CACHE_MAX_TOTAL_ENTRIES,
+)
@@ -0,0 +1,83 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class LeaderCancelled(Exception):
+    """L'appel partagé a été annulé côté meneur : les suiveurs doivent relancer."""
+
+
+class SingleFlight:
+    """
+    Déduplication des appels identiques en cours (« single-flight »).
+
+    Le premier appelant pour une clé (le meneur) exécute la coroutine ; les
+    appelants concurrents avec la même clé attendent le même résultat au lieu
+    de relancer l'appel. Les erreurs sont propagées à tous les appelants et ne
+    sont jamais conservées : l'appel suivant repart de zéro.
+
+    Le futur partagé est un `concurrent.futures.Future`, ce qui permet de
+    dédupliquer aussi entre threads gunicorn (une boucle asyncio par requête).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, concurrent.futures.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.errors = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            with self._lock:
+                shared = self._calls.get(key)
+                if shared is None:
+                    shared = concurrent.futures.Future()
+                    self._calls[key] = shared
+                    self.leaders += 1
+                    is_leader = True
+                else:
+                    self.followers += 1
+                    is_leader = False
+
+            if is_leader:
+                return await self._lead(key, shared, fn)
+
+            try:
+                # shield : l'annulation d'un suiveur ne doit pas annuler l'appel partagé
+                return await asyncio.shield(asyncio.wrap_future(shared))
+            except LeaderCancelled:
+                continue
+
+    async def _lead(self, key: str, shared: concurrent.futures.Future, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._release(key)
+            shared.set_exception(LeaderCancelled())
+            raise
+        except BaseException as e:
+            self._release(key)
+            self.errors += 1
+            shared.set_exception(e)
+            raise
+        self._release(key)
+        shared.set_result(result)
+        return result
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight(),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "errors": self.errors,
+        }
@@ -0,0 +1,110 @@
+"""Normalisation et vectorisation légère des questions (sans service externe)."""
+
+import re
+import unicodedata
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+# Mots vides français fréquents dans les questions d'agriculteurs
+STOPWORDS = {
+    "le", "la", "les", "l", "un", "une", "des", "du", "de", "d", "au", "aux",
+    "et", "ou", "a", "en", "pour", "par", "sur", "dans", "avec", "ce", "cette",
+    "ces", "mon", "ma", "mes", "je", "j", "tu", "il", "on", "nous", "vous",
+    "est", "sont", "que", "qu", "qui", "se", "s", "y", "me", "m",
+    "ils", "elle", "t", "c", "svp", "stp", "merci", "bonjour",
+}
+
+# Variantes ramenées à un terme canonique (après suppression des accents)
+SYNONYMS = {
+    "semer": "planter", "seme": "planter", "semis": "planter", "semences": "planter",
+    "plante": "planter", "plantation": "planter",
+    "fertilisant": "engrais", "fertilisants": "engrais",
+    "cout": "prix", "coute": "prix", "coutent": "prix", "tarif": "prix",
+    "maladies": "maladie", "arroser": "irriguer", "arrosage": "irriguer", "irrigation": "irriguer",
+}
+
+# Cultures (sans accents, pluriels et noms d'arbres compris) : termes qui changent la réponse.
+# Le maïs est traité à part dans query_signature (« mais » est aussi une conjonction)
+CROPS = {
+    "cacao": "cacao", "cacaoyer": "cacao", "cacaoyers": "cacao",
+    "cafe": "cafe", "cafeier": "cafe", "cafeiers": "cafe",
+    "manioc": "manioc", "arachide": "arachide", "arachides": "arachide",
+    "tomate": "tomate", "tomates": "tomate", "banane": "banane", "bananes": "banane",
+    "bananier": "banane", "bananiers": "banane", "plantain": "plantain", "plantains": "plantain",
+    "macabo": "macabo", "taro": "taro", "igname": "igname", "ignames": "igname",
+    "haricot": "haricot", "haricots": "haricot", "pomme": "pomme", "pommes": "pomme",
+    "sorgho": "sorgho", "mil": "mil", "riz": "riz", "soja": "soja", "coton": "coton",
+    "piment": "piment", "piments": "piment", "oignon": "oignon", "oignons": "oignon",
+    "gombo": "gombo", "palmier": "palmier", "palmiers": "palmier", "ananas": "ananas",
+    "hevea": "hevea", "poivre": "poivre", "patate": "patate", "patates": "patate",
+}
+
+# Déterminants qui font de « mais » (sans accent) le nom de la culture
+_MAIZE_DETERMINERS = {"le", "l", "du", "de", "d", "au", "mon", "ton", "son", "notre", "votre", "leur", "ce", "un"}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_WORDS = re.compile(r"[^\W_]+")
+
+
+def fold_accents(text: str) -> str:
+    """Supprime les accents : 'maïs' → 'mais', 'Extrême' → 'Extreme'."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Minuscules, sans accents ni ponctuation."""
+    return [t for t in _NON_ALNUM.split(fold_accents(text).lower()) if t]
+
+
+def normalize_query(text: str) -> str:
+    """Forme canonique d'une question : sans accents, mots vides ni ponctuation, synonymes unifiés."""
+    tokens = [SYNONYMS.get(t, t) for t in tokenize(text) if t not in STOPWORDS]
+    return " ".join(tokens)
+
+
+def query_signature(text: str) -> Tuple[str, ...]:
+    """
+    Nombres et cultures d'une question (texte brut). La similarité n-grammes
+    les voit à peine (« 2 hectares » ≈ « 20 hectares », « cacao » ≈ « tomate »
+    dans une longue question) : deux questions ne sont voisines que si leurs
+    signatures sont identiques.
+
+    « mais » sans accent est d'abord la conjonction : il ne compte comme
+    culture qu'écrit « maïs » ou précédé d'un déterminant (« planter le mais »).
+    """
+    words = _WORDS.findall(text.lower())
+    terms = []
+    for i, word in enumerate(words):
+        folded = fold_accents(word)
+        if folded.isdigit():
+            terms.append(folded)
+        elif folded == "mais":
+            if word != folded or (i and fold_accents(words[i - 1]) in _MAIZE_DETERMINERS):
+                terms.append("mais")
+        elif folded in CROPS:
+            terms.append(CROPS[folded])
+    return tuple(sorted(terms))
+
+
+def char_ngrams(text: str, n_min: int = 3, n_max: int = 4) -> List[str]:
+    padded = f" {text} "
+    return [padded[i:i + n] for n in range(n_min, n_max + 1) for i in range(len(padded) - n + 1)]
+
+
+def hashed_vector(normalized: str, dim: int = 256) -> np.ndarray:
+    """
+    Vecteur L2-normalisé par hachage signé des mots et n-grammes de caractères.
+    crc32 est stable entre processus (contrairement à hash()).
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    features = [f"w:{w}" for w in normalized.split()] + char_ngrams(normalized)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec
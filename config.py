@@ -3,6 +3,13 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_float(name, default=None):
+    """Flottant optionnel lu dans l'environnement (None si absent et sans défaut)."""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
 class Config:
     """Base config."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-agricultura-cm'
@@ -19,11 +26,168 @@ class Config:
     # Grok: grok-beta
     LLM_MODEL = os.environ.get('LLM_MODEL', 'google/gemini-2.0-flash-001')
     
+    # Pool multi-fournisseurs : LLM_PROVIDER reste le fournisseur principal (modèle LLM_MODEL),
+    # les autres fournisseurs listés servent de secours / requêtes hedgées avec leur propre modèle.
+    LLM_PROVIDERS = os.environ.get('LLM_PROVIDERS', LLM_PROVIDER)  # ex: "openrouter,grok,gemini"
+    LLM_PROVIDER_MODELS = {
+        'openrouter': os.environ.get('LLM_MODEL_OPENROUTER', 'google/gemini-2.0-flash-001'),
+        'grok': os.environ.get('LLM_MODEL_GROK', 'grok-beta'),
+        'openai': os.environ.get('LLM_MODEL_OPENAI', 'gpt-4o-mini'),
+    }
+    GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+    GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
+    
+    # Requêtes hedgées : doublon envoyé après un délai basé sur le p95 du fournisseur
+    LLM_HEDGE_ENABLED = os.environ.get('LLM_HEDGE_ENABLED', 'false').lower() == 'true'
+    LLM_HEDGE_KINDS = [k.strip() for k in os.environ.get('LLM_HEDGE_KINDS', 'route,extract').split(',') if k.strip()]
+    LLM_HEDGE_MIN_DELAY = float(os.environ.get('LLM_HEDGE_MIN_DELAY', 0.3))
+    LLM_HEDGE_MAX_DELAY = float(os.environ.get('LLM_HEDGE_MAX_DELAY', 2.0))
+    
     # Defaults
     DEFAULT_REGION = "Centre"
     DEFAULT_LANGUAGE = "fr"
     CACHE_TIMEOUT = 3600  # 1 hour
     
+    # Pool de connexions HTTP partagé vers les fournisseurs LLM
+    LLM_HTTP_MAX_CONNECTIONS = int(os.environ.get('LLM_HTTP_MAX_CONNECTIONS', 20))
+    LLM_HTTP_MAX_KEEPALIVE = int(os.environ.get('LLM_HTTP_MAX_KEEPALIVE', 10))
+    LLM_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get('LLM_HTTP_KEEPALIVE_EXPIRY', 60))
+    LLM_HTTP_TIMEOUT = float(os.environ.get('LLM_HTTP_TIMEOUT', 60))
+    LLM_HTTP_CONNECT_TIMEOUT = float(os.environ.get('LLM_HTTP_CONNECT_TIMEOUT', 5))
+    LLM_HTTP2 = os.environ.get('LLM_HTTP2', 'false').lower() == 'true'  # nécessite httpx[http2]
+    LLM_PREWARM = os.environ.get('LLM_PREWARM', 'true').lower() == 'true'
+
+    # Client HTTP Open-Meteo partagé (pool keep-alive sur la boucle d'E/S du processus)
+    WEATHER_HTTP_TIMEOUT = float(os.environ.get('WEATHER_HTTP_TIMEOUT', 10))
+    WEATHER_HTTP_MAX_CONNECTIONS = int(os.environ.get('WEATHER_HTTP_MAX_CONNECTIONS', 10))
+    # Rafraîchissement groupé du cache météo de toutes les régions, avant expiration (refresh-ahead)
+    WEATHER_REFRESH_ENABLED = os.environ.get('WEATHER_REFRESH_ENABLED', 'true').lower() == 'true'
+    WEATHER_REFRESH_AHEAD = float(os.environ.get('WEATHER_REFRESH_AHEAD', 120))  # secondes avant expiration
+    WEATHER_REFRESH_RETRY = float(os.environ.get('WEATHER_REFRESH_RETRY', 60))  # délai après un échec
+    # Pannes Open-Meteo : cache négatif par région et disjoncteur (normales climatiques tant qu'il est ouvert)
+    WEATHER_NEGATIVE_TTL = float(os.environ.get('WEATHER_NEGATIVE_TTL', 30))  # secondes sans réessayer une région
+    WEATHER_BREAKER_FAILURES = int(os.environ.get('WEATHER_BREAKER_FAILURES', 3))  # pannes consécutives avant ouverture
+    WEATHER_BREAKER_RESET = float(os.environ.get('WEATHER_BREAKER_RESET', 30))  # secondes avant l'appel de test
+    
+    # Limiteur global des appels LLM sortants (par processus)
+    LLM_MAX_IN_FLIGHT = int(os.environ.get('LLM_MAX_IN_FLIGHT', 8))
+    LLM_REQUESTS_PER_SECOND = float(os.environ.get('LLM_REQUESTS_PER_SECOND', 5))
+    LLM_TOKENS_PER_MINUTE = int(os.environ.get('LLM_TOKENS_PER_MINUTE', 200000))
+    
+    # Profils d'appel LLM par classe : modèle, plafond de tokens de sortie, température
+    # (None = valeur par défaut du fournisseur) et budget de latence (secondes, nouvelles
+    # tentatives comprises). Le modèle du profil s'applique au fournisseur principal ;
+    # les fournisseurs de secours gardent leur propre modèle.
+    LLM_PROFILES = {
+        "route": {
+            "model": os.environ.get('LLM_MODEL_ROUTE', LLM_MODEL),
+            "max_tokens": int(os.environ.get('LLM_MAX_TOKENS_ROUTE', 32)),
+            "temperature": _env_float('LLM_TEMPERATURE_ROUTE', 0.0),
+            "timeout": float(os.environ.get('LLM_TIMEOUT_ROUTE', 8)),
+        },
+        "extract": {
+            "model": os.environ.get('LLM_MODEL_EXTRACT', LLM_MODEL),
+            "max_tokens": int(os.environ.get('LLM_MAX_TOKENS_EXTRACT', 256)),
+            "temperature": _env_float('LLM_TEMPERATURE_EXTRACT', 0.0),
+            "timeout": float(os.environ.get('LLM_TIMEOUT_EXTRACT', 10)),
+        },
+        "tool": {
+            "model": os.environ.get('LLM_MODEL_TOOL', LLM_MODEL),
+            "max_tokens": int(os.environ.get('LLM_MAX_TOKENS_TOOL', 600)),
+            "temperature": _env_float('LLM_TEMPERATURE_TOOL'),
+            "timeout": float(os.environ.get('LLM_TIMEOUT_TOOL', 25)),
+        },
+        "synthesize": {
+            "model": os.environ.get('LLM_MODEL_SYNTHESIZE', LLM_MODEL),
+            "max_tokens": int(os.environ.get('LLM_MAX_TOKENS_SYNTHESIZE', 1200)),
+            "temperature": _env_float('LLM_TEMPERATURE_SYNTHESIZE'),
+            "timeout": float(os.environ.get('LLM_TIMEOUT_SYNTHESIZE', 30)),
+        },
+    }
+    
+    # Sortie structurée des extractions : 'json_schema', 'json_object' ou 'off'.
+    # Un fournisseur qui refuse le mode demandé passe automatiquement au suivant.
+    LLM_JSON_MODE = os.environ.get('LLM_JSON_MODE', 'json_schema').lower()
+    
+    # Résilience des appels LLM : backoff et disjoncteur par fournisseur
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 2))
+    LLM_BACKOFF_BASE = float(os.environ.get('LLM_BACKOFF_BASE', 0.5))
+    LLM_BACKOFF_MAX = float(os.environ.get('LLM_BACKOFF_MAX', 4))
+    LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+    LLM_BREAKER_RESET = float(os.environ.get('LLM_BREAKER_RESET', 30))
+    
+    # Cache des réponses LLM (LRU + TTL, par worker)
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 1000))
+    LLM_CACHE_MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES', 8 * 1024 * 1024))  # 8 Mo
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 300))  # 5 minutes
+    LLM_FALLBACK_CACHE_TTL = int(os.environ.get('LLM_FALLBACK_CACHE_TTL', 30))  # réponse d'un fournisseur de secours
+    LLM_CACHE_SWEEP_INTERVAL = int(os.environ.get('LLM_CACHE_SWEEP_INTERVAL', 60))
+    
+    # Cache LLM persistant (SQLite WAL), partagé entre workers et redémarrages
+    LLM_DISK_CACHE_ENABLED = os.environ.get('LLM_DISK_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_DISK_CACHE_PATH = os.environ.get(
+        'LLM_DISK_CACHE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'llm_cache.sqlite3')
+    )
+    LLM_DISK_CACHE_MAX_BYTES = int(os.environ.get('LLM_DISK_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 64 Mo compressés
+    LLM_DISK_CACHE_TTL = int(os.environ.get('LLM_DISK_CACHE_TTL', CACHE_TIMEOUT))
+    LLM_CACHE_WARM_ENTRIES = int(os.environ.get('LLM_CACHE_WARM_ENTRIES', 200))
+    
+    # Cache sémantique des réponses d'agents (questions reformulées), par région et agent
+    SEMANTIC_CACHE_ENABLED = os.environ.get('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true'
+    SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', 0.92))
+    SEMANTIC_CACHE_DIM = int(os.environ.get('SEMANTIC_CACHE_DIM', 256))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get('SEMANTIC_CACHE_MAX_ENTRIES', 20000))  # par périmètre
+    SEMANTIC_CACHE_MAX_TOTAL_ENTRIES = int(os.environ.get('SEMANTIC_CACHE_MAX_TOTAL_ENTRIES', 100000))  # tous périmètres (LRU)
+    SEMANTIC_CACHE_TTL = int(os.environ.get('SEMANTIC_CACHE_TTL', 900))  # aligné sur le cache météo
+    
+    # Routeur local (mots-clés + classifieur) : le LLM n'est consulté que sous le seuil de confiance
+    ROUTER_LOCAL_ENABLED = os.environ.get('ROUTER_LOCAL_ENABLED', 'true').lower() == 'true'
+    ROUTER_CONFIDENCE_THRESHOLD = float(os.environ.get('ROUTER_CONFIDENCE_THRESHOLD', 0.75))
+    ROUTER_LOG_PATH = os.environ.get(
+        'ROUTER_LOG_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'routing_log.jsonl')
+    )
+    # Routage fusionné : l'appel LLM de routage retourne aussi intent + entités de chaque agent
+    ROUTER_FUSED = os.environ.get('ROUTER_FUSED', 'true').lower() == 'true'
+    ROUTER_DIM = int(os.environ.get('ROUTER_DIM', 512))
+    ROUTER_MIN_SAMPLES = int(os.environ.get('ROUTER_MIN_SAMPLES', 50))  # avant d'activer le classifieur
+    ROUTER_RETRAIN_EVERY = int(os.environ.get('ROUTER_RETRAIN_EVERY', 100))  # nouveaux exemples
+    
+    # Préparation spéculative des agents probables pendant le routage LLM
+    SPECULATION_ENABLED = os.environ.get('SPECULATION_ENABLED', 'true').lower() == 'true'
+    SPECULATION_TOP_K = int(os.environ.get('SPECULATION_TOP_K', 2))
+    SPECULATION_MIN_PRIOR = float(os.environ.get('SPECULATION_MIN_PRIOR', 0.2))
+    SPECULATION_MAX_IN_FLIGHT = int(os.environ.get('SPECULATION_MAX_IN_FLIGHT', 4))  # par processus
+
+    # Budget de latence par requête (secondes), surchargeable dans le corps de la requête (budget_s)
+    REQUEST_BUDGET = float(os.environ.get('REQUEST_BUDGET', 25))
+    REQUEST_BUDGET_MAX = float(os.environ.get('REQUEST_BUDGET_MAX', 60))
+    SYNTHESIS_MIN_TIME = float(os.environ.get('SYNTHESIS_MIN_TIME', 4))  # temps restant minimal pour la synthèse LLM
+    # Similarité suffisante pour servir une réponse en cache voisine quand un agent dépasse l'échéance
+    DEADLINE_FALLBACK_THRESHOLD = float(os.environ.get('DEADLINE_FALLBACK_THRESHOLD', 0.8))
+
+    # Synthèse multi-agents : 'llm', 'template' (locale, sans appel LLM) ou 'auto'
+    # ('template' dès que la file du limiteur LLM atteint SYNTHESIS_AUTO_QUEUE appels en attente)
+    SYNTHESIS_MODE = os.environ.get('SYNTHESIS_MODE', 'auto').lower()
+    SYNTHESIS_AUTO_QUEUE = int(os.environ.get('SYNTHESIS_AUTO_QUEUE', 1))
+    SYNTHESIS_MAX_WORDS = int(os.environ.get('SYNTHESIS_MAX_WORDS', 150))
+
+    # Lots de questions (/api/query/batch) : taille maximale et questions traitées en parallèle
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 500))
+    BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 8))
+
+    # Tâches asynchrones (/api/jobs) : file persistante SQLite partagée entre workers
+    JOBS_ENABLED = os.environ.get('JOBS_ENABLED', 'true').lower() == 'true'
+    JOB_STORE_PATH = os.environ.get(
+        'JOB_STORE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'jobs.sqlite3')
+    )
+    JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', 4))  # tâches exécutées en parallèle par worker
+    JOB_TIMEOUT = float(os.environ.get('JOB_TIMEOUT', 180))  # durée maximale d'une tâche (secondes)
+    JOB_TTL = int(os.environ.get('JOB_TTL', 3600))  # conservation d'une tâche et de son résultat
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    
     # Feature flags
     ENABLE_WEB_INTERFACE = True
     ENABLE_API = True
@@ -6,8 +6,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.core.orchestrator import AgentOrchestrator
 from app.agents.base_agent import BaseAgent
+from app.core.context import RequestContext
 from app.services.gemini_service import GeminiService
-from typing import Dict, Any
 
 # Création d'un agent personnalisé à la volée
 class CustomExpertAgent(BaseAgent):
@@ -17,7 +17,7 @@ class CustomExpertAgent(BaseAgent):
             description="Expert en pédologie (étude des sols)."
         )
     
-    async def process(self, query: str, context: Dict[str, Any]) -> str:
+    async def process(self, query: str, context: RequestContext, extracted=None) -> str:
         # Logique personnalisée sans passer par Gemini pour cet exemple
         return "Analyse des sols: Sols ferrugineux tropicaux lessivés. Recommandation: Apport de matière organique."
 
@@ -34,7 +34,7 @@ async def main():
     # On force le routage pour l'exemple (bypass de Gemini pour le routing)
     # Dans la réalité, l'orchestrateur utiliserait Gemini pour choisir cet agent si la description match
     print(f"Appel direct de l'agent {custom_agent.name}...")
-    response = await custom_agent.process(query, {})
+    response = await custom_agent.process(query, RequestContext(soil_type="ferrugineux"))
     
     print(f"Réponse: {response}")
 
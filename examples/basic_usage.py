@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app.core.orchestrator import AgentOrchestrator
 from app.agents.weather import WeatherAgent
 from app.agents.crop import CropAgent
+from app.core.context import RequestContext
 
 async def main():
     print("--- Exemple d'utilisation basique ---\n")
@@ -16,8 +17,8 @@ async def main():
     agents = [WeatherAgent(), CropAgent()] # On n'utilise que 2 agents pour cet exemple
     orchestrator = AgentOrchestrator(agents)
     
-    # 2. Définition du contexte
-    orchestrator.update_context('region', 'Nord')
+    # 2. Définition du contexte (propre à chaque requête)
+    context = RequestContext(region='Nord')
     
     # 3. Requête
     query = "Est-ce le bon moment pour planter du coton ?"
@@ -26,7 +27,7 @@ async def main():
     
     # 4. Traitement
     print("Consultation des agents...")
-    responses = await orchestrator.handle_query(query)
+    responses = await orchestrator.handle_query(query, context)
     
     for name, resp in responses.items():
         print(f"\n[Réponse de {name}]:\n{resp}")
@@ -8,8 +8,10 @@ from app.agents.health import HealthAgent
 from app.agents.economic import EconomicAgent
 from app.agents.resources import ResourcesAgent
 from app.core.orchestrator import AgentOrchestrator
+from app.core.context import RequestContext
+from config import Config
 
-def run_cli(query, region):
+def run_cli(query, region, stream=False):
     print(f"--- Mode CLI - Agriculture Cameroun ---")
     print(f"Région: {region}")
     print(f"Question: {query}")
@@ -23,22 +25,42 @@ def run_cli(query, region):
         ResourcesAgent()
     ]
     orchestrator = AgentOrchestrator(agents)
-    orchestrator.update_context('region', region)
+    context = RequestContext(region=region).with_budget(Config.REQUEST_BUDGET)
 
     async def _process():
-        agent_responses = await orchestrator.handle_query(query)
-        print(f"Agents consultés: {', '.join(agent_responses.keys())}\n")
+        result = await orchestrator.answer(query, context)
+        print(f"Agents consultés: {', '.join(result.responses.keys())}\n")
         
-        for name, resp in agent_responses.items():
+        for name, resp in result.responses.items():
             print(f"--- {name} ---")
             print(resp)
             print()
             
         print("--- Synthèse Finale ---")
-        final = await orchestrator.synthesize_response(query, agent_responses)
-        print(final)
+        print(result.final_response)
+        if result.degraded:
+            print(f"\n(Mode dégradé : {', '.join(result.degraded)})")
 
-    asyncio.run(_process())
+    async def _stream():
+        # Affichage progressif : chaque agent dès sa réponse, puis la synthèse au fil de l'eau
+        synthesizing = False
+        async for event in orchestrator.stream_query(query, context):
+            data = event["data"]
+            if event["event"] == "routing":
+                print(f"Agents consultés: {', '.join(data['agents'])}\n")
+            elif event["event"] == "agent":
+                print(f"--- {data['name']} ---")
+                print(data["response"])
+                print()
+            elif event["event"] == "synthesis":
+                if not synthesizing:
+                    print("--- Synthèse Finale ---")
+                    synthesizing = True
+                print(data["delta"], end="", flush=True)
+            elif event["event"] == "done" and synthesizing:
+                print()
+
+    asyncio.run(_stream() if stream else _process())
 
 def run_web(port):
     app = create_app()
@@ -50,6 +72,7 @@ if __name__ == "__main__":
     parser.add_argument('mode', choices=['cli', 'web'], help="Mode de lancement (cli ou web)")
     parser.add_argument('--query', '-q', help="Question pour le mode CLI")
     parser.add_argument('--region', '-r', default='Centre', help="Région concernée (CLI)")
+    parser.add_argument('--stream', '-s', action='store_true', help="Affichage progressif des réponses (CLI)")
     parser.add_argument('--port', '-p', type=int, default=5000, help="Port pour le mode Web")
 
     args = parser.parse_args()
@@ -58,6 +81,6 @@ if __name__ == "__main__":
         if not args.query:
             print("Erreur: --query est requis en mode CLI")
         else:
-            run_cli(args.query, args.region)
+            run_cli(args.query, args.region, args.stream)
     elif args.mode == 'web':
         run_web(args.port)
@@ -0,0 +1,5 @@
+import os
+
+# Pas de journal de routage pendant les tests : sans cela, les décisions enregistrées
+# par une exécution entraîneraient le classifieur local et changeraient le routage des suivantes.
+os.environ.setdefault("ROUTER_LOG_PATH", "")
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from app.core.batch import run_batch
+from app.core.orchestrator import QueryResult
+
+
+class FakeOrchestrator:
+    """Orchestrateur factice : compte les appels et la concurrence maximale."""
+
+    def __init__(self, delay=0.01, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def answer(self, query, context=None):
+        self.calls.append((query, context.region))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if query == self.fail_on:
+                raise RuntimeError("panne")
+            return QueryResult({"CropAgent": f"réponse {query}"}, f"finale {query} ({context.region})")
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_equivalent_queries_are_computed_once():
+    orchestrator = FakeOrchestrator()
+    items = [
+        {"query": "Quand planter le maïs ?", "region": "Centre"},
+        {"query": "quand planter le mais", "region": "centre"},
+        {"query": "Quand planter le maïs ?", "region": "Nord"},
+    ]
+
+    result = await run_batch(orchestrator, items, concurrency=4)
+
+    assert len(orchestrator.calls) == 2
+    first, duplicate, other_region = result["results"]
+    assert duplicate["duplicate_of"] == 0
+    assert duplicate["final_response"] == first["final_response"]
+    assert "duplicate_of" not in other_region
+    assert result["stats"]["unique"] == 2
+    assert result["stats"]["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_order_is_preserved_and_concurrency_bounded():
+    orchestrator = FakeOrchestrator(delay=0.02)
+    items = [{"query": f"question {i}", "region": "Centre"} for i in range(10)]
+
+    result = await run_batch(orchestrator, items, concurrency=3)
+
+    assert orchestrator.max_in_flight == 3
+    assert [r["index"] for r in result["results"]] == list(range(10))
+    assert all(r["final_response"] == f"finale question {i} (Centre)" for i, r in enumerate(result["results"]))
+    assert all(r["latency_ms"] >= 15 for r in result["results"])
+
+
+@pytest.mark.asyncio
+async def test_failed_item_does_not_fail_batch():
+    orchestrator = FakeOrchestrator(fail_on="question 1")
+    items = [{"query": f"question {i}"} for i in range(3)]
+
+    result = await run_batch(orchestrator, items)
+
+    assert result["results"][1]["error"] == "panne"
+    assert "final_response" in result["results"][2]
+    assert result["stats"]["errors"] == 1
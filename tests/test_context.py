@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from config import Config
+from app.agents.base_agent import BaseAgent
+from app.core.context import RequestContext, get_current_context
+from app.core.orchestrator import AgentOrchestrator
+
+
+class EchoRegionAgent(BaseAgent):
+    """Agent de test : répond la région vue dans son contexte, après un temps d'attente."""
+
+    def __init__(self):
+        super().__init__(name="EchoAgent", description="Renvoie la région.")
+
+    async def process(self, query, context, extracted=None):
+        await asyncio.sleep(0.01)
+        current = get_current_context()
+        return f"{context.get('region')}|{current.region}|{current.trace_id}"
+
+
+def test_context_is_immutable_and_dict_like():
+    context = RequestContext(region="Nord", soil_type=None, trace_id="abc")
+    assert context.get("region") == "Nord"
+    assert context.get("soil_type", "ferralitique") == "ferralitique"
+    assert dict(context.items()) == {"region": "Nord"}
+    with pytest.raises(Exception):
+        context.region = "Centre"
+    assert context.replace(region="Centre").region == "Centre"
+    assert RequestContext.from_dict({"region": "Est", "inconnu": 1, "soil_type": ""}).region == "Est"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_do_not_share_region(monkeypatch):
+    monkeypatch.setattr(Config, "ROUTER_LOCAL_ENABLED", False)
+    monkeypatch.setattr(Config, "SPECULATION_ENABLED", False)
+    monkeypatch.setattr(Config, "SEMANTIC_CACHE_ENABLED", False)
+    orchestrator = AgentOrchestrator([EchoRegionAgent()])
+
+    async def fake_route(query, local=None, context=None):
+        return ["EchoAgent"], {}
+
+    monkeypatch.setattr(orchestrator, "route_and_extract", fake_route)
+
+    regions = ["Nord", "Centre", "Littoral", "Ouest"]
+    results = await asyncio.gather(*[
+        orchestrator.handle_query("question", RequestContext(region=r, trace_id=f"t-{r}"))
+        for r in regions
+    ])
+    for region, result in zip(regions, results):
+        assert result["EchoAgent"] == f"{region}|{region}|t-{region}"
+    assert get_current_context() is None
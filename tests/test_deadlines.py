@@ -0,0 +1,87 @@
+import asyncio
+import uuid
+import pytest
+from config import Config
+from app.agents.base_agent import BaseAgent
+from app.core.context import RequestContext, set_current_context, reset_current_context
+from app.core.orchestrator import AgentOrchestrator
+from app.services.llm_service import LLMService
+
+
+class TimedAgent(BaseAgent):
+    def __init__(self, name, delay):
+        super().__init__(name=name, description=name)
+        self.delay = delay
+
+    async def process(self, query, context, extracted=None):
+        await asyncio.sleep(self.delay)
+        return f"réponse {self.name}"
+
+    def fallback(self, query, context, extracted=None):
+        return f"repli {self.name}"
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    monkeypatch.setattr(Config, "SPECULATION_ENABLED", False)
+    monkeypatch.setattr(Config, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "SYNTHESIS_MIN_TIME", 0.2)
+    monkeypatch.setattr(Config, "SYNTHESIS_MODE", "llm")
+    orchestrator = AgentOrchestrator([TimedAgent("RapideAgent", 0.0), TimedAgent("LentAgent", 5.0)])
+
+    async def fake_route(query, local=None, context=None):
+        return ["RapideAgent", "LentAgent"], {}
+
+    monkeypatch.setattr(orchestrator, "route_and_extract", fake_route)
+    return orchestrator
+
+
+@pytest.mark.asyncio
+async def test_late_agent_is_replaced_and_synthesis_skipped(orchestrator):
+    context = RequestContext(region="Centre").with_budget(0.3)
+    result = await asyncio.wait_for(orchestrator.answer("question", context), timeout=2)
+    assert result.responses == {"RapideAgent": "réponse RapideAgent", "LentAgent": "repli LentAgent"}
+    assert result.degraded == ["LentAgent", "synthesis"]
+    assert "repli LentAgent" in result.final_response
+
+
+@pytest.mark.asyncio
+async def test_no_deadline_waits_for_every_agent(orchestrator):
+    orchestrator.agents["LentAgent"].delay = 0.05
+    responses = await orchestrator.handle_query("question", RequestContext())
+    assert responses["LentAgent"] == "réponse LentAgent"
+
+
+@pytest.mark.asyncio
+async def test_llm_call_skipped_once_request_deadline_passed(monkeypatch):
+    monkeypatch.setattr(Config, "OPENROUTER_API_KEY", "test-key")
+    service = LLMService()
+    token = set_current_context(RequestContext().replace(deadline=0.0))
+    try:
+        response = await service.generate_response(f"Météo ? {uuid.uuid4()}")
+    finally:
+        reset_current_context(token)
+    assert "échéance" in response
+
+
+@pytest.mark.asyncio
+async def test_llm_synthesis_error_falls_back_to_template(orchestrator, monkeypatch):
+    orchestrator.agents["LentAgent"].delay = 0.0
+
+    async def failing_llm(prompt, **kwargs):
+        return "Service IA non configuré."
+
+    async def failing_stream(prompt, **kwargs):
+        yield "Erreur LLM (openrouter): délai dépassé"
+
+    monkeypatch.setattr(orchestrator.llm_service, "generate_response", failing_llm)
+    monkeypatch.setattr(orchestrator.llm_service, "generate_stream", failing_stream)
+
+    result = await orchestrator.answer("question", RequestContext())
+    assert result.degraded == ["synthesis"]
+    assert "réponse LentAgent" in result.final_response and "Service IA" not in result.final_response
+
+    events = [event async for event in orchestrator.stream_query("question", RequestContext())]
+    done = events[-1]["data"]
+    assert done["degraded"] == ["synthesis"] and "Erreur LLM" not in done["final_response"]
+    assert not any(event["event"] == "synthesis" for event in events)
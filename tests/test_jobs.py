@@ -0,0 +1,106 @@
+import asyncio
+import time
+import pytest
+from app.core.jobs import JobQueue
+from app.services.job_store import JobStore
+
+
+def wait_for_status(queue, job_id, statuses=("done", "failed"), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Tâche {job_id} toujours {job['status']}")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3"), ttl=60), concurrency=2, timeout=1, poll_interval=0.05)
+
+    async def echo(payload):
+        await asyncio.sleep(payload.get("delay", 0))
+        if payload.get("fail"):
+            raise RuntimeError("panne")
+        return {"echo": payload["query"]}
+
+    queue.register("echo", echo)
+    yield queue
+    queue.stop()
+
+
+def test_submitted_job_runs_in_background(queue):
+    job, created = queue.submit("echo", {"query": "Plan de suivi du maïs"})
+
+    assert created and job["status"] == "queued"
+    done = wait_for_status(queue, job["id"])
+    assert done["status"] == "done"
+    assert done["result"] == {"echo": "Plan de suivi du maïs"}
+    assert queue.stats()["completed"] == 1
+
+
+def test_idempotency_key_returns_existing_job(queue):
+    first, created = queue.submit("echo", {"query": "a"}, idempotency_key="cle-1")
+    second, created_again = queue.submit("echo", {"query": "a"}, idempotency_key="cle-1")
+
+    assert created and not created_again
+    assert second["id"] == first["id"]
+    assert queue.stats()["idempotent_hits"] == 1
+
+
+def test_failures_and_timeouts_are_recorded(queue):
+    failing, _ = queue.submit("echo", {"query": "x", "fail": True})
+    slow, _ = queue.submit("echo", {"query": "y", "delay": 5})
+
+    assert wait_for_status(queue, failing["id"])["error"] == "panne"
+    assert "Délai dépassé" in wait_for_status(queue, slow["id"])["error"]
+    assert queue.stats()["timeouts"] == 1
+
+
+def test_unknown_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit("inconnu", {})
+
+
+def test_store_persists_and_expires(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    job, _ = JobStore(path, ttl=60).create("echo", {"query": "a"})
+
+    reopened = JobStore(path, ttl=60)
+    assert reopened.get(job["id"])["payload"] == {"query": "a"}
+    assert reopened.claim(60)["id"] == job["id"]
+    assert reopened.claim(60) is None  # déjà réservée
+
+    expired, _ = JobStore(path, ttl=0).create("echo", {"query": "b"}, idempotency_key="k")
+    assert reopened.get(expired["id"]) is None
+    again, created = reopened.create("echo", {"query": "b"}, idempotency_key="k")
+    assert created and again["id"] != expired["id"]
+
+
+def test_stale_jobs_use_the_deadline_set_at_claim(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path, ttl=60)
+    long_job, _ = store.create("echo", {"query": "long"})
+    short_job, _ = store.create("echo", {"query": "court"})
+
+    # Un worker au JOB_TIMEOUT plus long ne voit pas sa tâche échouer chez un autre
+    assert store.claim(600)["id"] == long_job["id"]
+    assert store.claim(-1)["id"] == short_job["id"]  # échéance déjà dépassée (worker arrêté)
+    assert JobStore(path, ttl=60).fail_stale() == 1
+
+    assert store.get(long_job["id"])["status"] == "running"
+    assert store.get(short_job["id"])["error"] == "Tâche interrompue (worker arrêté)"
+
+
+def test_late_worker_cannot_overwrite_a_stale_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), ttl=60)
+    job, _ = store.create("echo", {"query": "a"})
+    assert store.claim(-1)["id"] == job["id"]
+    assert store.fail_stale() == 1
+
+    assert not store.complete(job["id"], {"answer": "tardive"})
+    assert not store.fail(job["id"], "autre erreur")
+    stale = store.get(job["id"])
+    assert stale["status"] == "failed" and stale["result"] is None
+    assert stale["error"] == "Tâche interrompue (worker arrêté)"
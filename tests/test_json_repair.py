@@ -0,0 +1,44 @@
+import pytest
+from app.services.json_repair import JSONRepairError, repair_json
+from app.agents.fertilizer.schemas import FertilizerExtraction
+from app.agents.weather.schemas import WeatherExtraction
+
+
+def test_valid_json_with_fences_and_prose():
+    text = 'Voici le résultat :\n```json\n{"intent": "FORECAST", "culture": "maïs"}\n```'
+    assert repair_json(text) == {"intent": "FORECAST", "culture": "maïs"}
+
+
+def test_common_llm_mistakes_are_repaired():
+    text = "{'intent': 'NPK_CALC', culture: cacao, \"superficie_ha\": 2.5, // commentaire\n \"stade\": null,}"
+    assert repair_json(text) == {"intent": "NPK_CALC", "culture": "cacao", "superficie_ha": 2.5, "stade": None}
+
+
+def test_missing_commas_and_unescaped_quotes():
+    text = '{"intent": "DIAGNOSIS"\n "symptomes": "feuilles "brûlées" au bord"}'
+    assert repair_json(text) == {"intent": "DIAGNOSIS", "symptomes": 'feuilles "brûlées" au bord'}
+
+
+def test_truncated_output_is_closed():
+    text = '{"intent": "MONITORING", "culture": "cacao", "period_days": 30, "notes": ["pluie", "vent'
+    assert repair_json(text) == {
+        "intent": "MONITORING", "culture": "cacao", "period_days": 30, "notes": ["pluie", "vent"],
+    }
+    assert repair_json('{"intent": "ALERT", "culture":') == {"intent": "ALERT"}
+
+
+def test_no_json_raises():
+    with pytest.raises(JSONRepairError):
+        repair_json("Désolé, je ne peux pas répondre.")
+    with pytest.raises(JSONRepairError):
+        repair_json("")
+
+
+def test_schemas_are_tolerant():
+    weather = WeatherExtraction.model_validate({"intent": " forecast ", "culture": None, "period_days": "30 jours"})
+    assert (weather.intent, weather.culture, weather.period_days) == ("FORECAST", "Non spécifié", 30)
+    assert WeatherExtraction.model_validate({"intent": "INCONNU", "period_days": 10}).period_days == 7
+
+    fertilizer = FertilizerExtraction.model_validate({"intent": "npk_calc", "superficie_ha": "2,5 ha", "culture": 3})
+    assert (fertilizer.intent, fertilizer.superficie_ha, fertilizer.culture) == ("NPK_CALC", 2.5, "3")
+    assert FertilizerExtraction().intent == "GENERAL"
@@ -0,0 +1,116 @@
+import threading
+import time
+import pytest
+from app.services.llm_cache import LLMCache, TieredLLMCache
+from app.services.llm_disk_cache import DiskLLMCache
+from app.services.llm_service import _cache_key
+
+
+def test_cache_hit_and_miss():
+    cache = LLMCache(max_entries=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", "réponse")
+    assert cache.get("a") == "réponse"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cache_lru_eviction_by_entries():
+    cache = LLMCache(max_entries=2, ttl=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")  # "a" devient le plus récent
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_eviction_by_bytes():
+    cache = LLMCache(max_entries=100, max_bytes=10, ttl=60)
+    cache.set("a", "12345")
+    cache.set("b", "67890")
+    cache.set("c", "xyz")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_cache_oversized_value_is_skipped():
+    cache = LLMCache(max_entries=100, max_bytes=4, ttl=60)
+    cache.set("a", "trop long")
+    assert len(cache) == 0
+
+
+def test_cache_expiry_sweep():
+    cache = LLMCache(max_entries=10, ttl=0.01, sweep_interval=3600)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    time.sleep(0.02)
+    assert cache.sweep() == 2
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_cache_key_includes_generation_params():
+    base = _cache_key("Bonjour", None, "model-a", None, 2048)
+    assert base != _cache_key("Bonjour", None, "model-b", None, 2048)
+    assert base != _cache_key("Bonjour", None, "model-a", 0.2, 2048)
+    assert base != _cache_key("Bonjour", None, "model-a", None, 256)
+
+
+def test_disk_cache_roundtrip_and_expiry(tmp_path):
+    disk = DiskLLMCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    disk.set("a", "réponse persistante")
+    value, ttl_left = disk.get("a")
+    assert value == "réponse persistante"
+    assert 0 < ttl_left <= 60
+    disk.set("b", "expirée", ttl=-1)
+    assert disk.get("b") == (None, 0)
+
+
+def test_disk_cache_size_eviction(tmp_path):
+    disk = DiskLLMCache(str(tmp_path / "cache.sqlite3"), max_bytes=200, ttl=60, evict_every=1)
+    for i in range(20):
+        disk.set(f"k{i}", f"valeur {i} " + "x" * i)
+    assert disk.stats()["bytes"] <= 200
+    assert disk.get("k19")[0] is not None
+
+
+def test_tiered_cache_shares_between_instances_and_warms(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker_a = TieredLLMCache(LLMCache(ttl=60), DiskLLMCache(path, ttl=60))
+    worker_a.set("k", "partagée")
+
+    # Un autre worker (ou un redémarrage) retrouve l'entrée via le L2
+    worker_b = TieredLLMCache(LLMCache(ttl=60), DiskLLMCache(path, ttl=60))
+    assert worker_b.get("k") == "partagée"
+    assert worker_b.l1.get("k") == "partagée"
+
+    restarted = TieredLLMCache(LLMCache(ttl=60), DiskLLMCache(path, ttl=60))
+    assert restarted.warm(10) == 1
+    assert len(restarted.l1) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_tiered_cache_keeps_sqlite_off_the_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = TieredLLMCache(LLMCache(ttl=60), DiskLLMCache(path, ttl=60))
+    reader = TieredLLMCache(LLMCache(ttl=60), DiskLLMCache(path, ttl=60))
+    loop_thread = threading.get_ident()
+    l2_threads = []
+    for cache in (writer, reader):
+        for name in ("get", "set"):
+            original = getattr(cache.l2, name)
+
+            def spy(*args, _original=original, **kwargs):
+                l2_threads.append(threading.get_ident())
+                return _original(*args, **kwargs)
+            monkeypatch.setattr(cache.l2, name, spy)
+
+    await writer.aset("k", "partagée")
+    assert writer.l1.get("k") == "partagée"
+    assert reader.l2.stats()["entries"] == 1  # écriture L2 terminée au retour de aset
+    assert await reader.aget("k") == "partagée"
+    assert l2_threads and loop_thread not in l2_threads
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from config import Config
+from app.services.io_loop import io_loop
+from app.services.llm_clients import ClientRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(Config, "OPENROUTER_API_KEY", "test-key")
+    return ClientRegistry()
+
+
+@pytest.mark.asyncio
+async def test_one_async_client_per_process(registry):
+    first = registry.get_async("openrouter")
+    assert first is registry.get_async("openrouter")
+    assert registry.stats()["async_clients"] == 1
+    await registry.aclose()
+    assert registry.stats()["async_clients"] == 0
+
+
+def test_async_client_is_reused_across_request_loops(registry):
+    async def get():
+        return registry.get_async("openrouter")
+
+    # Flask exécute chaque vue asynchrone dans une nouvelle boucle
+    assert asyncio.run(get()) is asyncio.run(get())
+    assert registry.stats()["created"] == 1
+
+
+@pytest.mark.asyncio
+async def test_io_loop_runs_calls_and_streams_across_loops():
+    seen = []
+
+    async def call():
+        seen.append(asyncio.get_running_loop())
+        return 42
+
+    async def chunks():
+        for part in ("a", "b", "c"):
+            seen.append(asyncio.get_running_loop())
+            yield part
+
+    assert await io_loop.run(call()) == 42
+    assert [c async for c in io_loop.iterate(chunks())] == ["a", "b", "c"]
+    assert set(seen) == {io_loop.loop} and io_loop.loop is not asyncio.get_running_loop()
+
+
+@pytest.mark.asyncio
+async def test_io_loop_propagates_cancellation():
+    cancelled = asyncio.Event()
+    started = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    async def slow():
+        loop.call_soon_threadsafe(started.set)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            loop.call_soon_threadsafe(cancelled.set)
+            raise
+
+    task = asyncio.create_task(io_loop.run(slow()))
+    await started.wait()
+    task.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert task.cancelled()
+
+
+def test_sync_client_is_shared(registry):
+    assert registry.get_sync("openrouter") is registry.get_sync("openrouter")
+
+
+def test_missing_key_returns_none(monkeypatch):
+    monkeypatch.setattr(Config, "GROK_API_KEY", None)
+    assert ClientRegistry().get_sync("grok") is None
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from app.services.llm_governor import LLMGovernor
+
+
+@pytest.mark.asyncio
+async def test_in_flight_limit_is_respected():
+    governor = LLMGovernor(max_in_flight=2, requests_per_second=1000, tokens_per_minute=10**9)
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with governor.slot("tool"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*[call() for _ in range(6)])
+    assert peak == 2
+    assert governor.stats()["in_flight"] == 0
+    assert governor.stats()["by_kind"]["tool"]["calls"] == 6
+
+
+@pytest.mark.asyncio
+async def test_routing_calls_jump_ahead_of_synthesis():
+    governor = LLMGovernor(max_in_flight=1, requests_per_second=1000, tokens_per_minute=10**9)
+    order = []
+
+    async def call(kind):
+        async with governor.slot(kind):
+            order.append(kind)
+            await asyncio.sleep(0.01)
+
+    blocker = asyncio.create_task(call("tool"))
+    await asyncio.sleep(0)
+    waiting = [asyncio.create_task(call(k)) for k in ("synthesize", "synthesize", "route", "extract")]
+    await asyncio.sleep(0)
+    await asyncio.gather(blocker, *waiting)
+    assert order == ["tool", "route", "extract", "synthesize", "synthesize"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    governor = LLMGovernor(max_in_flight=1, requests_per_second=1000, tokens_per_minute=10**9)
+
+    async def hold():
+        async with governor.slot("tool"):
+            await asyncio.sleep(0.02)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await holder
+    async with governor.slot("route"):
+        pass
+    assert governor.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_request_rate_is_limited():
+    governor = LLMGovernor(max_in_flight=10, requests_per_second=20, tokens_per_minute=10**9)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(25):
+        async with governor.slot("tool"):
+            pass
+    # 20 jetons disponibles d'emblée, les 5 suivants à 20/s
+    assert loop.time() - start >= 0.2
+    assert governor.stats()["rate_limited"] >= 1
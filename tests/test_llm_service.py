@@ -0,0 +1,134 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+import pytest
+from config import Config
+from app.services import llm_service
+from app.services.llm_service import LLMService
+from app.agents.crop.schemas import CropExtraction
+
+
+class FakeCompletions:
+    def __init__(self, fail=False, content=None):
+        self.fail = fail
+        self.content = content
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.last_kwargs = kwargs
+        await asyncio.sleep(0.02)
+        if self.fail:
+            raise ValueError("réponse invalide")
+        if kwargs.get("stream"):
+            return self._stream(self.content or "réponse en flux")
+        message = SimpleNamespace(content=self.content or f"réponse à {kwargs['messages'][-1]['content']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, text):
+        for word in text.split(" "):
+            await asyncio.sleep(0)
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    def install(fail=False, content=None):
+        completions = FakeCompletions(fail, content)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        monkeypatch.setattr(Config, "LLM_PROVIDER", "openrouter")
+        monkeypatch.setattr(Config, "OPENROUTER_API_KEY", "test-key")
+        monkeypatch.setattr(llm_service.client_registry, "get_async", lambda provider: client)
+        return completions
+    return install
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_prompts_make_one_call(fake_client):
+    completions = fake_client()
+    service = LLMService()
+    prompt = f"Quand planter le maïs ? {uuid.uuid4()}"
+    results = await asyncio.gather(*[service.generate_response(prompt, kind="route") for _ in range(4)])
+    assert len(set(results)) == 1
+    assert completions.calls == 1
+    # Deuxième appel servi par le cache
+    await service.generate_response(prompt, kind="route")
+    assert completions.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_are_returned_but_never_cached(fake_client):
+    completions = fake_client(fail=True)
+    service = LLMService()
+    prompt = f"Prix du cacao ? {uuid.uuid4()}"
+    first = await service.generate_response(prompt)
+    assert first.startswith("Erreur LLM")
+    await service.generate_response(prompt)
+    assert completions.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_call_profile_sets_model_and_output_budget(fake_client, monkeypatch):
+    completions = fake_client()
+    profiles = dict(Config.LLM_PROFILES)
+    profiles["route"] = {"model": "petit-modele", "max_tokens": 16, "temperature": 0.0, "timeout": 5}
+    monkeypatch.setattr(Config, "LLM_PROFILES", profiles)
+    service = LLMService()
+    await service.generate_response(f"Météo demain ? {uuid.uuid4()}", kind="route")
+    assert completions.last_kwargs["model"] == "petit-modele"
+    assert completions.last_kwargs["max_tokens"] == 16
+    assert completions.last_kwargs["temperature"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_generate_json_requests_schema_and_repairs_output(fake_client):
+    completions = fake_client(content='```json\n{"intent": "calendar", "culture": "maïs",}\n```')
+    service = LLMService()
+    extraction = await service.generate_json(f"Quand planter le maïs ? {uuid.uuid4()}", CropExtraction)
+    assert extraction == CropExtraction(intent="CALENDAR", culture="maïs")
+    response_format = completions.last_kwargs.get("response_format")
+    assert response_format is not None and response_format["type"] in ("json_schema", "json_object")
+
+
+@pytest.mark.asyncio
+async def test_generate_json_falls_back_to_defaults_on_error(fake_client):
+    fake_client(fail=True)
+    service = LLMService()
+    extraction = await service.generate_json(f"??? {uuid.uuid4()}", CropExtraction)
+    assert extraction.intent == "GENERAL"
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_yields_chunks_then_serves_cache(fake_client):
+    completions = fake_client(content="Semis en mars avril")
+    service = LLMService()
+    prompt = f"Synthèse maïs {uuid.uuid4()}"
+    chunks = [c async for c in service.generate_stream(prompt)]
+    assert chunks == ["Semis ", "en ", "mars ", "avril "]
+    assert completions.last_kwargs["stream"] is True
+    # Réponse complète mise en cache : émise d'un bloc, sans nouvel appel
+    cached = [c async for c in service.generate_stream(prompt)]
+    assert cached == ["Semis en mars avril "]
+    assert completions.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_answer_is_cached_briefly(monkeypatch):
+    from app.services.provider_pool import ProviderPool
+    from tests.test_provider_pool import FakeProvider
+
+    stored = []
+
+    async def aset(key, value, ttl=None):
+        stored.append(ttl)
+
+    monkeypatch.setattr(llm_service._llm_cache, "aset", aset)
+    service = LLMService()
+    service.pool = ProviderPool([FakeProvider("down", fail=True), FakeProvider("up")], primary="test-down")
+    assert await service.generate_response(f"Prix du cacao ? {uuid.uuid4()}", kind="tool") == "test-up"
+    assert stored == [Config.LLM_FALLBACK_CACHE_TTL]  # jamais servie longtemps sous la clé du principal
+
+    service.pool = ProviderPool([FakeProvider("up")], primary="test-up")
+    await service.generate_response(f"Prix du café ? {uuid.uuid4()}", kind="tool")
+    assert stored[-1] is None  # TTL normal pour le principal
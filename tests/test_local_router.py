@@ -0,0 +1,92 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.core.local_router import LocalRouter
+from app.core.orchestrator import AgentOrchestrator
+from app.agents.weather import WeatherAgent
+from app.agents.crop import CropAgent
+from app.agents.economic import EconomicAgent
+
+
+def test_keywords_are_accent_and_plural_insensitive():
+    router = LocalRouter()
+    decision = router.route("Quelles MALADIES sur le cacao ?")
+    assert decision.agents == ["HealthAgent"]
+    assert router.is_confident(decision)
+    assert router.route("meteo demain a Garoua").agents == ["WeatherAgent"]
+
+
+def test_conjunction_selects_two_agents_in_query_order():
+    decision = LocalRouter().route("Quand semer le maïs et quelle météo ?")
+    assert decision.agents == ["CropAgent", "WeatherAgent"]
+
+
+def test_ambiguous_or_unknown_queries_are_not_confident():
+    router = LocalRouter()
+    assert not router.is_confident(router.route("Comment arroser ma parcelle ?"))
+    assert router.route("Bonjour").agents == []
+
+
+def test_candidates_restrict_agents():
+    decision = LocalRouter().route("Prix de l'engrais NPK", candidates=["EconomicAgent"])
+    assert decision.agents == ["EconomicAgent"]
+
+
+def test_classifier_learns_from_logged_llm_decisions(tmp_path):
+    log = tmp_path / "routing.jsonl"
+    examples = [
+        ("Que faire contre la pourriture brune des cabosses", ["HealthAgent"]),
+        ("Les cabosses noircissent sur mes arbres", ["HealthAgent"]),
+        ("Combien se vend le sac de cacao à Douala", ["EconomicAgent"]),
+        ("Où écouler ma production de cacao", ["EconomicAgent"]),
+    ]
+    with open(log, "w", encoding="utf-8") as f:
+        for _ in range(10):
+            for query, agents in examples:
+                f.write(json.dumps({"query": query, "agents": agents}) + "\n")
+    router = LocalRouter(log_path=str(log), min_samples=20)
+    router.retrain()
+    decision = router.route("les cabosses noircissent")
+    assert decision.source == "classifier"
+    assert decision.agents == ["HealthAgent"]
+    assert router.stats()["classifier_trained"]
+
+
+def test_classifier_cannot_veto_clear_keyword_hit(monkeypatch):
+    router = LocalRouter()
+    monkeypatch.setattr(router, "classifier_probs", lambda query: {"EconomicAgent": 0.0, "HealthAgent": 0.9})
+    decision = router.route("Quel est le prix du cacao au marché ?")
+    assert decision.agents == ["EconomicAgent"] and decision.source == "keywords"
+    assert router.is_confident(decision)
+
+
+def test_routing_log_is_compacted(tmp_path):
+    log = tmp_path / "routing.jsonl"
+    router = LocalRouter(log_path=str(log), min_samples=1000, max_samples=10)
+    log.write_text("".join(json.dumps({"query": f"q{i}", "agents": ["CropAgent"]}) + "\n" for i in range(25)),
+                   encoding="utf-8")
+    samples = router._load_samples()
+    assert [s["query"] for s in samples] == [f"q{i}" for i in range(15, 25)]
+    assert len(log.read_text(encoding="utf-8").splitlines()) == 10
+
+
+@pytest.mark.asyncio
+async def test_llm_decisions_are_logged_and_counted(tmp_path):
+    log = tmp_path / "routing.jsonl"
+    router = LocalRouter(log_path=str(log), retrain_every=1000)
+    local = router.route("Comment arroser ma parcelle ?")
+    await router.record_llm("Comment arroser ma parcelle ?", ["ResourcesAgent"], local)
+    router.record_local(router.route("Prix du café ?"))
+    stats = router.stats()
+    assert stats["llm"] == 1 and stats["local_keywords"] == 1
+    assert stats["llm_bypass_rate"] == 0.5
+    assert stats["llm_agreement_rate"] == 0.0
+    assert json.loads(log.read_text(encoding="utf-8").strip())["agents"] == ["ResourcesAgent"]
+
+
+@pytest.mark.asyncio
+@patch("app.services.llm_service.LLMService.generate_response", new_callable=AsyncMock)
+async def test_orchestrator_skips_llm_when_local_router_is_confident(mock_generate_response):
+    orchestrator = AgentOrchestrator([WeatherAgent(), CropAgent(), EconomicAgent()])
+    assert await orchestrator.route_query("Prix du café à Bafoussam ?") == ["EconomicAgent"]
+    mock_generate_response.assert_not_called()
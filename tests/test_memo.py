@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import pytest
+from app.core.context import RequestContext, reset_current_context, set_current_context
+from app.core.memo import RequestMemo, memoized
+
+calls = {"sync": 0, "async": 0}
+
+
+@memoized("test.sync")
+def slow_sum(region, days=3):
+    calls["sync"] += 1
+    threading.Event().wait(0.02)
+    return f"{region}:{days}"
+
+
+@memoized("test.async")
+async def slow_fetch(region):
+    calls["async"] += 1
+    await asyncio.sleep(0.02)
+    return region.upper()
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.update({"sync": 0, "async": 0})
+
+
+@pytest.mark.asyncio
+async def test_tool_computed_once_per_request_across_threads_and_tasks():
+    token = set_current_context(RequestContext(region="Nord"))
+    try:
+        results = await asyncio.gather(
+            asyncio.to_thread(slow_sum, "Nord"),
+            asyncio.to_thread(slow_sum, "Nord"),
+            asyncio.to_thread(slow_sum, "Nord", days=7),
+            slow_fetch("Nord"), slow_fetch("Nord"),
+        )
+    finally:
+        reset_current_context(token)
+    assert results == ["Nord:3", "Nord:3", "Nord:7", "NORD", "NORD"]
+    assert calls["sync"] == 2  # deux jeux d'arguments distincts
+    assert calls["async"] == 1
+
+
+def test_no_memo_outside_a_request_or_across_requests():
+    slow_sum("Est")
+    slow_sum("Est")
+    assert calls["sync"] == 2
+    for _ in range(2):
+        token = set_current_context(RequestContext())
+        try:
+            slow_sum("Est")
+        finally:
+            reset_current_context(token)
+    assert calls["sync"] == 4
+
+
+def test_failed_computation_is_not_memoized():
+    memo = RequestMemo()
+    with pytest.raises(ValueError):
+        memo.get_or_compute("k", lambda: (_ for _ in ()).throw(ValueError("échec")))
+    assert memo.get_or_compute("k", lambda: 42) == 42
+    assert memo.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_owner_does_not_cancel_waiters():
+    memo = RequestMemo()
+    started = asyncio.Event()
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        started.set()
+        await asyncio.sleep(0.05)
+        return "météo"
+
+    owner = asyncio.create_task(memo.aget_or_compute("weather.snapshot", compute))
+    await started.wait()
+    waiter = asyncio.create_task(memo.aget_or_compute("weather.snapshot", compute))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert await waiter == "météo"  # le calcul est repris par l'appelant en attente
+    assert owner.cancelled() and not waiter.cancelled()
+    assert len(runs) == 2
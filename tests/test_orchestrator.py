@@ -0,0 +1,38 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from config import Config
+from app.core.orchestrator import AgentOrchestrator
+from app.agents.weather import WeatherAgent
+from app.agents.weather.schemas import WeatherExtraction
+from app.agents.crop import CropAgent
+from app.agents.crop.schemas import CropExtraction
+from app.models.extraction import RoutingExtraction
+
+# Question sans mot-clé : le routeur local n'est pas assez confiant
+QUERY = "Pour mon maïs, que prévoir sur un mois ?"
+
+
+@pytest.mark.asyncio
+async def test_fused_routing_returns_agents_with_entities(monkeypatch):
+    monkeypatch.setattr(Config, "ROUTER_FUSED", True)
+    routing = RoutingExtraction(agents=[
+        {"name": "CropAgent", "intent": "calendar", "culture": "maïs"},
+        {"name": "WeatherAgent", "intent": "MONITORING", "culture": "maïs", "period_days": "30"},
+        {"name": "AgentInconnu", "intent": "GENERAL"},
+    ])
+    orchestrator = AgentOrchestrator([WeatherAgent(), CropAgent()])
+    with patch.object(orchestrator.llm_service, "generate_json", AsyncMock(return_value=routing)) as generate_json:
+        names, extracted = await orchestrator.route_and_extract(QUERY)
+    assert generate_json.await_count == 1
+    assert names == ["CropAgent", "WeatherAgent"]
+    assert extracted["CropAgent"] == CropExtraction(intent="CALENDAR", culture="maïs")
+    assert extracted["WeatherAgent"] == WeatherExtraction(intent="MONITORING", culture="maïs", period_days=30)
+
+
+@pytest.mark.asyncio
+async def test_pre_extracted_entities_skip_agent_extraction(monkeypatch):
+    agent = CropAgent()
+    monkeypatch.setattr(agent.llm_service, "generate_json", AsyncMock())
+    monkeypatch.setattr(agent.llm_service, "generate_response", AsyncMock(return_value="Calendrier"))
+    await agent.process(QUERY, {"region": "Centre"}, CropExtraction(intent="CALENDAR", culture="maïs"))
+    agent.llm_service.generate_json.assert_not_called()
@@ -0,0 +1,158 @@
+import asyncio
+import pytest
+from config import Config
+from app.services.provider_pool import LLMProvider, ProviderPool
+from app.services.llm_governor import llm_governor
+
+
+class FakeProvider(LLMProvider):
+    def __init__(self, name, delay=0.0, fail=False):
+        super().__init__(f"test-{name}", "fake-model")
+        self.breaker.record_success()
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    def available(self):
+        return True
+
+    async def complete(self, messages, model, max_tokens, temperature, json_schema=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise asyncio.TimeoutError()
+        return self.name
+
+
+MESSAGES = [{"role": "user", "content": "Météo demain ?"}]
+
+
+@pytest.fixture(autouse=True)
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(Config, "LLM_HEDGE_MIN_DELAY", 0.02)
+    monkeypatch.setattr(Config, "LLM_HEDGE_MAX_DELAY", 0.02)
+    # Les appels des autres tests ne doivent pas vider le seau de requêtes du limiteur partagé
+    monkeypatch.setattr(llm_governor, "requests_per_second", 1000.0)
+
+
+@pytest.mark.asyncio
+async def test_routes_to_fastest_provider_after_observation():
+    slow, fast = FakeProvider("slow", delay=0.03), FakeProvider("fast", delay=0.0)
+    pool = ProviderPool([slow, fast], primary="test-slow")
+    slow.stats.record(0.5, ok=True)
+    fast.stats.record(0.05, ok=True)
+    assert await pool.complete(MESSAGES, kind="route", budget=1) == "test-fast"
+
+
+@pytest.mark.asyncio
+async def test_fails_over_to_next_provider():
+    down, up = FakeProvider("down", fail=True), FakeProvider("up")
+    pool = ProviderPool([down, up], primary="test-down")
+    assert await pool.complete(MESSAGES, budget=1) == "test-up"
+    assert down.stats.errors == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_and_loser_is_cancelled():
+    stuck, backup = FakeProvider("stuck", delay=1.0), FakeProvider("backup", delay=0.0)
+    pool = ProviderPool([stuck, backup], primary="test-stuck")
+    result = await pool.complete(MESSAGES, kind="route", budget=2, hedge=True)
+    assert result == "test-backup"
+    assert pool.hedges_sent == 1
+    assert backup.stats.hedges_won == 1
+    await asyncio.sleep(0)
+    assert stuck.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_unmeasured_provider_does_not_outrank_primary():
+    primary, spare = FakeProvider("primary"), FakeProvider("spare")
+    pool = ProviderPool([spare, primary], primary="test-primary")
+    assert pool.ranked()[0] is primary  # aucun historique : le principal d'abord
+    primary.stats.record(0.8, ok=True)
+    assert pool.ranked()[0] is primary  # le secours jamais appelé ne compte pas pour 0 ms
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_cancels_hedged_call_during_hedge_delay(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_HEDGE_MAX_DELAY", 1.0)
+    monkeypatch.setattr(Config, "LLM_HEDGE_MIN_DELAY", 1.0)
+    stuck, backup = FakeProvider("stuck", delay=5.0), FakeProvider("backup")
+    pool = ProviderPool([stuck, backup], primary="test-stuck")
+    call = asyncio.create_task(pool.complete(MESSAGES, kind="route", budget=10, hedge=True))
+    await asyncio.sleep(0.05)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    await asyncio.sleep(0)
+    assert stuck.cancelled == 1 and pool.hedges_sent == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_requests_do_not_count_as_provider_errors():
+    picky = FakeProvider("picky")
+
+    async def reject(*args, **kwargs):
+        raise ValueError("requête invalide")  # équivalent d'un 4xx non réessayable
+
+    picky.complete = reject
+    pool = ProviderPool([picky], primary="test-picky")
+    with pytest.raises(ValueError):
+        await pool.complete(MESSAGES, budget=1)
+    assert picky.stats.errors == 0 and picky.stats.error_rate() == 0.0
+
+
+def test_provider_interface_is_abstract():
+    with pytest.raises(TypeError):
+        LLMProvider("incomplet", "modele")
+
+
+@pytest.mark.asyncio
+async def test_gemini_calls_run_on_the_shared_io_loop():
+    from types import SimpleNamespace
+    from app.services.io_loop import io_loop
+    from app.services.provider_pool import GeminiProvider
+
+    loops = []
+
+    class FakeModel:
+        def __init__(self, model):
+            pass
+
+        async def generate_content_async(self, prompt, generation_config, stream=False):
+            loops.append(asyncio.get_running_loop())
+            if not stream:
+                return SimpleNamespace(text="réponse")
+
+            async def chunks():
+                for text in ("ré", "ponse"):
+                    loops.append(asyncio.get_running_loop())
+                    yield SimpleNamespace(text=text)
+            return chunks()
+
+    provider = GeminiProvider("gemini-test", "gemini-model")
+    provider._genai = SimpleNamespace(GenerativeModel=FakeModel)
+    assert await provider.complete(MESSAGES, "gemini-model", 64, None) == "réponse"
+    assert [c async for c in provider.stream(MESSAGES, "gemini-model", 64, None)] == ["ré", "ponse"]
+    assert loops and all(loop is io_loop.loop for loop in loops)
+
+
+@pytest.mark.asyncio
+async def test_served_reports_the_provider_that_answered():
+    down, up = FakeProvider("down", fail=True), FakeProvider("up")
+    pool = ProviderPool([down, up], primary="test-down")
+    served = {}
+    assert await pool.complete(MESSAGES, model="primary-model", budget=1, served=served) == "test-up"
+    assert served == {"provider": "test-up", "model": "fake-model"}
+
+    slow, fast = FakeProvider("slow", delay=1.0), FakeProvider("fast")
+    pool = ProviderPool([slow, fast], primary="test-slow")
+    served = {}
+    await pool.complete(MESSAGES, kind="route", budget=2, hedge=True, served=served)
+    assert served["provider"] == "test-fast"  # requête hedgée gagnante
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from app.services.resilience import CircuitBreaker, CircuitOpenError, call_with_resilience
+
+
+class Transient(asyncio.TimeoutError):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_then_succeeds():
+    calls = 0
+
+    async def flaky():
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise Transient()
+        return "ok"
+
+    result = await call_with_resilience(flaky, budget=5, max_retries=2, backoff_base=0.001)
+    assert result == "ok"
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_are_not_retried():
+    calls = 0
+
+    async def bad_request():
+        nonlocal calls
+        calls += 1
+        raise ValueError("requête invalide")
+
+    with pytest.raises(ValueError):
+        await call_with_resilience(bad_request, budget=5, max_retries=3, backoff_base=0.001)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_budget_bounds_slow_calls():
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await call_with_resilience(slow, budget=0.05, max_retries=0)
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+
+    async def down():
+        raise Transient()
+
+    for _ in range(2):
+        with pytest.raises(Transient):
+            await call_with_resilience(down, budget=1, max_retries=0, breaker=breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    async def up():
+        return "ok"
+
+    with pytest.raises(CircuitOpenError):
+        await call_with_resilience(up, budget=1, max_retries=0, breaker=breaker)
+
+    await asyncio.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert await call_with_resilience(up, budget=1, max_retries=0, breaker=breaker) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
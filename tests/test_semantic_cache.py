@@ -0,0 +1,90 @@
+from app.services.semantic_cache import SemanticCache
+from app.utils.text import normalize_query, query_signature
+
+
+def test_normalize_query_folds_accents_and_synonyms():
+    assert normalize_query("Quand planter le maïs ?") == normalize_query("quand semer du mais")
+
+
+def test_rephrased_query_hits_cache():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("Quand planter le maïs ?", "Centre", "CropAgent", "Mars-avril.")
+    assert cache.lookup("quand semer du mais", "Centre", "CropAgent") == "Mars-avril."
+
+
+def test_cache_is_scoped_by_region_and_agent():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("Quand planter le maïs ?", "Centre", "CropAgent", "Mars-avril.")
+    assert cache.lookup("Quand planter le maïs ?", "Nord", "CropAgent") is None
+    assert cache.lookup("Quand planter le maïs ?", "Centre", "WeatherAgent") is None
+
+
+def test_cache_is_scoped_by_declared_soil():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("Rotation après le maïs ?", "Centre", "CropAgent", "Arachide (sableux).", soil_type="Sableux")
+    assert cache.lookup("rotation après maïs", "Centre", "CropAgent", soil_type="sableux") == "Arachide (sableux)."
+    assert cache.lookup("rotation après maïs", "Centre", "CropAgent", soil_type="Argileux") is None
+    assert cache.lookup("rotation après maïs", "Centre", "CropAgent") is None  # sol dominant de la région
+
+
+def test_different_crop_does_not_match():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("Quand planter le maïs ?", "Centre", "CropAgent", "Mars-avril.")
+    assert cache.lookup("Quand planter le cacao ?", "Centre", "CropAgent") is None
+
+
+def test_expired_entries_are_ignored():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("Prix du cacao", "Centre", "EconomicAgent", "1500 FCFA/kg", ttl=-1)
+    assert cache.lookup("prix du cacao", "Centre", "EconomicAgent") is None
+
+
+def test_lsh_index_used_beyond_brute_force_limit():
+    cache = SemanticCache(threshold=0.9, brute_force_limit=8, max_entries_per_scope=64)
+    names = ["".join(chr(97 + (i * 7919 // 26 ** k) % 26) for k in range(4)) for i in range(100)]
+    for i, name in enumerate(names):
+        cache.store(f"parcelle {name} champ {name[::-1]}", "Centre", "CropAgent", f"r{i}")
+    assert cache.stats()["entries"] == 64
+    assert cache.lookup(f"parcelle {names[99]} champ {names[99][::-1]}", "Centre", "CropAgent") == "r99"
+    # Les plus anciennes entrées ont été remplacées (tampon circulaire)
+    assert cache.lookup(f"parcelle {names[0]} champ {names[0][::-1]}", "Centre", "CropAgent") is None
+
+
+def test_numbers_and_crops_must_match_exactly():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("Quelle dose d'engrais pour 2 hectares de maïs ?", "Centre", "FertilizerAgent", "dose 2 ha")
+    cache.store("Quelle maladie sur mes feuilles de cacao jaunies ?", "Centre", "HealthAgent", "cacao")
+
+    assert cache.lookup("quelle dose engrais pour 2 hectares de mais", "Centre", "FertilizerAgent") == "dose 2 ha"
+    assert cache.lookup("Quelle dose d'engrais pour 20 hectares de maïs ?", "Centre", "FertilizerAgent") is None
+    assert cache.lookup("Quelle maladie sur mes feuilles de tomates jaunies ?", "Centre", "HealthAgent",
+                        threshold=0.8) is None
+    assert cache.lookup("quelle maladie sur feuilles cacaoyers jaunies", "Centre", "HealthAgent",
+                        threshold=0.8) == "cacao"
+
+
+def test_scopes_are_bounded_and_expired_scopes_dropped():
+    cache = SemanticCache(threshold=0.9, max_total_entries=5)
+    for hectares in range(20):  # un périmètre par superficie
+        cache.store(f"engrais pour {hectares} hectares", "Centre", "FertilizerAgent", f"dose {hectares}")
+    stats = cache.stats()
+    assert stats["scopes"] == 5 and stats["entries"] == 5
+    assert cache.lookup("engrais pour 19 hectares", "Centre", "FertilizerAgent") == "dose 19"
+    assert cache.lookup("engrais pour 0 hectares", "Centre", "FertilizerAgent") is None  # évincé (LRU)
+
+    cache = SemanticCache(threshold=0.9, sweep_interval=0)
+    cache.store("Prix du cacao", "Centre", "EconomicAgent", "1500 FCFA/kg", ttl=-1)
+    cache.store("Prix du café", "Centre", "EconomicAgent", "1200 FCFA/kg", ttl=-1)
+    assert cache.lookup("prix du cacao", "Centre", "EconomicAgent") is None
+    assert cache.stats()["scopes"] == 1  # supprimé à la lecture
+    cache.store("Prix du riz", "Centre", "EconomicAgent", "600 FCFA/kg")  # balayage périodique
+    assert cache.stats()["scopes"] == 1 and cache.stats()["expired_scopes"] == 2
+
+
+def test_conjunction_mais_is_not_maize():
+    assert query_signature("Il pleut beaucoup mais quand planter le cacao ?") == ("cacao",)
+    assert query_signature("Quand planter le mais ?") == query_signature("quand semer du maïs") == ("mais",)
+
+    cache = SemanticCache(threshold=0.8)
+    cache.store("Il pleut beaucoup, quand planter le cacao ?", "Centre", "CropAgent", "Après les pluies.")
+    assert cache.lookup("Il pleut beaucoup mais quand planter le cacao ?", "Centre", "CropAgent") == "Après les pluies."
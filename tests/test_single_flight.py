@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "réponse"
+
+    results = await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+    assert results == ["réponse"] * 5
+    assert calls == 1
+    assert flight.stats()["followers"] == 4
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_are_propagated_and_not_kept():
+    flight = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("429")
+
+    results = await asyncio.gather(*[flight.do("k", failing) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert calls == 1
+
+    async def ok():
+        return "ok"
+
+    # Un nouvel appel repart de zéro : l'erreur n'a pas été mise en cache
+    assert await flight.do("k", ok) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "fini"
+
+    leader = asyncio.create_task(flight.do("k", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", slow))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == "fini"
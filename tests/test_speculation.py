@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from config import Config
+from app.core.orchestrator import AgentOrchestrator
+from app.core.speculation import Speculator, speculator
+from app.agents.weather import WeatherAgent
+from app.agents.resources import ResourcesAgent
+from app.agents.resources.schemas import ResourcesExtraction
+
+
+class SlowAgent:
+    has_prefetch = False
+
+    def __init__(self, name):
+        self.name = name
+
+    async def prepare(self, query, context, with_extraction=True):
+        await asyncio.sleep(0.05)
+        return f"préparé:{self.name}"
+
+
+@pytest.mark.asyncio
+async def test_confirmed_work_is_kept_and_the_rest_cancelled():
+    spec = Speculator(top_k=2, min_prior=0.2, max_in_flight=4)
+    agents = {"A": SlowAgent("A"), "B": SlowAgent("B"), "C": SlowAgent("C")}
+    tasks = spec.start(agents, "q", {}, [("A", 0.6), ("B", 0.3), ("C", 0.1)])
+    assert set(tasks) == {"A", "B"}
+    task_b = tasks["B"]
+    spec.discard(tasks, keep={"A"})
+    assert await spec.claim(tasks["A"]) == "préparé:A"
+    assert task_b.cancelled()
+    stats = spec.stats()
+    assert (stats["started"], stats["useful"], stats["wasted"], stats["in_flight"]) == (2, 1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_budget_limits_in_flight_speculation():
+    spec = Speculator(top_k=2, min_prior=0.0, max_in_flight=1)
+    agents = {"A": SlowAgent("A"), "B": SlowAgent("B")}
+    tasks = spec.start(agents, "q", {}, [("A", 0.5), ("B", 0.5)])
+    assert list(tasks) == ["A"] and spec.stats()["skipped_budget"] == 1
+    spec.discard(tasks, keep=set())
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_reuses_speculative_extraction(monkeypatch):
+    monkeypatch.setattr(Config, "ROUTER_FUSED", False)
+    monkeypatch.setattr(Config, "SEMANTIC_CACHE_ENABLED", False)
+    weather, resources = WeatherAgent(), ResourcesAgent()
+    monkeypatch.setattr(weather, "prepare", AsyncMock(return_value=None))
+    monkeypatch.setattr(resources, "extract", AsyncMock(return_value=ResourcesExtraction(intent="IRRIGATION")))
+    monkeypatch.setattr(resources.llm_service, "generate_response", AsyncMock(return_value="Plan irrigation"))
+    orchestrator = AgentOrchestrator([weather, resources])
+    monkeypatch.setattr(orchestrator.llm_service, "generate_response", AsyncMock(return_value="ResourcesAgent"))
+
+    before = speculator.stats()
+    responses = await orchestrator.handle_query("Comment arroser ma parcelle ?")
+    after = speculator.stats()
+
+    assert list(responses) == ["ResourcesAgent"]
+    resources.extract.assert_awaited_once()
+    assert after["useful"] - before["useful"] == 1
+    assert after["wasted"] - before["wasted"] == 1
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import pytest
+from config import Config
+from app.agents.base_agent import BaseAgent
+from app.api.sse import sse_stream
+from app.core.context import RequestContext
+from app.core.orchestrator import AgentOrchestrator
+
+
+class SleepyAgent(BaseAgent):
+    def __init__(self, name, delay):
+        super().__init__(name=name, description=name)
+        self.delay = delay
+
+    async def process(self, query, context, extracted=None):
+        await asyncio.sleep(self.delay)
+        return f"réponse {self.name}"
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    monkeypatch.setattr(Config, "SPECULATION_ENABLED", False)
+    monkeypatch.setattr(Config, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "SYNTHESIS_MODE", "llm")
+    orchestrator = AgentOrchestrator([SleepyAgent("LentAgent", 0.05), SleepyAgent("RapideAgent", 0.0)])
+
+    async def fake_route(query, local=None, context=None):
+        return ["LentAgent", "RapideAgent"], {}
+
+    async def fake_stream(prompt, kind="synthesize"):
+        for delta in ("Synthèse ", "courte"):
+            yield delta
+
+    monkeypatch.setattr(orchestrator, "route_and_extract", fake_route)
+    monkeypatch.setattr(orchestrator.llm_service, "generate_stream", fake_stream)
+    return orchestrator
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_agents_as_they_complete(orchestrator):
+    events = [e async for e in orchestrator.stream_query("question", RequestContext(region="Nord"))]
+    kinds = [e["event"] for e in events]
+    assert kinds == ["routing", "agent", "agent", "synthesis", "synthesis", "done"]
+    # L'agent rapide arrive avant le lent, malgré l'ordre de routage
+    assert [e["data"]["name"] for e in events if e["event"] == "agent"] == ["RapideAgent", "LentAgent"]
+    assert events[-1]["data"]["final_response"] == "Synthèse courte"
+
+
+def test_sse_stream_formats_events(orchestrator):
+    body = "".join(sse_stream(orchestrator.stream_query("question")))
+    blocks = [b for b in body.split("\n\n") if b]
+    assert blocks[0].startswith("event: routing\ndata: ")
+    done = json.loads(blocks[-1].split("data: ", 1)[1])
+    assert done["agents"] == ["LentAgent", "RapideAgent"]
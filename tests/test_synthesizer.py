@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import AsyncMock
+from config import Config
+from app.core.context import RequestContext
+from app.core.orchestrator import AgentOrchestrator
+from app.core.synthesizer import TemplateSynthesizer
+
+RESPONSES = {
+    "CropAgent": (
+        "Voici le calendrier de plantation pour le maïs :\n"
+        "## Calendrier\n"
+        "🌱 Semis de mars à avril (première campagne)\n"
+        "- Écartement 80 x 40 cm, 2 grains par poquet\n"
+        "Le maïs aime les sols bien drainés et riches en matière organique."
+    ),
+    "WeatherAgent": (
+        "🌧️ Pluies prévues : 45 mm sur 7 jours\n"
+        "🌱 Semis de mars à avril (première campagne)\n"
+        "N'hésitez pas à me reposer la question."
+    ),
+}
+
+
+def test_template_keeps_facts_and_drops_filler_and_duplicates():
+    text = TemplateSynthesizer(max_words=150).synthesize("Quand planter le maïs ?", RESPONSES)
+    assert "**🌱 Cultures**" in text and "**🌦️ Météo**" in text
+    assert "45 mm" in text and "80 x 40 cm" in text
+    assert text.count("Semis de mars à avril") == 1
+    assert "Voici" not in text and "N'hésitez" not in text and "Calendrier" not in text
+
+
+def test_template_respects_word_budget_and_prefers_numbers():
+    text = TemplateSynthesizer(max_words=20).synthesize("?", RESPONSES)
+    body_words = [w for line in text.splitlines() if not line.startswith("**") for w in line.split()]
+    assert len([w for w in body_words if w != "•"]) <= 20
+    assert "45 mm" in text
+    assert "matière organique" not in text
+
+
+@pytest.mark.asyncio
+async def test_template_mode_per_request_skips_llm(monkeypatch):
+    monkeypatch.setattr(Config, "SYNTHESIS_MODE", "llm")
+    orchestrator = AgentOrchestrator([])
+    monkeypatch.setattr(orchestrator.llm_service, "generate_response", AsyncMock())
+    text = await orchestrator.synthesize_response("?", RESPONSES, RequestContext(synthesis="template"))
+    orchestrator.llm_service.generate_response.assert_not_called()
+    assert "45 mm" in text
@@ -0,0 +1,230 @@
+import asyncio
+import httpx
+import pytest
+from app.agents.weather import tools
+from app.agents.weather.client import WeatherClient
+from app.agents.weather.health import OpenMeteoGuard
+from app.agents.weather.refresh import WeatherRefresher
+from app.services.resilience import CircuitBreaker
+
+DAILY = {
+    "time": [f"2026-01-{d:02d}" for d in range(1, 15)],
+    "precipitation_sum": [0.0, 2.5, 12.0, 0.0, 0.0, 30.0, 1.0, 0.0, 0.0, 5.0, 8.0, 0.0, 0.0, 3.0],
+    "temperature_2m_max": [31.0] * 14,
+    "temperature_2m_min": [21.0] * 14,
+    "et0_fao_evapotranspiration": [4.5] * 14,
+    "windspeed_10m_max": [18.0] * 14,
+}
+
+
+def payload(request):
+    data = {"current_weather": {"temperature": 27.4, "windspeed": 12.0}}
+    if "daily" in request.url.params:
+        data["daily"] = DAILY
+    locations = request.url.params["latitude"].split(",")
+    return [data] * len(locations) if len(locations) > 1 else data
+
+
+@pytest.fixture
+def client(monkeypatch):
+    state = {"requests": 0, "delay": 0.0, "status": 200}
+
+    def handler(request):
+        state["requests"] += 1
+        return httpx.Response(state["status"], json=payload(request))
+
+    async def async_handler(request):
+        state["requests"] += 1
+        await asyncio.sleep(state["delay"])
+        return httpx.Response(state["status"], json=payload(request))
+
+    weather_client = WeatherClient(transport=httpx.MockTransport(handler),
+                                   async_transport=httpx.MockTransport(async_handler))
+    monkeypatch.setattr(tools, "weather_client", weather_client)
+    monkeypatch.setattr(tools, "_weather_cache", {})
+    monkeypatch.setattr(tools, "weather_guard", OpenMeteoGuard(
+        CircuitBreaker("open-meteo-test", failure_threshold=2, reset_timeout=60), negative_ttl=30))
+    yield state
+    asyncio.run(weather_client.aclose())
+
+
+@pytest.mark.asyncio
+async def test_async_tools_match_sync_facade(client):
+    pairs = [
+        (tools.get_weather_forecast, tools.get_weather_forecast_async),
+        (tools.get_irrigation_advice, tools.get_irrigation_advice_async),
+        (tools.get_climate_alerts, tools.get_climate_alerts_async),
+        (tools.analyze_rainfall_patterns, tools.analyze_rainfall_patterns_async),
+        (tools.get_agricultural_weather_summary, tools.get_agricultural_weather_summary_async),
+        (tools.get_frost_risk, tools.get_frost_risk_async),
+        (tools.get_optimal_planting_conditions, tools.get_optimal_planting_conditions_async),
+        (tools.get_crop_monitoring_plan, tools.get_crop_monitoring_plan_async),
+    ]
+    for sync_tool, async_tool in pairs:
+        assert await async_tool("Ouest") == sync_tool("Ouest")
+    assert client["requests"] == 1  # un seul instantané par région, le reste vient du cache
+
+
+@pytest.mark.asyncio
+async def test_slow_api_does_not_block_event_loop(client):
+    client["delay"] = 0.2
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        forecast = await tools.get_weather_forecast_async("Nord")
+    finally:
+        task.cancel()
+    assert "J+14" in forecast
+    assert ticks >= 10
+
+
+def test_async_client_reused_across_request_loops(client):
+    async def fetch():
+        return await tools.weather_client.get_json({"latitude": "3.8", "longitude": "11.5"})
+
+    # Flask exécute chaque vue asynchrone dans une nouvelle boucle : le pool reste le même
+    asyncio.run(fetch())
+    first = tools.weather_client._async_client()
+    asyncio.run(fetch())
+    assert tools.weather_client._async_client() is first
+    assert client["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_http_error_returns_none(client):
+    client["status"] = 503
+    assert await tools.fetch_weather_data_async("Sud", daily=True) is None
+    assert tools.weather_client.stats()["errors"] == 1
+    assert await tools.get_weather_forecast_async("Sud") == (
+        "❌ Prévisions indisponibles.\n📍 Normales Sud: Climat Équatorial, ~24°C, ~125mm/mois")
+
+
+@pytest.mark.asyncio
+async def test_bulk_refresh_fills_every_region_in_one_request(client):
+    refresher = WeatherRefresher(interval=780)
+
+    assert refresher.refresh_once()
+    assert client["requests"] == 1
+    for region in tools.REGION_COORDINATES:
+        assert "J+14" in await tools.get_weather_forecast_async(region)
+        assert "27.4" in tools.get_agricultural_weather_summary(region)
+    assert client["requests"] == 1  # aucune requête utilisateur n'attend l'API
+    assert refresher.stats()["refreshes"] == 1
+
+
+def test_failed_bulk_refresh_keeps_existing_cache(client):
+    tools.fetch_weather_data("Centre", daily=True)
+    client["status"] = 500
+    refresher = WeatherRefresher(interval=780)
+
+    assert not refresher.refresh_once()
+    assert refresher.stats()["failures"] == 1
+    assert tools.fetch_weather_data("Centre", daily=True)["daily"] == DAILY
+
+
+def test_summary_costs_one_request_per_region(client):
+    summary = tools.get_agricultural_weather_summary("Littoral")
+
+    assert "27.4" in summary and "Pluie 3j: 14mm" in summary
+    assert client["requests"] == 1
+    snapshot = tools.get_weather_snapshot("Littoral")
+    assert snapshot.daily == DAILY and snapshot.current["windspeed"] == 12.0
+    assert tools.fetch_weather_data("Littoral") == {"current_weather": snapshot.current}
+    assert client["requests"] == 1
+
+
+def test_new_fetch_gets_new_version(client, monkeypatch):
+    first = tools.get_weather_snapshot("Est")
+    monkeypatch.setattr(tools, "_cache_ttl", 0)
+    second = tools.get_weather_snapshot("Est")
+    assert second.version > first.version
+    assert client["requests"] == 2
+
+
+def test_failed_region_is_negatively_cached(client):
+    client["status"] = 503
+    assert tools.get_weather_snapshot("Centre") is None
+    assert tools.get_weather_snapshot("Centre") is None
+    assert client["requests"] == 1  # pas de nouvel essai pendant le TTL négatif
+
+    assert tools.get_weather_snapshot("Ouest") is None  # les autres régions restent interrogées
+    assert client["requests"] == 2
+    assert set(tools.weather_guard.stats()["negative_cache"]) == {"Centre", "Ouest"}
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_serves_climate_normals_without_calls(client):
+    client["status"] = 503
+    await tools.get_weather_snapshot_async("Centre")
+    await tools.get_weather_snapshot_async("Littoral")
+    assert tools.weather_guard.breaker.state == CircuitBreaker.OPEN
+
+    forecast = await tools.get_weather_forecast_async("Nord")
+    alerts = await tools.get_climate_alerts_async("Nord")
+    assert "Normales Nord: Climat Soudano-sahélien" in forecast and "Normales Nord" in alerts
+    assert not WeatherRefresher(interval=780).refresh_once()
+    assert client["requests"] == 2
+
+    health = tools.weather_guard.stats()
+    assert not health["healthy"] and health["short_circuits"] == 3
+
+
+def test_half_open_probe_recovers(client, monkeypatch):
+    client["status"] = 503
+    tools.get_weather_snapshot("Centre")
+    tools.get_weather_snapshot("Littoral")
+    breaker = tools.weather_guard.breaker
+    assert breaker.state == CircuitBreaker.OPEN
+
+    monkeypatch.setattr(breaker, "reset_timeout", 0)  # délai de réarmement écoulé
+    client["status"] = 200
+    assert tools.get_weather_snapshot("Nord") is not None  # appel de test
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert tools.weather_guard.healthy
+    assert client["requests"] == 3
+
+
+@pytest.mark.asyncio
+async def test_crop_calendar_reuses_weather_summary_of_the_request(client):
+    from unittest.mock import AsyncMock, patch
+    from app.agents.crop.agent import CropAgent
+    from app.agents.crop.schemas import CropExtraction
+    from app.core.context import RequestContext, reset_current_context, set_current_context
+
+    context = RequestContext(region="centre")  # orthographe libre de l'utilisateur
+    token = set_current_context(context)
+    try:
+        summary = await tools.get_agricultural_weather_summary_async("Centre")  # WeatherAgent
+        with patch("app.services.llm_service.LLMService.generate_response", new_callable=AsyncMock) as llm:
+            llm.return_value = "Semis en mars."
+            await CropAgent().process("calendrier cacao", context,
+                                      CropExtraction(intent="CALENDAR", culture="cacao"))
+    finally:
+        reset_current_context(token)
+    assert summary in llm.call_args.args[0]
+    assert context.memo.stats()["hits"] >= 1  # synthèse servie par le mémo, pas recalculée
+    assert client["requests"] == 1
+
+
+def test_days_without_temperatures_are_shown_as_unavailable():
+    from app.agents.weather.snapshot import WeatherSnapshot
+
+    daily = dict(DAILY, temperature_2m_max=[None] * 14, temperature_2m_min=[21.0] * 6 + [None] * 8)
+    snapshot = WeatherSnapshot.from_payload("Centre", {"current_weather": {"temperature": 27.0}, "daily": daily})
+
+    forecast = tools._weather_forecast("Centre", snapshot)
+    assert "nan" not in forecast
+    assert "J+7: n/d-n/d°C" in forecast
+
+    plan = tools._crop_monitoring_plan("Centre", snapshot, "maïs", 7)
+    assert "nan" not in plan
+    assert "Températures : non disponibles" in plan
+    assert "21/n/d" not in plan and "n/d/21°C" in plan
+    assert "Température max. non disponible" in plan
@@ -0,0 +1,53 @@
+import pytest
+from app.agents.weather.series import WeatherSeries
+
+DAILY = {
+    "time": [f"2026-03-{d:02d}" for d in range(1, 11)],
+    "precipitation_sum": [0.0, 12.0, None, 3.0, 0.4, 25.0, 0.0, 1.0, 7.5, 0.0],
+    "temperature_2m_max": [30.0, 31.5, 29.0, None, 33.0, 35.5, 28.0, 27.0, 30.0, 32.0],
+    "temperature_2m_min": [18.0, 4.0, 19.0, 20.0, -1.5, 21.0, 17.0, 16.0, 15.0, 18.0],
+    "et0_fao_evapotranspiration": [4.0, 3.5, 4.2, 5.0, 5.5, 2.0, 4.8, 4.1, 3.0, 4.4],
+    "windspeed_10m_max": [12.0, 55.0, 20.0, 18.0, 9.0, 30.0, 14.0, 11.0, 10.0, 16.0],
+}
+
+
+def test_window_aggregates_match_naive_computation():
+    series = WeatherSeries(DAILY)
+    precip = [p or 0.0 for p in DAILY["precipitation_sum"]]
+    et0 = DAILY["et0_fao_evapotranspiration"]
+
+    assert series.rain(3) == pytest.approx(sum(precip[:3]))
+    assert series.rain(7, start=7) == pytest.approx(sum(precip[7:]))  # tronquée en fin de série
+    assert series.et0_total(7) == pytest.approx(sum(et0[:7]))
+    assert series.water_balance(10) == pytest.approx(sum(precip) - sum(et0))
+    assert series.rainy_days(10) == len([p for p in precip if p > 0.5])
+    assert series.tmin_min(7) == -1.5
+    assert series.tmax_max(3) == 31.5
+    assert series.wind_max(3) == 55.0
+    assert series.tmax_mean(4) == pytest.approx((30.0 + 31.5 + 29.0) / 3)  # valeur nulle ignorée
+
+
+def test_missing_columns_and_empty_series():
+    series = WeatherSeries({"time": ["2026-03-01"], "precipitation_sum": [2.0]})
+    assert series.wind_max(3) is None
+    assert series.et0_total(1) == 5.0  # ET0 par défaut
+    assert series.tmin_min(1) is None  # aucune température
+
+    empty = WeatherSeries({"time": []})
+    assert len(empty) == 0
+    assert empty.rain(3) == 0.0
+    assert empty.tmin_min(7) is None
+
+
+def test_null_temperatures_give_none():
+    series = WeatherSeries({
+        "time": ["2026-03-01", "2026-03-02", "2026-03-03"],
+        "temperature_2m_max": [None, None, None],
+        "temperature_2m_min": [None, None, 12.0],
+        "windspeed_10m_max": [None, None, None],
+    })
+    assert series.tmax_max(3) is None
+    assert series.tmin_min(2) is None
+    assert series.tmin_min(3) == 12.0
+    assert series.wind_max(3) is None
+    assert series.tmax_mean(3) is None